@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Batched Affirmation Generation
+Asks the model for a whole bundle of affirmations in one structured JSON call
+instead of one round trip per affirmation, then re-requests only the items
+that were missing or unusable.
+"""
+
+import json
+import re
+
+import ollama_client
+from model_config import configured_model
+
+# ==================== BATCH CONFIGURATION ====================
+OLLAMA_MODEL = configured_model("affirmations", "mixtral:8x7b-instruct-v0.1-q6_K")  # See model_benchmark.py
+MAX_BATCH_ROUNDS = 3     # Initial call plus top-up calls for missing items
+USE_JSON_SCHEMA = True   # Send a JSON schema as `format` (Ollama 0.5+); False sends "json"
+# =============================================================
+
+_NUMBERING = re.compile(r"^\s*(?:\d+[.)]|[-*•])\s*")
+
+
+def batch_schema(count: int) -> dict:
+    """JSON schema for {"affirmations": [count strings]}."""
+    return {
+        "type": "object",
+        "properties": {
+            "affirmations": {
+                "type": "array",
+                "items": {"type": "string"},
+                "minItems": count,
+                "maxItems": count,
+            }
+        },
+        "required": ["affirmations"],
+    }
+
+
+def build_batch_prompt(category: str, subcategory: str, count: int, existing=None) -> str:
+    prompt = (
+        f"Write {count} unique, positive affirmations for the following category and subcategory.\n"
+        f"Category: {category}\nSubcategory: {subcategory}\n"
+        f"Each affirmation must be a standalone, powerful, one-sentence affirmation.\n"
+    )
+    if existing:
+        prompt += "Do not repeat any of these:\n" + "\n".join(f"- {a}" for a in existing) + "\n"
+    prompt += (
+        f'Respond with JSON only, in the form {{"affirmations": ["...", "..."]}} '
+        f"with exactly {count} items."
+    )
+    return prompt
+
+
+def parse_affirmation_batch(raw: str) -> list:
+    """Return the usable affirmations in a JSON reply (empty list if invalid)."""
+    try:
+        data = json.loads(raw)
+    except (TypeError, ValueError):
+        return []
+    if isinstance(data, dict):
+        data = data.get("affirmations", [])
+    if not isinstance(data, list):
+        return []
+    items = []
+    for item in data:
+        if not isinstance(item, str):
+            continue
+        text = _NUMBERING.sub("", item).strip().strip('"').strip()
+        if text:
+            items.append(text)
+    return items
+
+
+def generate_affirmation_batch(category: str, subcategory: str, count: int,
+                               model: str = OLLAMA_MODEL, max_rounds: int = MAX_BATCH_ROUNDS,
+                               log=None) -> list:
+    """Generate up to `count` unique affirmations in as few model calls as possible.
+
+    The first call asks for the whole bundle; each later round asks only for
+    the number still missing. May return fewer than `count` items if the
+    model keeps failing, so callers should top up or report the shortfall.
+    """
+    affirmations = []
+    seen = set()
+    for round_number in range(1, max_rounds + 1):
+        missing = count - len(affirmations)
+        if missing <= 0:
+            break
+        prompt = build_batch_prompt(category, subcategory, missing, affirmations)
+        response_format = batch_schema(missing) if USE_JSON_SCHEMA else "json"
+        raw = ollama_client.generate(prompt, model=model, format=response_format, cache=False)
+        parsed = parse_affirmation_batch(raw)
+        for text in parsed:
+            key = text.lower()
+            if key not in seen and len(affirmations) < count:
+                seen.add(key)
+                affirmations.append(text)
+        if log:
+            log(f"BATCH_ROUND: {category}/{subcategory} round {round_number} "
+                f"asked {missing}, got {len(parsed)} usable, have {len(affirmations)}/{count}")
+    return affirmations
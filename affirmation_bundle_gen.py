@@ -2,14 +2,19 @@ import os
 import shutil
 import random
 import json
-import subprocess
-import time
 from datetime import datetime
 from pathlib import Path
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 
+import ollama_client
+from font_registry import get_font
+from model_config import configured_model
+from render_farm import RENDER_WORKERS, RenderFarm, RenderTemplate
+from affirmation_batch import generate_affirmation_batch
+from ollama_client import OllamaEmptyResponseError, OllamaError
+
 # Main categories and subcategories
 CATS = {
     "productivity": ["imposter_syndrome", "burnout", "workspace_focus"],
@@ -34,7 +39,7 @@ OUT_BASE = Path("model_output")
 READY_ETSY = Path("ready_for_upload/etsy")
 READY_GUM = Path("ready_for_upload/gumroad")
 
-MODEL_CMD = ["ollama", "run", "mixtral:8x7b-instruct-v0.1-q6_K", "--stdin"]
+MODEL_NAME = configured_model("affirmations", "mixtral:8x7b-instruct-v0.1-q6_K")  # See model_benchmark.py
 
 def ensure_dirs():
     OUT_BASE.mkdir(exist_ok=True, parents=True)
@@ -42,13 +47,15 @@ def ensure_dirs():
     READY_GUM.mkdir(parents=True, exist_ok=True)
 
 def query_model(prompt: str) -> str:
-    res = subprocess.run(MODEL_CMD, input=prompt.encode(), stdout=subprocess.PIPE)
-    return res.stdout.decode("utf-8").strip()
+    text = ollama_client.generate(prompt, model=MODEL_NAME, cache=False).strip()
+    if not text:
+        raise OllamaEmptyResponseError("Model returned no output")
+    return text
 
 def save_png(text: str, path: Path):
     img = Image.new("RGB", (800, 200), "white")
     d = ImageDraw.Draw(img)
-    f = ImageFont.truetype(FONT_PATH, 24)
+    f = get_font(FONT_PATH, 24)
     d.text((20, 80), text, font=f, fill="black")
     img.save(path)
 
@@ -61,6 +68,12 @@ def save_pdf(text: str, path: Path):
 def save_txt(text: str, path: Path):
     path.write_text(text, encoding="utf-8")
 
+RENDER_TEMPLATE = RenderTemplate(
+    "bundle_item",
+    {"txt": save_txt, "pdf": save_pdf, "png": save_png},
+    fonts=[(FONT_PATH, 24)],
+)
+
 def bundle_id(cat: str, sub: str) -> str:
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
     return f"{cat}_{sub}_{ts}"
@@ -77,16 +90,24 @@ def run_generation():
     count = random.randint(3, 7)
     metadata = {"category": category, "subcategory": sub, "bundle_id": bid, "items": []}
 
-    for i in range(1, count+1):
-        prompt = f"Write one affirmation for {category}, subcategory: {sub}."
-        txt = query_model(prompt)
-        fid = f"{i:03d}_{bid}"
-        save_txt(txt, bundle_dir / f"{fid}.txt")
-        save_pdf(txt, bundle_dir / f"{fid}.pdf")
-        save_png(txt, bundle_dir / f"{fid}.png")
-
-        metadata["items"].append({"id": i, "text": txt})
-        time.sleep(0.3)
+    # One structured call for the whole bundle, topped up per item only if it comes back short
+    try:
+        texts = generate_affirmation_batch(category, sub, count, model=MODEL_NAME)
+        while len(texts) < count:
+            texts.append(query_model(f"Write one affirmation for {category}, subcategory: {sub}."))
+    except OllamaError as e:
+        # Never ship a half-built bundle
+        print(f"[!] Model error for {category}/{sub}: {e}; bundle discarded")
+        shutil.rmtree(base_batch)
+        return
+
+    # Every item renders in its own worker process
+    with RenderFarm([RENDER_TEMPLATE], workers=min(RENDER_WORKERS, len(texts))) as farm:
+        renders = [farm.submit(txt, RENDER_TEMPLATE, ("txt", "pdf", "png"), bundle_dir / f"{i:03d}_{bid}")
+                   for i, txt in enumerate(texts, 1)]
+        for i, (txt, render) in enumerate(zip(texts, renders), 1):
+            render.result()
+            metadata["items"].append({"id": i, "text": txt})
 
     (bundle_dir / "metadata.json").write_text(json.dumps(metadata, indent=2), encoding="utf-8")
 
@@ -2,7 +2,9 @@ import os
 import json
 from datetime import datetime
 from pathlib import Path
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
+
+from font_registry import get_font
 
 # Constants
 FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
@@ -22,7 +24,7 @@ def simulate_model_output(category: str) -> list[str]:
 
 # Save text to PNG image
 def save_to_png(text: str, path: Path):
-    font = ImageFont.truetype(FONT_PATH, 20)
+    font = get_font(FONT_PATH, 20)
     lines = text.split("\n")
     width = max(font.getlength(line) for line in lines) + 40
     height = 30 + len(lines) * 30
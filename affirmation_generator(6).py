@@ -4,16 +4,20 @@ import json
 import random
 import argparse
 from datetime import datetime
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
-import subprocess
+
+import ollama_client
+from background_cache import background_frame, background_reader
+from font_registry import get_font
+from model_config import configured_model
+from ollama_client import OllamaConnectionError, OllamaEmptyResponseError, OllamaError
 
 FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
 OUTPUT_ROOT = "ready_for_upload/etsy"
 BACKGROUND_IMAGE_PATH = "background.jpg"
-OLLAMA_MODEL = "mixtral:8x7b-instruct-v0.1-q6_K"
+OLLAMA_MODEL = configured_model("affirmations", "mixtral:8x7b-instruct-v0.1-q6_K")  # See model_benchmark.py
 
 # Full category/subcategory map
 CATEGORIES = {
@@ -37,28 +41,25 @@ CATEGORIES = {
 def ensure_dir(path):
     os.makedirs(path, exist_ok=True)
 
+def pause_for_model(error):
+    print(f"⏸️  Model backend unavailable ({error}); pausing until it recovers...")
+
 def call_model(prompt: str) -> str:
-    try:
-        result = subprocess.run(
-            ["ollama", "run", OLLAMA_MODEL],
-            input=prompt,
-            text=True,
-            capture_output=True,
-            timeout=30
-        )
-        if result.returncode != 0:
-            raise RuntimeError(result.stderr.strip())
-        return result.stdout.strip() or "Default fallback affirmation."
-    except Exception as e:
-        return f"Model failed: {str(e)}"
+    """Return the model's affirmation; raises OllamaError rather than placeholder text."""
+    output = ollama_client.generate_when_available(
+        prompt, on_pause=pause_for_model, model=OLLAMA_MODEL, purpose="generation", cache=False)
+    if not output.strip():
+        raise OllamaEmptyResponseError("Model returned no output")
+    return output.strip()
 
 def generate_background_image(text: str, output_path: str):
-    if os.path.exists(BACKGROUND_IMAGE_PATH):
-        bg = Image.open(BACKGROUND_IMAGE_PATH).convert("RGB").resize((800, 400))
+    bg = background_frame(BACKGROUND_IMAGE_PATH, (800, 400), "RGB")
+    if bg is not None:
+        bg = bg.copy()
     else:
         bg = Image.new("RGB", (800, 400), color=(245, 245, 245))
     draw = ImageDraw.Draw(bg)
-    font = ImageFont.truetype(FONT_PATH, 24)
+    font = get_font(FONT_PATH, 24)
     text_box = draw.textbbox((0, 0), text, font=font)
     x = (bg.width - text_box[2]) // 2
     y = (bg.height - text_box[3]) // 2
@@ -68,8 +69,9 @@ def generate_background_image(text: str, output_path: str):
 def generate_pdf(text: str, output_path: str):
     c = canvas.Canvas(output_path, pagesize=letter)
     width, height = letter
-    if os.path.exists(BACKGROUND_IMAGE_PATH):
-        c.drawImage(ImageReader(BACKGROUND_IMAGE_PATH), 0, 0, width=width, height=height)
+    background = background_reader(BACKGROUND_IMAGE_PATH)
+    if background is not None:
+        c.drawImage(background, 0, 0, width=width, height=height)
     c.setFont("Helvetica-Bold", 14)
     text_object = c.beginText(72, height - 100)
     for line in text.split("\n"):
@@ -97,7 +99,15 @@ def main(category: str, subcategory: str, count: int):
 
     for i in range(count):
         prompt = f"Generate a {subcategory} affirmation for {category}."
-        text = call_model(prompt)
+        try:
+            text = call_model(prompt)
+        except OllamaConnectionError as e:
+            print(f"Model backend still unavailable, stopping after {i} affirmations: {e}")
+            sys.exit(1)
+        except OllamaError as e:
+            # Skip the item instead of rendering an error message as an affirmation
+            print(f"Skipped affirmation {i+1}: {e}")
+            continue
         index = f"{i+1:03}"
         generate_affirmation_files(text, f"{index}_{subcategory}_affirmation", bundle_dir)
 
@@ -36,16 +36,21 @@ import json
 import random
 import argparse
 from datetime import datetime
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
-import subprocess
+
+import ollama_client
+from background_cache import background_frame
+from model_config import configured_model
+from pdf_template import PdfTemplate
+from render_farm import RENDER_WORKERS, RenderFarm, RenderTemplate
+from text_layout import draw_png, png_layout
+from ollama_client import OllamaConnectionError, OllamaEmptyResponseError, OllamaError
 
 FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
 OUTPUT_ROOT = "ready_for_upload/etsy"
 BACKGROUND_IMAGE_PATH = "background.jpg"
-OLLAMA_MODEL = "mixtral:8x7b-instruct-v0.1-q6_K"
+OLLAMA_MODEL = configured_model("affirmations", "mixtral:8x7b-instruct-v0.1-q6_K")  # See model_benchmark.py
 
 # Full category/subcategory map
 CATEGORIES = {
@@ -69,54 +74,51 @@ CATEGORIES = {
 def ensure_dir(path):
     os.makedirs(path, exist_ok=True)
 
+def pause_for_model(error):
+    print(f"⏸️  Model backend unavailable ({error}); pausing until it recovers...")
+
 def call_model(prompt: str) -> str:
-    try:
-        result = subprocess.run(
-            ["ollama", "run", OLLAMA_MODEL],
-            input=prompt,
-            text=True,
-            capture_output=True,
-            timeout=30
-        )
-        if result.returncode != 0:
-            raise RuntimeError(result.stderr.strip())
-        return result.stdout.strip() or "Default fallback affirmation."
-    except Exception as e:
-        return f"Model failed: {str(e)}"
+    """Return the model's affirmation; raises OllamaError rather than placeholder text."""
+    output = ollama_client.generate_when_available(
+        prompt, on_pause=pause_for_model, model=OLLAMA_MODEL, purpose="generation", cache=False)
+    if not output.strip():
+        raise OllamaEmptyResponseError("Model returned no output")
+    return output.strip()
 
 def generate_background_image(text: str, output_path: str):
-    if os.path.exists(BACKGROUND_IMAGE_PATH):
-        bg = Image.open(BACKGROUND_IMAGE_PATH).convert("RGB").resize((800, 400))
+    bg = background_frame(BACKGROUND_IMAGE_PATH, (800, 400), "RGB")
+    if bg is not None:
+        bg = bg.copy()
     else:
         bg = Image.new("RGB", (800, 400), color=(245, 245, 245))
     draw = ImageDraw.Draw(bg)
-    font = ImageFont.truetype(FONT_PATH, 24)
-    text_box = draw.textbbox((0, 0), text, font=font)
-    x = (bg.width - text_box[2]) // 2
-    y = (bg.height - text_box[3]) // 2
-    draw.text((x, y), text, fill=(0, 0, 0), font=font)
+    block = png_layout.layout(text, FONT_PATH, (40, 40, bg.width - 80, bg.height - 80), 24,
+                              align="center", valign="middle")
+    draw_png(draw, block, FONT_PATH, (0, 0, 0))
     bg.save(output_path)
 
+PDF_TEMPLATE = PdfTemplate(letter, background=BACKGROUND_IMAGE_PATH,
+                           body_style=("Helvetica-Bold", 14, (0, 0, 0)), body_x=72, body_top=100)
+
 def generate_pdf(text: str, output_path: str):
-    c = canvas.Canvas(output_path, pagesize=letter)
-    width, height = letter
-    if os.path.exists(BACKGROUND_IMAGE_PATH):
-        c.drawImage(ImageReader(BACKGROUND_IMAGE_PATH), 0, 0, width=width, height=height)
-    c.setFont("Helvetica-Bold", 14)
-    text_object = c.beginText(72, height - 100)
-    for line in text.split("\n"):
-        text_object.textLine(line)
-    c.drawText(text_object)
-    c.save()
+    PDF_TEMPLATE.render(output_path, text.split("\n"))
 
 def save_text_file(text: str, output_path: str):
     with open(output_path, "w") as f:
         f.write(text)
 
-def generate_affirmation_files(text: str, basename: str, output_dir: str):
-    save_text_file(text, os.path.join(output_dir, f"{basename}.txt"))
-    generate_background_image(text, os.path.join(output_dir, f"{basename}.png"))
-    generate_pdf(text, os.path.join(output_dir, f"{basename}.pdf"))
+RENDER_TEMPLATE = RenderTemplate(
+    "affirmation",
+    {"txt": save_text_file, "png": generate_background_image, "pdf": generate_pdf},
+    fonts=[(FONT_PATH, 24)],
+    backgrounds=[(BACKGROUND_IMAGE_PATH, (800, 400), "RGB")],
+)
+
+def generate_affirmation_files(text: str, basename: str, output_dir: str, farm: RenderFarm = None):
+    """Queue the TXT, PNG and PDF for one affirmation; returns the render future."""
+    if farm is None:
+        farm = RenderFarm(workers=0)
+    return farm.submit(text, RENDER_TEMPLATE, ("txt", "png", "pdf"), os.path.join(output_dir, basename))
 
 def main(category: str, subcategory: str, count: int):
     if category not in CATEGORIES or subcategory not in CATEGORIES[category]:
@@ -127,11 +129,24 @@ def main(category: str, subcategory: str, count: int):
     bundle_dir = os.path.join(OUTPUT_ROOT, f"{subcategory}_{category}_{timestamp}")
     ensure_dir(bundle_dir)
 
-    for i in range(count):
-        prompt = f"Generate a {subcategory} affirmation for {category}."
-        text = call_model(prompt)
-        index = f"{i+1:03}"
-        generate_affirmation_files(text, f"{index}_{subcategory}_affirmation", bundle_dir)
+    # Renders run in worker processes while the model writes the next affirmation
+    with RenderFarm([RENDER_TEMPLATE], workers=min(RENDER_WORKERS, count)) as farm:
+        renders = []
+        for i in range(count):
+            prompt = f"Generate a {subcategory} affirmation for {category}."
+            try:
+                text = call_model(prompt)
+            except OllamaConnectionError as e:
+                print(f"Model backend still unavailable, stopping after {i} affirmations: {e}")
+                sys.exit(1)
+            except OllamaError as e:
+                # Skip the item instead of rendering an error message as an affirmation
+                print(f"Skipped affirmation {i+1}: {e}")
+                continue
+            index = f"{i+1:03}"
+            renders.append(generate_affirmation_files(text, f"{index}_{subcategory}_affirmation", bundle_dir, farm))
+        for render in renders:
+            render.result()
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
@@ -3,10 +3,12 @@ import os
 import json
 from datetime import datetime
 from pathlib import Path
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 
+from font_registry import get_font
+
 # === Configuration ===
 CATEGORIES = [
     "productivity",
@@ -47,7 +49,7 @@ def save_pdf(affirmation: str, path: Path):
 def save_image(affirmation: str, path: Path):
     img = Image.new("RGB", (800, 400), color=(255, 255, 255))
     draw = ImageDraw.Draw(img)
-    font = ImageFont.truetype(IMAGE_FONT, 24)
+    font = get_font(IMAGE_FONT, 24)
     draw.text((50, 180), affirmation, font=font, fill=(0, 0, 0))
     img.save(path)
 
@@ -1,12 +1,14 @@
 import os
 import json
 import random
-import subprocess
 from datetime import datetime
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 
+import ollama_client
+from font_registry import get_font
+
 # === CONFIG ===
 BASE_OUTPUT = "model_output"
 READY_OUTPUT = "ready_for_upload"
@@ -28,15 +30,14 @@ CATEGORIES = {
     "motivation": ["get_started", "keep_going"]
 }
 FONTPATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
-MODEL_CMD = ["ollama", "run", "mistral:8x7b-instruct-v0.1-q6_K", "--stdin"]
+MODEL_NAME = "mistral:8x7b-instruct-v0.1-q6_K"
 
 # === UTILITIES ===
 def ensure_dir(path: str):
     os.makedirs(path, exist_ok=True)
 
 def call_model(prompt: str) -> str:
-    result = subprocess.run(MODEL_CMD, input=prompt.encode(), stdout=subprocess.PIPE)
-    return result.stdout.decode().strip()
+    return ollama_client.generate(prompt, model=MODEL_NAME, cache=False).strip()
 
 def generate_affirmation(category: str, subcategory: str) -> str:
     prompt = f"Write a positive affirmation for someone struggling with {subcategory.replace('_', ' ')}."
@@ -53,10 +54,7 @@ def save_json_file(path: str, data: dict):
 def save_image(path: str, text: str):
     img = Image.new('RGB', (800, 400), color=(255, 255, 255))
     draw = ImageDraw.Draw(img)
-    try:
-        font = ImageFont.truetype(FONTPATH, 24)
-    except:
-        font = ImageFont.load_default()
+    font = get_font(FONTPATH, 24)
     draw.text((50, 180), text, fill=(0, 0, 0), font=font)
     draw.text((10, 370), FOOTER, fill=(120, 120, 120), font=font)
     img.save(path)
@@ -1,11 +1,14 @@
 import os
-import subprocess
 import json
 from datetime import datetime
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 
+import ollama_client
+from font_registry import get_font
+from model_config import configured_model
+
 # === CONFIG ===
 BASE_OUTPUT = "model_output"
 READY_UPLOAD = "ready_for_upload"
@@ -13,7 +16,7 @@ FONTPATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
 LEGAL_FOOTER = ("This content was generated and formatted using custom AI workflows by SignalCore LLC\n"
                 "For personal use only. Redistribution is prohibited.\n"
                 "© 2025 SignalCore LLC. All rights reserved.")
-OLLAMA_MODEL = "mixtral:8x7b-instruct-v0.1-q6_K"
+OLLAMA_MODEL = configured_model("affirmations", "mixtral:8x7b-instruct-v0.1-q6_K")  # See model_benchmark.py
 NUM_AFFIRMATIONS = 7
 
 # === FULL CATEGORY MAP ===
@@ -41,13 +44,7 @@ def ensure_dir(path: str):
     os.makedirs(path, exist_ok=True)
 
 def call_model(prompt: str) -> str:
-    result = subprocess.run(
-        ["ollama", "run", OLLAMA_MODEL],
-        input=prompt.encode(),
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
-    )
-    output = result.stdout.decode().strip()
+    output = ollama_client.generate(prompt, model=OLLAMA_MODEL, cache=False).strip()
     return output.split("\n")[0]  # use only first line
 
 def save_text(path: str, content: str):
@@ -57,10 +54,7 @@ def save_text(path: str, content: str):
 def save_image(path: str, content: str):
     img = Image.new('RGB', (800, 400), color=(255, 255, 255))
     draw = ImageDraw.Draw(img)
-    try:
-        font = ImageFont.truetype(FONTPATH, 22)
-    except:
-        font = ImageFont.load_default()
+    font = get_font(FONTPATH, 22)
     draw.text((50, 150), content, fill=(0, 0, 0), font=font)
     draw.text((20, 360), LEGAL_FOOTER, fill=(100, 100, 100), font=font)
     img.save(path)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Decoded-Background Cache
+Keeps decoded, pre-resized background frames and reportlab ImageReader objects
+in memory so a background image is opened, converted and resized once per
+process instead of once per bundle (or once per PDF page).
+
+Entries are keyed by (path, mtime, file size, target size, mode), so editing
+or replacing a background file is picked up on the next render. Total memory
+is capped at BACKGROUND_CACHE_BYTES; the least recently used entries are
+evicted first.
+
+Frames are shared between callers: copy() a frame before drawing on it.
+
+Usage:
+    python3 background_cache.py background.jpg    # Decode once and show cache stats
+"""
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+# ==================== CACHE CONFIGURATION ====================
+BACKGROUND_CACHE_BYTES = int(os.environ.get("BACKGROUND_CACHE_MB", "256")) * 1024 * 1024
+# ==============================================================
+
+
+def _decode(path, size, mode):
+    from PIL import Image
+    with Image.open(path) as im:
+        frame = im.convert(mode)
+    if size and frame.size != tuple(size):
+        frame = frame.resize(tuple(size))
+    return frame, frame.width * frame.height * len(frame.getbands())
+
+
+def _reader(path):
+    from reportlab.lib.utils import ImageReader
+    # Built from the path so JPEG backgrounds are still embedded without re-encoding
+    reader = ImageReader(path)
+    width, height = reader.getSize()
+    return reader, width * height * 4
+
+
+class BackgroundCache:
+    """Thread-safe LRU of decoded backgrounds, capped at max_bytes.
+
+    decoder(path, size, mode) returns (frame, nbytes) and reader_factory(path)
+    returns (ImageReader, nbytes); both may raise OSError.
+    """
+
+    def __init__(self, max_bytes=BACKGROUND_CACHE_BYTES, decoder=_decode, reader_factory=_reader):
+        self.max_bytes = max_bytes
+        self.decoder = decoder
+        self.reader_factory = reader_factory
+        self.counters = {"hits": 0, "decodes": 0, "evictions": 0}
+        self.bytes = 0
+        self._entries = OrderedDict()   # key -> (value, nbytes)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(kind, path, size, mode):
+        st = os.stat(path)
+        return (kind, os.path.realpath(path), st.st_mtime_ns, st.st_size,
+                tuple(size) if size else None, mode)
+
+    def _get(self, key, build):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return entry[0]
+        # Decoded outside the lock so other backgrounds are not held up; a racing
+        # first call may decode twice, and the second result simply replaces the first
+        value, nbytes = build()
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self.counters["decodes"] += 1
+            if nbytes <= self.max_bytes:
+                self._entries[key] = (value, nbytes)
+                self.bytes += nbytes
+                while self.bytes > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self.bytes -= evicted
+                    self.counters["evictions"] += 1
+        return value
+
+    def frame(self, path, size=None, mode="RGBA"):
+        """The decoded frame for path at size (None = native), or None when the file is missing."""
+        try:
+            key = self._key("frame", path, size, mode)
+        except OSError:
+            return None
+        return self._get(key, lambda: self.decoder(path, size, mode))
+
+    def reader(self, path):
+        """A reportlab ImageReader for path, or None when the file is missing."""
+        try:
+            key = self._key("reader", path, None, None)
+        except OSError:
+            return None
+        return self._get(key, lambda: self.reader_factory(path))
+
+    def warm(self, specs):
+        """Decode every (path, size, mode) in specs now, e.g. in a worker initializer."""
+        for path, size, mode in specs:
+            self.frame(path, size, mode)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def report(self) -> str:
+        with self._lock:
+            c = dict(self.counters)
+            entries, used = len(self._entries), self.bytes
+        return (f"🖼️  Backgrounds: {c['decodes']} decoded, reused {c['hits']} times, "
+                f"{entries} cached ({used / 1024 / 1024:.1f} MB), {c['evictions']} evicted")
+
+
+_cache = BackgroundCache()
+
+
+def background_frame(path, size=None, mode="RGBA"):
+    """Shortcut for the process-wide cache's frame(path, size, mode)."""
+    return _cache.frame(path, size, mode)
+
+
+def background_reader(path):
+    """Shortcut for the process-wide cache's reader(path)."""
+    return _cache.reader(path)
+
+
+def warm_backgrounds(specs):
+    """Shortcut for the process-wide cache's warm(specs)."""
+    _cache.warm(specs)
+
+
+def background_report() -> str:
+    return _cache.report()
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    path = sys.argv[1]
+    for _ in range(3):
+        if background_frame(path, (900, 600)) is None:
+            print(f"❌ Background not found: {path}")
+            sys.exit(1)
+    print(background_report())
+
+
+if __name__ == "__main__":
+    main()
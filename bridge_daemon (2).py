@@ -1,12 +1,15 @@
 import os
 import random
-import subprocess
 import time
 from datetime import datetime
 from typing import List
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 from reportlab.pdfgen import canvas
 
+import ollama_client
+from font_registry import get_font
+from ollama_client import OllamaError
+
 OUTPUT_DIR = "./model_output"
 LOG_FILE = "./bridge_log.txt"
 MODEL_NAME = "mixtral:8x7b-instruct-v0.1-q6_K"
@@ -35,16 +38,11 @@ def log_event(message: str):
         f.write(f"[{timestamp}] {message}\n")
 
 def generate_from_model(prompt: str) -> List[str]:
-    process = subprocess.Popen(
-        ["ollama", "run", MODEL_NAME],
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-    )
-    stdout, stderr = process.communicate(input=prompt)
-    if stderr:
-        log_event(f"Model error: {stderr.strip()}")
+    try:
+        stdout = ollama_client.generate(prompt, model=MODEL_NAME, cache=False)
+    except OllamaError as e:
+        log_event(f"Model error: {e}")
+        return []
     return [line.strip() for line in stdout.split("\n") if line.strip()]
 
 def save_text(content: str, filename: str):
@@ -60,10 +58,7 @@ def save_pdf(content: str, filename: str):
 def save_image(content: str, filename: str):
     img = Image.new("RGB", (800, 200), color=(255, 255, 255))
     draw = ImageDraw.Draw(img)
-    try:
-        font = ImageFont.truetype("arial.ttf", 20)
-    except IOError:
-        font = ImageFont.load_default()
+    font = get_font("arial.ttf", 20)
     draw.text((10, 90), content, fill=(0, 0, 0), font=font)
     img.save(os.path.join(OUTPUT_DIR, f"{filename}.png"))
 
@@ -1,12 +1,16 @@
 import os
 import random
-import subprocess
 import time
 from datetime import datetime
 from typing import List
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 from reportlab.pdfgen import canvas
 
+import ollama_client
+from font_registry import get_font
+from ollama_client import OllamaError
+from render_farm import RENDER_WORKERS, RenderFarm, RenderTemplate
+
 OUTPUT_DIR = "./model_output"
 READY_DIR = "./ready_for_upload"
 LOG_FILE = "./bridge_log.txt"
@@ -36,36 +40,34 @@ def log_event(message: str):
         f.write(f"[{timestamp}] {message}\n")
 
 def generate_from_model(prompt: str) -> List[str]:
-    process = subprocess.Popen(
-        ["ollama", "run", MODEL_NAME],
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-    )
-    stdout, stderr = process.communicate(input=prompt)
-    if stderr:
-        log_event(f"Model error: {stderr.strip()}")
+    try:
+        stdout = ollama_client.generate(prompt, model=MODEL_NAME, cache=False)
+    except OllamaError as e:
+        log_event(f"Model error: {e}")
+        return []
     return [line.strip() for line in stdout.split("\n") if line.strip()]
 
-def save_text(content: str, filepath: str):
-    with open(filepath + ".txt", "w") as f:
+def save_text(content: str, path: str):
+    with open(path, "w") as f:
         f.write(content)
 
-def save_pdf(content: str, filepath: str):
-    c = canvas.Canvas(filepath + ".pdf")
+def save_pdf(content: str, path: str):
+    c = canvas.Canvas(path)
     c.drawString(100, 750, content)
     c.save()
 
-def save_image(content: str, filepath: str):
+def save_image(content: str, path: str):
     img = Image.new("RGB", (800, 200), color=(255, 255, 255))
     draw = ImageDraw.Draw(img)
-    try:
-        font = ImageFont.truetype("arial.ttf", 20)
-    except IOError:
-        font = ImageFont.load_default()
+    font = get_font("arial.ttf", 20)
     draw.text((10, 90), content, fill=(0, 0, 0), font=font)
-    img.save(filepath + ".png")
+    img.save(path)
+
+RENDER_TEMPLATE = RenderTemplate(
+    "bridge",
+    {"txt": save_text, "pdf": save_pdf, "png": save_image},
+    fonts=[("arial.ttf", 20)],
+)
 
 def main(prompt_type: str = None, num_outputs: int = None):
     os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -79,26 +81,24 @@ def main(prompt_type: str = None, num_outputs: int = None):
     base_prompt = f"Generate {num_outputs} unique {prompt_type}."
     results = generate_from_model(base_prompt)
 
-    for i, affirmation in enumerate(results[:num_outputs]):
-        timestamp = int(time.time())
-        file_base = f"affirmation_{prompt_type.replace(' ', '_')}_{timestamp}_{i}"
-        raw_path = os.path.join(OUTPUT_DIR, file_base)
-        etsy_path = os.path.join(READY_DIR, "etsy", file_base)
-        gumtree_path = os.path.join(READY_DIR, "gumtree", file_base)
-
-        save_text(affirmation, raw_path)
-        save_pdf(affirmation, raw_path)
-        save_image(affirmation, raw_path)
-
-        save_text(affirmation, etsy_path)
-        save_pdf(affirmation, etsy_path)
-        save_image(affirmation, etsy_path)
-
-        save_text(affirmation, gumtree_path)
-        save_pdf(affirmation, gumtree_path)
-        save_image(affirmation, gumtree_path)
+    items = results[:num_outputs]
+    with RenderFarm([RENDER_TEMPLATE], workers=min(RENDER_WORKERS, 3 * len(items))) as farm:
+        renders = []
+        for i, affirmation in enumerate(items):
+            timestamp = int(time.time())
+            file_base = f"affirmation_{prompt_type.replace(' ', '_')}_{timestamp}_{i}"
+            destinations = [
+                os.path.join(OUTPUT_DIR, file_base),
+                os.path.join(READY_DIR, "etsy", file_base),
+                os.path.join(READY_DIR, "gumtree", file_base),
+            ]
+            renders.append((file_base, [farm.submit(affirmation, RENDER_TEMPLATE, ("txt", "pdf", "png"), dest)
+                                        for dest in destinations]))
 
-        log_event(f"Saved all formats for: {file_base} in model_output and ready_for_upload")
+        for file_base, futures in renders:
+            for future in futures:
+                future.result()
+            log_event(f"Saved all formats for: {file_base} in model_output and ready_for_upload")
 
 if __name__ == "__main__":
     main()
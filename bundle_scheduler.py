@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Async Bundle Scheduler
+Runs every category/subcategory pair of a bundle job as its own asyncio task,
+so model calls, Stable Diffusion backgrounds and rendering for different pairs
+overlap. Separate limits bound how many model requests, background requests
+and render jobs run at once, and each pair reports how long every stage took.
+"""
+
+import asyncio
+import os
+import time
+
+# ==================== SCHEDULER CONFIGURATION ====================
+MODEL_CONCURRENCY = 2                        # Concurrent text-generation requests
+BACKGROUND_CONCURRENCY = 1                   # Concurrent Stable Diffusion requests
+RENDER_CONCURRENCY = os.cpu_count() or 2     # Concurrent PNG/PDF/TXT render jobs
+# =================================================================
+
+
+class BundleScheduler:
+    """Bounded executor for the blocking stages of a bundle pipeline."""
+
+    def __init__(self, model_concurrency: int = MODEL_CONCURRENCY,
+                 render_concurrency: int = RENDER_CONCURRENCY,
+                 background_concurrency: int = BACKGROUND_CONCURRENCY):
+        self.limits = {
+            "model": max(1, model_concurrency),
+            "render": max(1, render_concurrency),
+            "background": max(1, background_concurrency),
+        }
+        self._semaphores = {}
+
+    def _semaphore(self, kind: str) -> asyncio.Semaphore:
+        # Created lazily so they belong to the running event loop
+        if kind not in self._semaphores:
+            self._semaphores[kind] = asyncio.Semaphore(self.limits.get(kind, 1))
+        return self._semaphores[kind]
+
+    async def run(self, kind: str, fn, *args, timings: dict = None, stage: str = None, **kwargs):
+        """Run a blocking call in a worker thread under the `kind` limit.
+
+        Time spent waiting for a slot is recorded as "<stage>_wait" and time
+        spent running as "<stage>" in the optional timings dict.
+        """
+        stage = stage or kind
+        queued = time.perf_counter()
+        async with self._semaphore(kind):
+            started = time.perf_counter()
+            try:
+                return await asyncio.to_thread(fn, *args, **kwargs)
+            finally:
+                if timings is not None:
+                    finished = time.perf_counter()
+                    timings[f"{stage}_wait"] = timings.get(f"{stage}_wait", 0.0) + (started - queued)
+                    timings[stage] = timings.get(stage, 0.0) + (finished - started)
+
+    def model(self, fn, *args, **kwargs):
+        return self.run("model", fn, *args, **kwargs)
+
+    def background(self, fn, *args, **kwargs):
+        return self.run("background", fn, *args, **kwargs)
+
+    def render(self, fn, *args, **kwargs):
+        return self.run("render", fn, *args, **kwargs)
+
+
+async def _run_pair(pair_fn, category: str, subcategory: str, scheduler: BundleScheduler) -> dict:
+    timings = {}
+    started = time.perf_counter()
+    result = {"category": category, "subcategory": subcategory, "stages": timings, "error": None}
+    try:
+        result["value"] = await pair_fn(category, subcategory, scheduler, timings)
+    except Exception as e:
+        result["error"] = e
+    result["total"] = time.perf_counter() - started
+    return result
+
+
+def run_pairs(categories: dict, pair_fn, scheduler: BundleScheduler = None) -> list:
+    """Schedule pair_fn(category, subcategory, scheduler, timings) for every pair.
+
+    pair_fn must be a coroutine function. Returns one result dict per pair with
+    its per-stage timings, total time and any exception it raised.
+    """
+    scheduler = scheduler or BundleScheduler()
+
+    async def run_all():
+        tasks = [
+            asyncio.create_task(_run_pair(pair_fn, category, subcategory, scheduler))
+            for category, subcategories in categories.items()
+            for subcategory in subcategories
+        ]
+        return await asyncio.gather(*tasks)
+
+    return asyncio.run(run_all())
+
+
+def print_timing_report(results: list, wall_time: float = None):
+    """Print per-pair stage timings and a total line."""
+    stage_names = []
+    for result in results:
+        for stage in result["stages"]:
+            if not stage.endswith("_wait") and stage not in stage_names:
+                stage_names.append(stage)
+    print("⏱️  Per-pair timings (seconds, queue wait in brackets):")
+    for result in results:
+        stages = result["stages"]
+        parts = [
+            f"{name} {stages[name]:.2f} [{stages.get(name + '_wait', 0.0):.2f}]"
+            for name in stage_names if name in stages
+        ]
+        status = "✗" if result["error"] else "✓"
+        print(f"  {status} {result['category']}/{result['subcategory']}: "
+              f"total {result['total']:.2f} | " + ", ".join(parts))
+    failed = sum(1 for r in results if r["error"])
+    summary = f"📊 {len(results) - failed}/{len(results)} pairs succeeded"
+    if wall_time is not None:
+        summary += f" in {wall_time:.2f}s wall-clock"
+    print(summary)
@@ -1,12 +1,16 @@
 import subprocess
 import os
-import threading
-import time
-import sys
 import re
 import traceback
 import datetime
 
+import model_lifecycle
+import model_stream
+import model_routing
+import model_session
+import orchestrator_protocol
+from ollama_client import OllamaError
+
 # Configurable verbosity
 VERBOSE = True
 RAW_OUTPUT_LOG = "diagnostic_raw_output.log"
@@ -24,62 +28,28 @@ def log_to_file(logname, content):
     with open(logname, "a", encoding="utf-8") as f:
         f.write(f"[{datetime.datetime.now()}]\n{content}\n---\n")
 
-def run_mixtral(user_command):
-    full_prompt = (
-        f"{project_context}\n"
-        f"USER COMMAND: {user_command}\n"
-        "REMINDER: Do not deviate from the project goal and constraints. Output only actionable code or direct answers."
-    )
-    cmd = ["ollama", "run", "mixtral:8x7b-instruct-v0.1-q6_K"]
-    try:
-        process = subprocess.Popen(
-            cmd,
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
-        )
-        process.stdin.write(full_prompt + "\n")
-        process.stdin.close()
-
-        output_lines = []
-        error_lines = []
-        last_output_time = time.time()
-        thinking_notified = False
-
-        def read_stream(stream, lines, name):
-            for line in stream:
-                lines.append(line)
-                if VERBOSE and name == "stdout":
-                    sys.stdout.write(line)
-                    sys.stdout.flush()
-            stream.close()
-
-        t_out = threading.Thread(target=read_stream, args=(process.stdout, output_lines, "stdout"))
-        t_err = threading.Thread(target=read_stream, args=(process.stderr, error_lines, "stderr"))
-        t_out.start()
-        t_err.start()
-
-        while process.poll() is None:
-            if not output_lines and not thinking_notified and (time.time() - last_output_time) > 3:
-                print("[.] Model is thinking…")
-                thinking_notified = True
-            time.sleep(0.2)
+SESSION_REMINDER = "REMINDER: Do not deviate from the project goal and constraints. Output only actionable code or direct answers."
+session = model_session.ModelSession("mixtral:8x7b-instruct-v0.1-q6_K")
 
-        t_out.join()
-        t_err.join()
-
-        out_str = "".join(output_lines)
-        err_str = "".join(error_lines)
+def run_mixtral(user_command, structured=True):
+    # The project context goes out once as the system prompt; later turns continue
+    # from the session's returned context instead of re-sending it every time
+    system = f"{project_context}\n{SESSION_REMINDER}"
+    # Structured turns ask for schema-checked JSON instead of tags and code fences
+    command = orchestrator_protocol.with_instructions(user_command) if structured else user_command
+    extra = orchestrator_protocol.request_options() if structured else {}
+    try:
+        out_str = model_stream.stream_model(session.generate, f"USER COMMAND: {command}", system=system,
+                                            echo=VERBOSE, **extra)
         # Log raw output
         log_to_file(RAW_OUTPUT_LOG, out_str)
-        if process.returncode != 0 or err_str:
-            log_to_file(ERROR_LOG, f"Model error: {err_str.strip()}")
-            print(f"[!] Model error: {err_str.strip()}")
-            return ""
         return out_str.strip()
 
+    except OllamaError as e:
+        log_to_file(ERROR_LOG, f"Model error: {e}")
+        print(f"[!] Model error: {e}")
+        return ""
+
     except Exception as e:
         log_to_file(ERROR_LOG, f"Unexpected model error: {e}\n{traceback.format_exc()}")
         print(f"[!] Unexpected model error: {e}")
@@ -90,6 +60,11 @@ def parse_model_output(output):
     if VERBOSE:
         print("\n[Diagnostics] Parsing model output:")
         print(output)
+    structured = orchestrator_protocol.parse_structured_output(output)
+    if structured is not None:
+        log_to_file(PARSE_LOG, f"Parse Input:\n{output}\nParse Output (JSON):\n{structured}")
+        return structured
+    # Fallback: the FILENAME/tag/code-fence protocol
     try:
         match = re.search(r"FILENAME:\s*(\S+)", output)
         filename = match.group(1) if match else None
@@ -98,6 +73,7 @@ def parse_model_output(output):
         errors = re.findall(r"<ERROR>(.*?)</ERROR>", output, re.DOTALL)
         parse_result = {
             'filename': filename,
+            'files': [{'filename': filename, 'content': code} for code in code_blocks],
             'code': code_blocks,
             'logs': logs,
             'errors': errors
@@ -107,15 +83,25 @@ def parse_model_output(output):
     except Exception as e:
         log_to_file(ERROR_LOG, f"Parse error: {e}\n{traceback.format_exc()}")
         print(f"[!] Parse error: {e}")
-        return {'filename': None, 'code': [], 'logs': [], 'errors': []}
+        return {'filename': None, 'files': [], 'code': [], 'logs': [], 'errors': []}
 
 def clarify_output(output):
     clarification_prompt = (
         f"Clarify and reformat the following output per protocol (start with FILENAME, then code in triple backticks, logs in <LOG>, errors in <ERROR>):\n{output}\n"
         "Only output using the correct protocol tags."
     )
-    clarified = run_mixtral(clarification_prompt)
-    return clarified
+    orchestrator_protocol.note_clarification()
+    # Reformatting is routed to the small model, outside the conversation session;
+    # the main model only takes over if the reply still lacks protocol markers
+    try:
+        clarified = model_stream.stream_model(
+            model_routing.generate, clarification_prompt, purpose="clarification",
+            accept=lambda text: "FILENAME:" in text and orchestrator_protocol.follows_tag_protocol(text),
+            big_model="mixtral:8x7b-instruct-v0.1-q6_K", echo=VERBOSE)
+    except OllamaError as e:
+        print(f"[!] Model error: {e}")
+        return ""
+    return clarified.strip()
 
 def write_file(filename, content):
     try:
@@ -179,6 +165,7 @@ def run_file(filename, max_retries=3):
 
 def main():
     global project_context
+    model_lifecycle.preload("mixtral:8x7b-instruct-v0.1-q6_K")  # Load the model while the prompt comes up
     print("== Diagnostic Python CLI Orchestrator ==")
     print("Type 'exit' to quit. Type 'context' to view/edit the current project context.")
     print("Type 'verbose on' or 'verbose off' to adjust diagnostics output.")
@@ -190,6 +177,9 @@ def main():
             print("\n[!] EOF received, exiting.")
             break
         if user.lower() in ("exit", "quit"):
+            print(model_lifecycle.report("mixtral:8x7b-instruct-v0.1-q6_K"))
+            print(orchestrator_protocol.report())
+            print(model_routing.get_router("mixtral:8x7b-instruct-v0.1-q6_K").report())
             break
 
         if user.lower() == "verbose on":
@@ -215,6 +205,7 @@ def main():
                         break
                     lines.append(line)
                 project_context = "\n".join(lines)
+                session.reset()
                 print("Context updated.")
             continue
 
@@ -1,12 +1,13 @@
 import subprocess
 import os
-import threading
-import time
-import sys
 import re
 import traceback
 import datetime
 
+import model_lifecycle
+import model_stream
+from ollama_client import OllamaError
+
 # Configurable verbosity
 VERBOSE = True
 RAW_OUTPUT_LOG = "diagnostic_raw_output.log"
@@ -30,56 +31,17 @@ def run_mixtral(user_command):
         f"USER COMMAND: {user_command}\n"
         "REMINDER: Do not deviate from the project goal and constraints. Output only actionable code or direct answers."
     )
-    cmd = ["ollama", "run", "mixtral:8x7b-instruct-v0.1-q6_K"]
     try:
-        process = subprocess.Popen(
-            cmd,
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
-        )
-        process.stdin.write(full_prompt + "\n")
-        process.stdin.close()
-
-        output_lines = []
-        error_lines = []
-        last_output_time = time.time()
-        thinking_notified = False
-
-        def read_stream(stream, lines, name):
-            for line in stream:
-                lines.append(line)
-                if VERBOSE and name == "stdout":
-                    sys.stdout.write(line)
-                    sys.stdout.flush()
-            stream.close()
-
-        t_out = threading.Thread(target=read_stream, args=(process.stdout, output_lines, "stdout"))
-        t_err = threading.Thread(target=read_stream, args=(process.stderr, error_lines, "stderr"))
-        t_out.start()
-        t_err.start()
-
-        while process.poll() is None:
-            if not output_lines and not thinking_notified and (time.time() - last_output_time) > 3:
-                print("[.] Model is thinking…")
-                thinking_notified = True
-            time.sleep(0.2)
-
-        t_out.join()
-        t_err.join()
-
-        out_str = "".join(output_lines)
-        err_str = "".join(error_lines)
+        out_str = model_stream.stream_model(model_lifecycle.generate, full_prompt, model="mixtral:8x7b-instruct-v0.1-q6_K", echo=VERBOSE)
         # Log raw output
         log_to_file(RAW_OUTPUT_LOG, out_str)
-        if process.returncode != 0 or err_str:
-            log_to_file(ERROR_LOG, f"Model error: {err_str.strip()}")
-            print(f"[!] Model error: {err_str.strip()}")
-            return ""
         return out_str.strip()
 
+    except OllamaError as e:
+        log_to_file(ERROR_LOG, f"Model error: {e}")
+        print(f"[!] Model error: {e}")
+        return ""
+
     except Exception as e:
         log_to_file(ERROR_LOG, f"Unexpected model error: {e}\n{traceback.format_exc()}")
         print(f"[!] Unexpected model error: {e}")
@@ -182,6 +144,7 @@ def run_file(filename, max_retries=3):
 
 def main():
     global project_context
+    model_lifecycle.preload("mixtral:8x7b-instruct-v0.1-q6_K")  # Load the model while the prompt comes up
     print("== Diagnostic Python CLI Orchestrator ==")
     print("Type 'exit' to quit. Type 'context' to view/edit the current project context.")
     print("Type 'verbose on' or 'verbose off' to adjust diagnostics output.")
@@ -193,6 +156,7 @@ def main():
             print("\n[!] EOF received, exiting.")
             break
         if user.lower() in ("exit", "quit"):
+            print(model_lifecycle.report("mixtral:8x7b-instruct-v0.1-q6_K"))
             break
 
         if user.lower() == "verbose on":
@@ -16,9 +16,14 @@ import shutil
 from pathlib import Path
 from datetime import datetime
 
+from ollama_client import code_block_closed, OllamaConnectionError, OllamaError
+from model_config import configured_model
+from model_lifecycle import get_lifecycle
+from model_routing import get_router, review_is_confident
+
 # ==================== USER CONFIGURATION ====================
 # Model and Directory Settings
-OLLAMA_MODEL = "mixtral:8x7b-instruct-v0.1-q6_K"
+OLLAMA_MODEL = configured_model("generation", "mixtral:8x7b-instruct-v0.1-q6_K")  # See model_benchmark.py
 DEFAULT_OUTPUT_DIR = "./generated_scripts"
 
 # Retry and Input Settings
@@ -58,6 +63,8 @@ VALIDATORS = {
 class EnhancedPythonCodeGenerator:
     def __init__(self, model_name=OLLAMA_MODEL):
         self.model_name = model_name
+        self.lifecycle = get_lifecycle(model_name)
+        self.router = get_router(model_name)
         self.output_dir = Path(DEFAULT_OUTPUT_DIR)
         self.backup_dir = Path(BACKUP_DIRECTORY)
         self.context_buffer = []
@@ -319,11 +326,14 @@ class EnhancedPythonCodeGenerator:
             "results": validation_results
         }
     
-    def call_model(self, prompt: str, purpose: str = "generation") -> str:
-        """Call the Ollama model with a prompt and return the response."""
+    def call_model(self, prompt: str, purpose: str = "generation", cache=True) -> str:
+        """Call the Ollama model with a prompt and return the response.
+
+        Repeated prompts are answered from the shared prompt cache; pass
+        cache="refresh" to force a fresh sample (e.g. on retries).
+        """
         thinking_active = None
         progress_thread = None
-        process = None
         
         try:
             if purpose == "generation":
@@ -354,28 +364,20 @@ class EnhancedPythonCodeGenerator:
             progress_thread = threading.Thread(target=show_thinking_progress, daemon=True)
             progress_thread.start()
             
-            # Start the subprocess without timeout
-            process = subprocess.Popen(
-                ["ollama", "run", self.model_name],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-            
-            # Send the prompt and wait for response
-            stdout, stderr = process.communicate(input=prompt.encode())
+            # Stream the reply and stop as soon as the first code block closes;
+            # extract_python_code ignores anything after it anyway
+            # Review goes to the small model when routed there; an unconvincing
+            # answer is re-run on the main model
+            accept = review_is_confident if purpose == "validation" else None
+            output = self.router.generate(prompt, purpose=purpose, accept=accept,
+                                          stop_when=[code_block_closed], cache=cache)
             
             # Stop the thinking indicator
             thinking_active.clear()
             if progress_thread:
                 progress_thread.join(timeout=1)
             
-            if process.returncode != 0:
-                error_msg = stderr.decode().strip()
-                print(f"Error calling model: {error_msg}")
-                return None
-            
-            output = stdout.decode().strip()
+            output = output.strip()
             if purpose == "generation":
                 print("✓ Model finished thinking!")
             else:
@@ -385,28 +387,21 @@ class EnhancedPythonCodeGenerator:
         except KeyboardInterrupt:
             print(f"\n⚠️  {purpose.capitalize()} interrupted by user.")
             return None
-        except FileNotFoundError:
-            print("Error: Ollama not found. Please ensure Ollama is installed and in your PATH.")
+        except OllamaConnectionError as e:
+            print(f"Error: {e}. Please ensure Ollama is installed and running (ollama serve).")
+            return None
+        except OllamaError as e:
+            print(f"Error calling model: {e}")
             return None
         except Exception as e:
             print(f"Unexpected error: {e}")
             return None
         finally:
-            # Always clean up the thinking indicator and process
+            # Always clean up the thinking indicator
             if thinking_active:
                 thinking_active.clear()
             if progress_thread:
                 progress_thread.join(timeout=1)
-            if process:
-                try:
-                    if process.poll() is None:  # Process is still running
-                        process.terminate()
-                        process.wait(timeout=5)
-                except:
-                    try:
-                        process.kill()
-                    except:
-                        pass
     
     def extract_python_code(self, response: str) -> str:
         """Extract Python code from the model response."""
@@ -659,8 +654,8 @@ Request: {user_request}
 
 Python code:"""
         
-        # Call the model
-        response = self.call_model(prompt)
+        # Call the model (retries re-sample instead of replaying the cached answer that just failed)
+        response = self.call_model(prompt, cache=True if attempt == 1 else "refresh")
         if not response:
             return False
         
@@ -721,6 +716,8 @@ Python code:"""
 def main():
     """Main interactive loop."""
     generator = EnhancedPythonCodeGenerator()
+    # Load the model in the background while the banner prints and we wait for input
+    generator.lifecycle.preload()
     
     print("🐍 Enhanced Interactive Python Code Generator with 10 Code Validators")
     print("=" * 80)
@@ -781,6 +778,9 @@ def main():
             # Handle special commands
             if user_input.lower() in ['quit', 'exit', 'q']:
                 print("Goodbye! 👋")
+                print(generator.lifecycle.report())
+                print(generator.lifecycle.client.cache_report())
+                print(generator.router.report())
                 break
             
             if user_input.lower() == 'clear context':
@@ -815,6 +815,9 @@ def main():
             
         except KeyboardInterrupt:
             print("\n\nGoodbye! 👋")
+            print(generator.lifecycle.report())
+            print(generator.lifecycle.client.cache_report())
+            print(generator.router.report())
             break
         except Exception as e:
             print(f"An error occurred: {e}")
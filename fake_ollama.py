@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Fake Ollama Server
+A stand-in for `ollama serve` that needs no GPU or model weights. It speaks
+/api/generate and /api/chat (streaming and not), /api/tags, /api/ps and
+/api/version, and shapes every reply by a latency profile: time to first
+token, tokens per second, error rate, model load time and parallel slots.
+Replies are plausible for this project: JSON affirmation bundles, single
+affirmations, Python code blocks, code reviews and orchestrator JSON.
+
+Point any script at it with OLLAMA_HOST to exercise concurrency, deadlines,
+retries and the benchmarks on a plain Linux box.
+
+Usage:
+    python3 fake_ollama.py                                  # Port 11434, "mixtral" profile
+    python3 fake_ollama.py --port 11500 --profile instant   # No delays at all
+    python3 fake_ollama.py --model qwen2.5-coder:3b=small --error-rate 0.05
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ==================== FAKE SERVER CONFIGURATION ====================
+FAKE_HOST = "127.0.0.1"
+FAKE_PORT = 11434
+PARALLEL_SLOTS = 4           # Requests generated at once per model (OLLAMA_NUM_PARALLEL); others queue
+PROFILES = {                 # Seconds and tokens/sec; jitter is a +/- fraction applied to each delay
+    "instant": {"ttft": 0.0, "prompt_tps": 0, "tokens_per_sec": 0, "load_seconds": 0.0,
+                "error_rate": 0.0, "jitter": 0.0},
+    "small":   {"ttft": 0.08, "prompt_tps": 2000, "tokens_per_sec": 80, "load_seconds": 1.5,
+                "error_rate": 0.0, "jitter": 0.1},
+    "mixtral": {"ttft": 0.4, "prompt_tps": 400, "tokens_per_sec": 20, "load_seconds": 20.0,
+                "error_rate": 0.0, "jitter": 0.1},
+    "flaky":   {"ttft": 0.2, "prompt_tps": 1000, "tokens_per_sec": 40, "load_seconds": 2.0,
+                "error_rate": 0.2, "jitter": 0.3},
+}
+DEFAULT_PROFILE = "mixtral"
+DEFAULT_MODELS = {"mixtral:8x7b-instruct-v0.1-q6_K": "mixtral", "qwen2.5-coder:3b": "small"}
+# ===================================================================
+
+_NS = 1_000_000_000
+_TOKEN = re.compile(r"\s*\S+\s*")
+_COUNT = re.compile(r"\b(?:Write|Generate|Create)\s+(\d+)\b", re.IGNORECASE)
+_CODE_BLOCK = re.compile(r"```(?:python)?\s*\n(.*?)```", re.DOTALL)
+
+AFFIRMATION_STARTS = ["I am", "I choose", "I trust", "I welcome", "I deserve", "I allow", "I create"]
+AFFIRMATION_ENDS = ["calm and focused", "worthy of good things", "growing stronger every day",
+                    "open to new possibilities", "in charge of my attention", "grateful for this moment",
+                    "capable of handling whatever comes", "at peace with my progress"]
+
+
+def tokenize(text: str) -> list:
+    """Split text into word-sized chunks, the unit of streaming and eval_count."""
+    return _TOKEN.findall(text) or ([text] if text else [])
+
+
+def _affirmations(rng: random.Random, count: int) -> list:
+    return [f"{rng.choice(AFFIRMATION_STARTS)} {rng.choice(AFFIRMATION_ENDS)}." for _ in range(count)]
+
+
+def _program(rng: random.Random, prompt: str) -> str:
+    words = re.findall(r"[a-z]+", prompt.lower())
+    name = "_".join(words[-3:]) if words else "task"
+    return (
+        "#!/usr/bin/env python3\n"
+        f'"""Generated program for: {" ".join(prompt.split())[:60]}"""\n\n'
+        f"def {name}(items):\n"
+        f"    total = 0\n"
+        f"    for item in items:\n"
+        f"        total += len(str(item)) * {rng.randint(1, 9)}\n"
+        f"    return total\n\n\n"
+        "def main():\n"
+        f"    print({name}(['alpha', 'beta', 'gamma']))\n\n\n"
+        'if __name__ == "__main__":\n'
+        "    main()\n"
+    )
+
+
+def fake_response(prompt: str, response_format=None) -> str:
+    """A deterministic reply shaped like what the project's prompts ask for."""
+    rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).hexdigest())
+    properties = response_format.get("properties", {}) if isinstance(response_format, dict) else {}
+    match = _COUNT.search(prompt)
+    if "affirmations" in properties:
+        count = properties["affirmations"].get("minItems") or (int(match.group(1)) if match else 5)
+        return json.dumps({"affirmations": _affirmations(rng, count)})
+    if "files" in properties:
+        filename = "generated_script.py"
+        return json.dumps({"filename": filename,
+                           "files": [{"filename": filename, "content": _program(rng, prompt)}],
+                           "logs": ["Created generated_script.py"], "errors": []})
+    if response_format is not None:
+        return json.dumps({"response": "ok"})
+    if "CODE_APPROVED" in prompt:
+        blocks = _CODE_BLOCK.findall(prompt)
+        return f"CODE_APPROVED\n```python\n{blocks[0] if blocks else _program(rng, prompt)}```"
+    if "affirmation" in prompt.lower():
+        if match and int(match.group(1)) > 1:
+            return "\n".join(f"{i}. {text}" for i, text in
+                             enumerate(_affirmations(rng, int(match.group(1))), 1))
+        return _affirmations(rng, 1)[0]
+    if re.search(r"\b(python|code|script|program|function)\b", prompt, re.IGNORECASE):
+        return f"Here is the program:\n\n```python\n{_program(rng, prompt)}```\n"
+    return " ".join(rng.choice(AFFIRMATION_ENDS) for _ in range(12)).capitalize() + "."
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        if self.path == "/api/tags":
+            self._send_json(200, {"models": [{"name": m, "model": m} for m in server.models]})
+        elif self.path == "/api/ps":
+            with server.lock:
+                loaded = sorted(server.loaded)
+            self._send_json(200, {"models": [{"name": m, "model": m} for m in loaded]})
+        elif self.path == "/api/version":
+            self._send_json(200, {"version": "0.0.0-fake"})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": "invalid JSON"})
+            return
+        if self.path == "/api/generate":
+            prompt = payload.get("prompt") or ""
+        elif self.path == "/api/chat":
+            messages = [m for m in payload.get("messages") or [] if m.get("role") == "user"]
+            prompt = messages[-1].get("content", "") if messages else ""
+        else:
+            self._send_json(404, {"error": "not found"})
+            return
+        self.server.count("requests")
+        model = payload.get("model") or ""
+        if self.server.models and model not in self.server.models:
+            self._send_json(404, {"error": f"model '{model}' not found, try pulling it first"})
+            return
+        profile = self.server.profile_for(model)
+        if profile["error_rate"] and self.server.rng.random() < profile["error_rate"]:
+            self.server.count("errors")
+            self._send_json(503, {"error": "server busy, please try again"})
+            return
+        if payload.get("keep_alive") == 0 and not prompt:
+            with self.server.lock:
+                self.server.loaded.discard(model)
+            self._send_json(200, self._final(payload, "", 0, 0, 0, 0))
+            return
+        with self.server.slots_for(model):
+            load_ns = self._load(model, profile)
+            if not prompt and self.path == "/api/generate":
+                self._send_json(200, self._final(payload, "", load_ns, 0, 0, 0))
+                return
+            self._generate(payload, prompt, profile, load_ns)
+
+    def _delay(self, seconds, profile):
+        if seconds <= 0:
+            return 0.0
+        jitter = profile["jitter"]
+        seconds *= 1 + self.server.rng.uniform(-jitter, jitter) if jitter else 1
+        time.sleep(seconds)
+        return seconds
+
+    def _load(self, model, profile) -> int:
+        with self.server.lock:
+            if model in self.server.loaded:
+                return 100_000
+        seconds = self._delay(profile["load_seconds"], profile)
+        with self.server.lock:
+            self.server.loaded.add(model)
+            self.server.stats["loads"] += 1
+        return int(seconds * _NS)
+
+    def _generate(self, payload, prompt, profile, load_ns):
+        text = fake_response(prompt, payload.get("format"))
+        tokens = tokenize(text)
+        prompt_tokens = len(tokenize(prompt)) + len(tokenize(payload.get("system") or ""))
+        started = time.perf_counter()
+        ttft = profile["ttft"] + (prompt_tokens / profile["prompt_tps"] if profile["prompt_tps"] else 0)
+        prompt_seconds = self._delay(ttft, profile)
+        rate = profile["tokens_per_sec"]
+        chat = self.path == "/api/chat"
+        if not payload.get("stream", True):
+            if rate:
+                self._delay(len(tokens) / rate, profile)
+            eval_ns = int((time.perf_counter() - started - prompt_seconds) * _NS)
+            final = self._final(payload, text, load_ns, prompt_tokens, int(prompt_seconds * _NS), eval_ns,
+                                len(tokens))
+            self._send_json(200, final)
+            self.server.count("tokens", len(tokens))
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        eval_started = time.perf_counter()
+        try:
+            for i, token in enumerate(tokens):
+                if rate:
+                    # Pace against the start so slow writes do not accumulate drift
+                    remaining = eval_started + (i + 1) / rate - time.perf_counter()
+                    if remaining > 0:
+                        time.sleep(remaining)
+                chunk = {"model": payload.get("model"), "done": False}
+                if chat:
+                    chunk["message"] = {"role": "assistant", "content": token}
+                else:
+                    chunk["response"] = token
+                self._write_chunk(chunk)
+                self.server.count("tokens")
+            eval_ns = int((time.perf_counter() - eval_started) * _NS)
+            final = self._final(payload, "", load_ns, prompt_tokens, int(prompt_seconds * _NS), eval_ns,
+                                len(tokens))
+            self._write_chunk(final)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.server.count("cancelled")
+            self.close_connection = True
+
+    def _final(self, payload, text, load_ns, prompt_tokens, prompt_ns, eval_ns, eval_count=0) -> dict:
+        final = {"model": payload.get("model"), "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                 "done": True, "done_reason": "stop",
+                 "total_duration": load_ns + prompt_ns + eval_ns, "load_duration": load_ns,
+                 "prompt_eval_count": prompt_tokens, "prompt_eval_duration": prompt_ns,
+                 "eval_count": eval_count, "eval_duration": max(eval_ns, 1)}
+        if self.path == "/api/chat":
+            final["message"] = {"role": "assistant", "content": text}
+        else:
+            final["response"] = text
+            final["context"] = list(payload.get("context") or []) + [0] * (prompt_tokens + eval_count)
+        return final
+
+    def _write_chunk(self, data):
+        line = (json.dumps(data) + "\n").encode()
+        self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+        self.wfile.flush()
+
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the profiles, loaded models and counters."""
+    daemon_threads = True
+
+    def __init__(self, host: str = FAKE_HOST, port: int = FAKE_PORT, models: dict = None,
+                 default_profile: str = DEFAULT_PROFILE, profiles: dict = None,
+                 parallel: int = PARALLEL_SLOTS, seed: int = None):
+        super().__init__((host, port), FakeOllamaHandler)
+        self.profiles = {**PROFILES, **(profiles or {})}
+        self.models = dict(DEFAULT_MODELS if models is None else models)   # model -> profile name
+        self.default_profile = default_profile
+        self.parallel = parallel
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.loaded = set()
+        self.stats = {"requests": 0, "errors": 0, "loads": 0, "tokens": 0, "cancelled": 0}
+        self._slots = {}
+
+    def handle_error(self, request, client_address):
+        # Clients dropping keep-alive connections or cancelling streams are routine here
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def profile_for(self, model: str) -> dict:
+        return self.profiles[self.models.get(model) or self.default_profile]
+
+    def slots_for(self, model: str) -> threading.Semaphore:
+        with self.lock:
+            if model not in self._slots:
+                self._slots[model] = threading.BoundedSemaphore(self.parallel)
+            return self._slots[model]
+
+    def count(self, name: str, amount: int = 1):
+        with self.lock:
+            self.stats[name] += amount
+
+
+def start_fake_server(port: int = 0, **kwargs) -> FakeOllamaServer:
+    """Start a fake server in a background thread (port 0 picks a free port).
+
+    Call shutdown() and server_close() when done.
+    """
+    server = FakeOllamaServer(port=port, **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True, name="fake-ollama").start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Ollama server with configurable latency profiles.")
+    parser.add_argument("--host", default=FAKE_HOST)
+    parser.add_argument("--port", type=int, default=FAKE_PORT)
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, choices=sorted(PROFILES),
+                        help="Profile for models without one of their own")
+    parser.add_argument("--model", action="append", default=[], metavar="NAME=PROFILE",
+                        help="Serve a model with a profile (repeatable; default: mixtral and qwen2.5-coder:3b)")
+    parser.add_argument("--any-model", action="store_true",
+                        help="Answer for any model name with --profile instead of a fixed model list")
+    parser.add_argument("--ttft", type=float, help="Override time to first token (seconds)")
+    parser.add_argument("--tokens-per-sec", type=float, help="Override generation speed")
+    parser.add_argument("--error-rate", type=float, help="Override the fraction of requests answered with 503")
+    parser.add_argument("--load-seconds", type=float, help="Override model load time")
+    parser.add_argument("--parallel", type=int, default=PARALLEL_SLOTS)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    models = dict(item.split("=", 1) if "=" in item else (item, args.profile) for item in args.model)
+    overrides = {key: value for key, value in (("ttft", args.ttft), ("tokens_per_sec", args.tokens_per_sec),
+                                               ("error_rate", args.error_rate),
+                                               ("load_seconds", args.load_seconds)) if value is not None}
+    profiles = {name: {**profile, **overrides} for name, profile in PROFILES.items()}
+    if args.any_model:
+        models = {}       # An empty model list accepts every name
+    elif not models:
+        models = None     # DEFAULT_MODELS
+    server = FakeOllamaServer(args.host, args.port, models, args.profile, profiles, args.parallel, args.seed)
+    print(f"🧪 Fake Ollama listening on {server.url}")
+    for model in server.models or ["(any model)"]:
+        p = server.profile_for(model)
+        print(f"  {model}: ttft {p['ttft']}s, {p['tokens_per_sec'] or '∞'} tok/s, "
+              f"load {p['load_seconds']}s, {p['error_rate']:.0%} errors")
+    print(f"  Set OLLAMA_HOST={server.url} in the scripts' environment. Ctrl+C stops.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\n📊 {server.stats}")
+
+
+if __name__ == "__main__":
+    main()
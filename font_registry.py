@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Process-Wide Font Registry
+Loads each (font path, size) once per process and hands the same PIL font
+object to every render call, instead of re-parsing DejaVuSans-Bold on every
+image. Which file a requested font maps to (the path itself, a system font
+name, or the first installed fallback) is worked out once; when nothing
+loads, PIL's built-in font is used at the requested size where Pillow
+supports it.
+
+Render worker processes call warm_fonts() from their initializer so the first
+job in each worker does not pay for font parsing.
+
+Usage:
+    python3 font_registry.py    # Show which font file the renderers will use
+"""
+
+import os
+import threading
+
+# ==================== FONT CONFIGURATION ====================
+FONT_FALLBACKS = [   # Tried in order when a requested font cannot be loaded
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",   # Debian/Ubuntu
+    "/usr/share/fonts/dejavu/DejaVuSans-Bold.ttf",            # Fedora/Arch
+    "/usr/share/fonts/TTF/DejaVuSans-Bold.ttf",
+    "/Library/Fonts/Arial Bold.ttf",                          # macOS
+    "DejaVuSans-Bold.ttf",                                    # Names PIL looks up in system font dirs
+    "arial.ttf",
+]
+# ============================================================
+
+
+def _truetype(path, size):
+    from PIL import ImageFont
+    return ImageFont.truetype(path, size)
+
+
+def _builtin(size):
+    from PIL import ImageFont
+    # Pillow 10.1+ scales its built-in font; older versions only have one fixed-size
+    # bitmap, which text_layout can then only wrap and truncate, not shrink
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        return ImageFont.load_default()
+
+
+class FontRegistry:
+    """Thread-safe cache of loaded fonts keyed by (resolved path, size).
+
+    loader(path, size) loads a TrueType font and must raise OSError when the
+    font cannot be read; default_loader(size) returns the last-resort font.
+    """
+
+    def __init__(self, fallbacks=FONT_FALLBACKS, loader=_truetype, default_loader=_builtin):
+        self.fallbacks = list(fallbacks)
+        self.loader = loader
+        self.default_loader = default_loader
+        self.counters = {"hits": 0, "loads": 0}
+        self._fonts = {}
+        self._resolved = {}
+        self._lock = threading.RLock()
+
+    def _loads(self, path) -> bool:
+        # Absolute paths are checked on disk; bare names may still be found by PIL
+        if os.path.isabs(path) and not os.path.exists(path):
+            return False
+        try:
+            self.loader(path, 12)
+            return True
+        except OSError:
+            return False
+
+    def resolve(self, path: str = None):
+        """The font file actually used for path (None = PIL's built-in font)."""
+        with self._lock:
+            if path not in self._resolved:
+                candidates = ([path] if path else []) + [f for f in self.fallbacks if f != path]
+                self._resolved[path] = next((c for c in candidates if self._loads(c)), None)
+            return self._resolved[path]
+
+    def get(self, path: str = None, size: int = 24):
+        """The font for (path, size), loading it on first use."""
+        resolved = self.resolve(path)
+        key = (resolved, size)
+        with self._lock:
+            font = self._fonts.get(key)
+            if font is not None:
+                self.counters["hits"] += 1
+                return font
+            # Loaded under the lock so concurrent first calls parse the file only once
+            font = self.loader(resolved, size) if resolved else self.default_loader(size)
+            self._fonts[key] = font
+            self.counters["loads"] += 1
+            return font
+
+    def warm(self, specs):
+        """Load every (path, size) in specs now, e.g. in a worker initializer."""
+        for path, size in specs:
+            self.get(path, size)
+
+    def report(self) -> str:
+        with self._lock:
+            c = dict(self.counters)
+            fonts = len(self._fonts)
+        return f"🔤 Fonts: {fonts} loaded once, reused {c['hits']} times"
+
+
+_registry = FontRegistry()
+
+
+def get_font(path: str = None, size: int = 24):
+    """Shortcut for the process-wide registry's get(path, size)."""
+    return _registry.get(path, size)
+
+
+def resolve_font(path: str = None):
+    """Shortcut for the process-wide registry's resolve(path)."""
+    return _registry.resolve(path)
+
+
+def warm_fonts(specs):
+    """Shortcut for the process-wide registry's warm(specs)."""
+    _registry.warm(specs)
+
+
+def font_report() -> str:
+    return _registry.report()
+
+
+def main():
+    resolved = resolve_font(FONT_FALLBACKS[0])
+    if resolved:
+        print(f"🔤 Renderers will use {resolved}")
+    else:
+        print("⚠️  No TrueType font found; renderers fall back to PIL's built-in font")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,25 @@
-import os
 import json
+import time
 import uuid
+import asyncio
+import argparse
+import shutil
 import requests
 from datetime import datetime
 from pathlib import Path
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-import subprocess
+
+import ollama_client
+from background_cache import background_frame, background_report
+from font_registry import font_report, get_font
+from model_config import configured_model
+from pdf_template import PdfTemplate
+from text_layout import draw_png, png_layout
+from ollama_client import OllamaEmptyResponseError, OllamaError
+from bundle_scheduler import (
+    BundleScheduler, MODEL_CONCURRENCY, RENDER_CONCURRENCY, print_timing_report, run_pairs,
+)
 
 # --- CONFIGURATION ---
 CATEGORIES = {
@@ -36,7 +48,7 @@ DISCLAIMER = (
     "For personal use only. Redistribution is prohibited. © 2025 SignalCore INC."
 )
 LOG_FILE = "model_inference.log"
-OLLAMA_MODEL = "mixtral:8x7b-instruct-v0.1-q6_K"
+OLLAMA_MODEL = configured_model("affirmations", "mixtral:8x7b-instruct-v0.1-q6_K")  # See model_benchmark.py
 
 # --- STABLE DIFFUSION CONFIG ---
 SD_API_URL = "http://localhost:7860/sdapi/v1/txt2img"  # Change if using another endpoint or port
@@ -46,29 +58,29 @@ def log_event(message: str):
     with open(LOG_FILE, "a", encoding="utf-8") as f:
         f.write(f"[{timestamp}] {message}\n")
 
+def pause_for_model(error):
+    log_event(f"MODEL_UNAVAILABLE: {error} (pausing batch until the backend is back)")
+    print(f"⏸️  Model backend unavailable ({error}); pausing until it recovers...")
+
 def call_ollama(prompt: str) -> str:
-    """Calls Ollama locally via the command line and returns output string."""
+    """Calls the local Ollama server over the shared keep-alive client and returns output string.
+
+    Raises OllamaError instead of returning placeholder text, so a failed call
+    never ends up rendered into a bundle. While the backend is down the batch
+    pauses rather than failing every remaining pair.
+    """
     try:
-        proc = subprocess.Popen(
-            ["ollama", "run", OLLAMA_MODEL],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        out, err = proc.communicate(prompt)
-        if err:
-            log_event(f"MODEL_ERROR: {err}")
-        out = out.strip() if out else ""
-        if not out:
-            log_event("MODEL_WARNING: Model returned no output.")
-            return "[MODEL WARNING] No output from model."
-        log_event(f"MODEL_PROMPT: {prompt}\nMODEL_OUTPUT: {out}")
-        return out
-    except Exception as ex:
-        fallback = f"[MODEL EXCEPTION] {str(ex)}"
-        log_event(f"MODEL_EXCEPTION: {fallback}")
-        return fallback
+        # Affirmations are sampled, so identical prompts must not be served from the cache
+        out = ollama_client.generate_when_available(
+            prompt, on_pause=pause_for_model, model=OLLAMA_MODEL, cache=False).strip()
+    except OllamaError as ex:
+        log_event(f"MODEL_EXCEPTION: {type(ex).__name__}: {ex}")
+        raise
+    if not out:
+        log_event("MODEL_WARNING: Model returned no output.")
+        raise OllamaEmptyResponseError("Model returned no output")
+    log_event(f"MODEL_PROMPT: {prompt}\nMODEL_OUTPUT: {out}")
+    return out
 
 def generate_background_sd(prompt: str, save_path: Path, width=900, height=600, steps=30, cfg_scale=7.5):
     """Calls Stable Diffusion API to generate a background image."""
@@ -108,35 +120,21 @@ def save_txt(path, affirmations):
     except Exception as e:
         log_event(f"TXT_WRITE_ERROR: {e} for {path}")
 
+def bundle_pdf_template(background_path=None):
+    """Bundle PDF layout: background, title and disclaimer are drawn once per file and
+    referenced from every page."""
+    return PdfTemplate(
+        letter, background=background_path, background_mask='auto',
+        title="Affirmations", title_style=("Helvetica-Bold", 20, (0.16, 0.36, 0.66)), title_at=(60, 80),
+        footer=DISCLAIMER, footer_style=("Helvetica", 8, (0.25, 0.25, 0.25)), footer_at=(60, 40),
+        body_style=("Helvetica", 14, (0.14, 0.18, 0.25)), body_x=80, body_top=120, next_top=80,
+        leading=30, bottom=100,
+    )
+
 def save_pdf(path, affirmations, background_path=None):
     try:
-        c = canvas.Canvas(str(path), pagesize=letter)
-        width, height = letter
-        top = height - 80
-        if background_path and os.path.exists(background_path):
-            from reportlab.lib.utils import ImageReader
-            bg = ImageReader(background_path)
-            c.drawImage(bg, 0, 0, width=width, height=height, mask='auto')
-        c.setFont("Helvetica-Bold", 20)
-        c.setFillColorRGB(0.16, 0.36, 0.66)
-        c.drawString(60, top, "Affirmations")
-        c.setFont("Helvetica", 14)
-        c.setFillColorRGB(0.14, 0.18, 0.25)
-        y = top - 40
-        for idx, aff in enumerate(affirmations, 1):
-            c.drawString(80, y, f"{idx}. {aff}")
-            y -= 30
-            if y < 100:
-                c.showPage()
-                if background_path and os.path.exists(background_path):
-                    c.drawImage(bg, 0, 0, width=width, height=height, mask='auto')
-                c.setFont("Helvetica", 14)
-                c.setFillColorRGB(0.14, 0.18, 0.25)
-                y = top
-        c.setFont("Helvetica", 8)
-        c.setFillColorRGB(0.25, 0.25, 0.25)
-        c.drawString(60, 40, DISCLAIMER)
-        c.save()
+        lines = [f"{idx}. {aff}" for idx, aff in enumerate(affirmations, 1)]
+        bundle_pdf_template(background_path).render(path, lines)
     except Exception as e:
         log_event(f"PDF_WRITE_ERROR: {e} for {path}")
 
@@ -144,8 +142,9 @@ def save_png(path, affirmations, background_path=None):
     W, H = 900, 600
     margin = 40
     try:
-        if background_path and os.path.exists(background_path):
-            img = Image.open(background_path).convert("RGBA").resize((W, H))
+        bg = background_frame(background_path, (W, H), "RGBA") if background_path else None
+        if bg is not None:
+            img = bg.copy()   # The cached frame is shared; draw on a copy
         else:
             img = Image.new("RGBA", (W, H), (238, 245, 255, 255))
         d = ImageDraw.Draw(img)
@@ -155,21 +154,19 @@ def save_png(path, affirmations, background_path=None):
             radius=30,
             fill=(255, 255, 255, 210)
         )
-        if os.path.exists(FONT_PATH):
-            font = ImageFont.truetype(FONT_PATH, 26)
-            title_font = ImageFont.truetype(FONT_PATH, 34)
-        else:
-            font = ImageFont.load_default()
-            title_font = ImageFont.load_default()
+        title_font = get_font(FONT_PATH, 34)
 
         # Draw title at the top
         d.text((margin + 20, margin - 10), "Affirmations", font=title_font, fill=(30, 90, 170, 255))
-        y = margin + 50
-        for idx, aff in enumerate(affirmations, 1):
-            d.text((margin + 20, y), f"{idx}. {aff}", font=font, fill=(22, 40, 70, 255))
-            y += 45
-        # Draw disclaimer at bottom
-        d.text((margin + 10, H - margin - 30), DISCLAIMER, font=ImageFont.truetype(FONT_PATH, 12) if os.path.exists(FONT_PATH) else ImageFont.load_default(), fill=(70,70,70,255))
+        # Affirmations wrap and shrink (from 26px) to fit above the disclaimer, which wraps too
+        body = png_layout.layout([f"{idx}. {aff}" for idx, aff in enumerate(affirmations, 1)], FONT_PATH,
+                                 (margin + 20, margin + 50, W - 2 * margin - 40, H - 2 * margin - 110), 26,
+                                 paragraph_spacing=0.5)
+        footer = png_layout.layout(DISCLAIMER, FONT_PATH,
+                                   (margin + 10, H - margin - 50, W - 2 * margin - 20, 44), 12,
+                                   valign="bottom")
+        draw_png(d, body, FONT_PATH, (22, 40, 70, 255))
+        draw_png(d, footer, FONT_PATH, (70, 70, 70, 255))
         img.convert("RGB").save(path)
     except Exception as e:
         log_event(f"PNG_WRITE_ERROR: {e} for {path}")
@@ -198,47 +195,127 @@ def generate_affirmations(category, subcategory, n=BUNDLE_SIZE):
                 affirmations.append(aff)
         elif line.strip() and len(affirmations) < n:
             affirmations.append(line.strip())
+    if not affirmations:
+        raise OllamaEmptyResponseError(f"No affirmations in model output for {category}/{subcategory}")
     return affirmations[:n]
 
+def start_bundle(category, subcategory):
+    """Create the bundle folder and work out names, paths and the background prompt."""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    uniqueid = uuid.uuid4().hex[:6]
+    bundle_name = f"{category}_{subcategory}_{timestamp}_{uniqueid}"
+    bundle_dir = MODEL_OUTPUT_DIR / bundle_name
+    ensure_dir(bundle_dir)
+    log_event(f"START_BUNDLE: {bundle_name}")
+    background_prompt = (
+        f"A beautiful, calming, high-quality background image for positive affirmations about '{subcategory}' in the context of '{category}'. "
+        "No text. Trending on ArtStation, digital painting."
+    )
+    return {
+        "category": category,
+        "subcategory": subcategory,
+        "timestamp": timestamp,
+        "uniqueid": uniqueid,
+        "name": bundle_name,
+        "dir": bundle_dir,
+        "background_prompt": background_prompt,
+        "background_path": bundle_dir / "background.png",
+    }
+
+def discard_bundle(bundle, error):
+    """Remove a half-built bundle folder so no incomplete bundle is left behind."""
+    shutil.rmtree(bundle["dir"], ignore_errors=True)
+    log_event(f"FAILED_BUNDLE: {bundle['name']}: {type(error).__name__}: {error}")
+
+def save_metadata_for(bundle, affirmations):
+    meta = {
+        "category": bundle["category"],
+        "subcategory": bundle["subcategory"],
+        "timestamp": bundle["timestamp"],
+        "uniqueid": bundle["uniqueid"],
+        "affirmations": affirmations,
+        "background_prompt": bundle["background_prompt"]
+    }
+    save_metadata(bundle["dir"] / "metadata.json", meta)
+    log_event(f"DONE_BUNDLE: {bundle['name']}")
+
 def main():
     # You can iterate all, or just one for testing
     for category, subcategories in CATEGORIES.items():
         for subcategory in subcategories:
             # === 1. Prepare paths and identifiers ===
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            uniqueid = uuid.uuid4().hex[:6]
-            bundle_name = f"{category}_{subcategory}_{timestamp}_{uniqueid}"
-            bundle_dir = MODEL_OUTPUT_DIR / bundle_name
-            ensure_dir(bundle_dir)
-            log_event(f"START_BUNDLE: {bundle_name}")
-
-            # === 2. Start background generation in parallel ===
-            background_prompt = (
-                f"A beautiful, calming, high-quality background image for positive affirmations about '{subcategory}' in the context of '{category}'. "
-                "No text. Trending on ArtStation, digital painting."
-            )
-            background_path = bundle_dir / "background.png"
-            generate_background_sd(background_prompt, background_path)
+            bundle = start_bundle(category, subcategory)
+            bundle_dir = bundle["dir"]
+            background_path = bundle["background_path"]
+
+            # === 2. Generate the background ===
+            generate_background_sd(bundle["background_prompt"], background_path)
 
             # === 3. Generate affirmations ===
-            affirmations = generate_affirmations(category, subcategory, n=BUNDLE_SIZE)
+            try:
+                affirmations = generate_affirmations(category, subcategory, n=BUNDLE_SIZE)
+            except OllamaError as e:
+                discard_bundle(bundle, e)
+                print(f"❌ Skipped {category}/{subcategory}: {e}")
+                continue
             log_event(f"AFFIRMATIONS: {affirmations}")
 
             # === 4. Save outputs ===
             save_txt(bundle_dir / "affirmations.txt", affirmations)
             save_pdf(bundle_dir / "affirmations.pdf", affirmations, background_path)
             save_png(bundle_dir / "affirmations.png", affirmations, background_path)
-            # Save metadata
-            meta = {
-                "category": category,
-                "subcategory": subcategory,
-                "timestamp": timestamp,
-                "uniqueid": uniqueid,
-                "affirmations": affirmations,
-                "background_prompt": background_prompt
-            }
-            save_metadata(bundle_dir / "metadata.json", meta)
-            log_event(f"DONE_BUNDLE: {bundle_name}")
+            save_metadata_for(bundle, affirmations)
+
+async def build_bundle_async(category, subcategory, scheduler, timings):
+    """Async version of one main() iteration: the SD background and the
+    affirmation text are requested at the same time, then rendered together."""
+    bundle = start_bundle(category, subcategory)
+    bundle_dir = bundle["dir"]
+    background_path = bundle["background_path"]
+
+    background = asyncio.create_task(scheduler.background(
+        generate_background_sd, bundle["background_prompt"], background_path, timings=timings))
+    try:
+        affirmations = await scheduler.model(
+            generate_affirmations, category, subcategory, n=BUNDLE_SIZE, timings=timings)
+    except OllamaError as e:
+        await background
+        discard_bundle(bundle, e)
+        raise
+    log_event(f"AFFIRMATIONS: {affirmations}")
+    await background
+
+    await asyncio.gather(
+        scheduler.render(save_txt, bundle_dir / "affirmations.txt", affirmations, timings=timings, stage="txt"),
+        scheduler.render(save_pdf, bundle_dir / "affirmations.pdf", affirmations, background_path, timings=timings, stage="pdf"),
+        scheduler.render(save_png, bundle_dir / "affirmations.png", affirmations, background_path, timings=timings, stage="png"),
+    )
+    save_metadata_for(bundle, affirmations)
+    return bundle["name"]
+
+def main_async(model_concurrency=MODEL_CONCURRENCY, render_concurrency=RENDER_CONCURRENCY):
+    """Run every category/subcategory pair concurrently with bounded model and render slots."""
+    scheduler = BundleScheduler(model_concurrency, render_concurrency)
+    started = time.perf_counter()
+    results = run_pairs(CATEGORIES, build_bundle_async, scheduler)
+    for result in results:
+        if result["error"]:
+            log_event(f"FATAL_ERROR: {result['error']} for {result['category']} / {result['subcategory']}")
+    print_timing_report(results, time.perf_counter() - started)
+    print(ollama_client.get_client().coalescing_report())
+    print(font_report())
+    print(background_report())
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate affirmation bundles for every category/subcategory pair.")
+    parser.add_argument("--async", dest="run_async", action="store_true",
+                        help="Process all pairs concurrently instead of one at a time")
+    parser.add_argument("--model-concurrency", type=int, default=MODEL_CONCURRENCY,
+                        help="Max concurrent model requests in --async mode")
+    parser.add_argument("--render-workers", type=int, default=RENDER_CONCURRENCY,
+                        help="Max concurrent render jobs in --async mode")
+    args = parser.parse_args()
+    if args.run_async:
+        main_async(args.model_concurrency, args.render_workers)
+    else:
+        main()
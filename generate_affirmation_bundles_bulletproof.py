@@ -1,12 +1,24 @@
 import os
 import json
+import time
 import shutil
+import argparse
 from datetime import datetime
 from pathlib import Path
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
-import subprocess
+
+import ollama_client
+from font_registry import resolve_font
+from model_config import configured_model
+from render_farm import RenderFarm, RenderTemplate
+from text_layout import draw_png, png_layout
+from ollama_client import OllamaEmptyResponseError, OllamaError
+from affirmation_batch import generate_affirmation_batch
+from bundle_scheduler import (
+    BundleScheduler, MODEL_CONCURRENCY, RENDER_CONCURRENCY, print_timing_report, run_pairs,
+)
 
 # --- CONFIGURATION ---
 CATEGORIES = {
@@ -30,48 +42,42 @@ CATEGORIES = {
 OUTPUT_ROOT = Path("ready_for_upload")
 PLATFORMS = ["etsy", "gumroad"]
 BUNDLE_SIZE = 7
+BATCH_GENERATION = True  # One structured JSON call per bundle instead of one call per affirmation
 FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
 DISCLAIMER = (
     "This content was generated and formatted using custom AI workflows by SignalCore INC. "
     "For personal use only. Redistribution is prohibited. © 2025 SignalCore INC."
 )
 LOG_FILE = "model_inference.log"
-OLLAMA_MODEL = "mixtral:8x7b-instruct-v0.1-q6_K"
+OLLAMA_MODEL = configured_model("affirmations", "mixtral:8x7b-instruct-v0.1-q6_K")  # See model_benchmark.py
 
 def log_event(message: str):
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     with open(LOG_FILE, "a", encoding="utf-8") as f:
         f.write(f"[{timestamp}] {message}\n")
 
+def pause_for_model(error):
+    log_event(f"MODEL_UNAVAILABLE: {error} (pausing batch until the backend is back)")
+    print(f"⏸️  Model backend unavailable ({error}); pausing until it recovers...")
+
 def call_ollama(prompt: str) -> str:
-    """
-    Calls Ollama locally via the command line, mimicking a real user:
-    - Starts process
-    - Sends prompt to stdin
-    - Closes stdin (signals EOF)
-    - Reads output
+    """Calls the local Ollama server over the shared keep-alive client and returns output string.
+
+    Raises OllamaError instead of returning placeholder text, so the bundle is
+    skipped rather than rendered with an error message in it.
     """
     try:
-        proc = subprocess.Popen(
-            ["ollama", "run", OLLAMA_MODEL],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        out, err = proc.communicate(prompt)
-        if err:
-            log_event(f"MODEL_ERROR: {err}")
-        out = out.strip() if out else ""
-        if not out:
-            log_event("MODEL_WARNING: Model returned no output.")
-            return "[MODEL WARNING] No output from model."
-        log_event(f"MODEL_PROMPT: {prompt}\nMODEL_OUTPUT: {out}")
-        return out
-    except Exception as ex:
-        fallback = f"[MODEL EXCEPTION] {str(ex)}"
-        log_event(f"MODEL_EXCEPTION: {fallback}")
-        return fallback
+        # Affirmations are sampled, so identical prompts must not be served from the cache
+        out = ollama_client.generate_when_available(
+            prompt, on_pause=pause_for_model, model=OLLAMA_MODEL, cache=False).strip()
+    except OllamaError as ex:
+        log_event(f"MODEL_EXCEPTION: {type(ex).__name__}: {ex}")
+        raise
+    if not out:
+        log_event("MODEL_WARNING: Model returned no output.")
+        raise OllamaEmptyResponseError("Model returned no output")
+    log_event(f"MODEL_PROMPT: {prompt}\nMODEL_OUTPUT: {out}")
+    return out
 
 def ensure_dir(path):
     os.makedirs(path, exist_ok=True)
@@ -100,59 +106,69 @@ def save_png(path, text):
     img = Image.new("RGB", (W, H), (255, 255, 255))
     d = ImageDraw.Draw(img)
     try:
-        if os.path.exists(FONT_PATH):
-            font = ImageFont.truetype(FONT_PATH, 24)
-            footer_font = ImageFont.truetype(FONT_PATH, 14)
-        else:
-            font = ImageFont.load_default()
-            footer_font = ImageFont.load_default()
-            log_event(f"FONT_WARNING: {FONT_PATH} not found. Using default font.")
-    except Exception as e:
-        font = ImageFont.load_default()
-        footer_font = ImageFont.load_default()
-        log_event(f"FONT_EXCEPTION: {e}. Using default font.")
-    try:
-        d.text((50, 150), text, fill=(0, 0, 0), font=font)
-        d.text((10, H - 35), DISCLAIMER, fill=(120, 120, 120), font=footer_font)
+        body = png_layout.layout(text, FONT_PATH, (50, 50, W - 100, H - 130), 24, valign="middle")
+        footer = png_layout.layout(DISCLAIMER, FONT_PATH, (10, H - 70, W - 20, 60), 14, valign="bottom")
+        draw_png(d, body, FONT_PATH, (0, 0, 0))
+        draw_png(d, footer, FONT_PATH, (120, 120, 120))
         img.save(path)
     except Exception as e:
         log_event(f"PNG_WRITE_ERROR: {e} for {path}")
 
-def generate_bundle(category, subcategory, timestamp):
-    base_name = f"{category}_{subcategory}_{timestamp}"
-    files = []
-    affirmations = []
-    for i in range(BUNDLE_SIZE):
+# The render farm calls renderer(text, path); these keep save_*(path, text) unchanged
+def render_txt(text, path):
+    save_txt(path, text)
+
+def render_pdf(text, path):
+    save_pdf(path, text)
+
+def render_png(text, path):
+    save_png(path, text)
+
+RENDER_TEMPLATE = RenderTemplate(
+    "bulletproof",
+    {"txt": render_txt, "pdf": render_pdf, "png": render_png},
+    fonts=[(FONT_PATH, 24), (FONT_PATH, 14)],
+)
+
+def generate_texts(category, subcategory):
+    """Return BUNDLE_SIZE affirmation texts, batched when BATCH_GENERATION is on."""
+    texts = []
+    if BATCH_GENERATION:
+        try:
+            texts = generate_affirmation_batch(category, subcategory, BUNDLE_SIZE,
+                                               model=OLLAMA_MODEL, log=log_event)
+        except Exception as e:
+            log_event(f"BATCH_ERROR: {e} for {category} / {subcategory}")
+    # Per-item calls for anything the batch could not supply
+    while len(texts) < BUNDLE_SIZE:
         prompt = (
             f"Write a unique positive affirmation for the following category and subcategory.\n"
             f"Category: {category}\nSubcategory: {subcategory}\n"
             f"Format as a standalone, powerful, one-sentence affirmation."
         )
-        aff = call_ollama(prompt)
-        txt_path = f"{base_name}_{i+1}.txt"
-        pdf_path = f"{base_name}_{i+1}.pdf"
-        png_path = f"{base_name}_{i+1}.png"
-        # Try to create each file, only append if creation was successful
-        created_files = []
-        try:
-            save_txt(txt_path, aff)
-            if os.path.exists(txt_path):
-                created_files.append(txt_path)
-        except Exception as e:
-            log_event(f"TXT_CREATE_ERROR: {e} for {txt_path}")
-        try:
-            save_pdf(pdf_path, aff)
-            if os.path.exists(pdf_path):
-                created_files.append(pdf_path)
-        except Exception as e:
-            log_event(f"PDF_CREATE_ERROR: {e} for {pdf_path}")
+        texts.append(call_ollama(prompt))
+    return texts
+
+def generate_bundle(category, subcategory, timestamp, texts=None, farm=None):
+    """Render a bundle's files and metadata; generates the texts first unless given.
+    Files render in farm's worker processes when a farm is passed, otherwise inline."""
+    if texts is None:
+        texts = generate_texts(category, subcategory)
+    if farm is None:
+        farm = RenderFarm(workers=0)
+    base_name = f"{category}_{subcategory}_{timestamp}"
+    renders = [farm.submit(aff, RENDER_TEMPLATE, ("txt", "pdf", "png"), f"{base_name}_{i+1}")
+               for i, aff in enumerate(texts)]
+    files = []
+    affirmations = []
+    for i, (aff, render) in enumerate(zip(texts, renders)):
+        # Only list the files that were actually created
         try:
-            save_png(png_path, aff)
-            if os.path.exists(png_path):
-                created_files.append(png_path)
+            written = render.result()
         except Exception as e:
-            log_event(f"PNG_CREATE_ERROR: {e} for {png_path}")
-        files.append((txt_path, pdf_path, png_path))
+            log_event(f"RENDER_ERROR: {e} for {base_name}_{i+1}")
+            continue
+        files.append(tuple(written.values()))
         affirmations.append({"index": i+1, "text": aff})
     meta = {
         "category": category,
@@ -173,8 +189,8 @@ def organize_bundle(category, subcategory, timestamp, files, metadata):
     for platform in PLATFORMS:
         bundle_dir = OUTPUT_ROOT / platform / f"{category}_{subcategory}_{timestamp}"
         ensure_dir(bundle_dir)
-        for txt, pdf, png in files:
-            for fpath in [txt, pdf, png]:
+        for paths in files:
+            for fpath in paths:
                 if os.path.exists(fpath):
                     try:
                         shutil.move(fpath, bundle_dir / os.path.basename(fpath))
@@ -192,17 +208,63 @@ def organize_bundle(category, subcategory, timestamp, files, metadata):
         else:
             log_event(f"METADATA_NOT_FOUND: {metadata}")
 
+def check_font():
+    """Log once when FONT_PATH is missing and say which font renders instead."""
+    resolved = resolve_font(FONT_PATH)
+    if resolved != FONT_PATH:
+        log_event(f"FONT_WARNING: {FONT_PATH} not found. Using {resolved or 'default font'}.")
+
 def main():
+    check_font()
     now = datetime.now().strftime("%Y%m%d_%H%M%S")
-    for category, sublist in CATEGORIES.items():
-        for subcategory in sublist:
-            try:
-                files, meta = generate_bundle(category, subcategory, now)
-                organize_bundle(category, subcategory, now, files, meta)
-                print(f"Generated bundle: {category}/{subcategory} at {now}")
-            except Exception as e:
-                log_event(f"FATAL_ERROR: {e} for {category} / {subcategory}")
-                print(f"Error in bundle {category}/{subcategory}: {e} (see log)")
+    with RenderFarm([RENDER_TEMPLATE]) as farm:
+        for category, sublist in CATEGORIES.items():
+            for subcategory in sublist:
+                try:
+                    files, meta = generate_bundle(category, subcategory, now, farm=farm)
+                    organize_bundle(category, subcategory, now, files, meta)
+                    print(f"Generated bundle: {category}/{subcategory} at {now}")
+                except Exception as e:
+                    log_event(f"FATAL_ERROR: {e} for {category} / {subcategory}")
+                    print(f"Error in bundle {category}/{subcategory}: {e} (see log)")
+
+def main_async(model_concurrency=MODEL_CONCURRENCY, render_concurrency=RENDER_CONCURRENCY):
+    """Run every pair concurrently: text generation for one pair overlaps
+    rendering and file moves for others, within the configured limits."""
+    check_font()
+    now = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    async def build_bundle_async(category, subcategory, scheduler, timings):
+        texts = await scheduler.model(generate_texts, category, subcategory, timings=timings)
+        files, meta = await scheduler.render(generate_bundle, category, subcategory, now, texts, farm,
+                                             timings=timings)
+        await scheduler.render(organize_bundle, category, subcategory, now, files, meta,
+                               timings=timings, stage="organize")
+        print(f"Generated bundle: {category}/{subcategory} at {now}")
+
+    scheduler = BundleScheduler(model_concurrency, render_concurrency)
+    started = time.perf_counter()
+    # Render threads only wait on the farm; the PIL/reportlab work runs in its worker processes
+    with RenderFarm([RENDER_TEMPLATE]) as farm:
+        results = run_pairs(CATEGORIES, build_bundle_async, scheduler)
+    for result in results:
+        if result["error"]:
+            log_event(f"FATAL_ERROR: {result['error']} for {result['category']} / {result['subcategory']}")
+            print(f"Error in bundle {result['category']}/{result['subcategory']}: {result['error']} (see log)")
+    print_timing_report(results, time.perf_counter() - started)
+    print(ollama_client.get_client().coalescing_report())
+    print(farm.report())
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate and organize affirmation bundles for every category/subcategory pair.")
+    parser.add_argument("--async", dest="run_async", action="store_true",
+                        help="Process all pairs concurrently instead of one at a time")
+    parser.add_argument("--model-concurrency", type=int, default=MODEL_CONCURRENCY,
+                        help="Max concurrent model requests in --async mode")
+    parser.add_argument("--render-workers", type=int, default=RENDER_CONCURRENCY,
+                        help="Max concurrent render jobs in --async mode")
+    args = parser.parse_args()
+    if args.run_async:
+        main_async(args.model_concurrency, args.render_workers)
+    else:
+        main()
\ No newline at end of file
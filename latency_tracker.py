@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Model Latency Tracker
+Keeps a rolling window of call latencies per purpose (generation, validation,
+clarification, ...) and derives adaptive deadlines from the p99 and hedging
+delays from the p95, instead of fixed per-script timeouts.
+"""
+
+import math
+import threading
+from collections import deque
+
+# ==================== LATENCY CONFIGURATION ====================
+LATENCY_WINDOW = 200        # Most recent calls kept per purpose
+MIN_SAMPLES = 20            # Below this, fall back to DEFAULT_DEADLINES
+DEADLINE_HEADROOM = 1.5     # Deadline = p99 x headroom
+MIN_DEADLINE = 30           # Never cut a call off sooner than this (seconds)
+MAX_DEADLINE = 900          # Hard ceiling so a hung request cannot stall a batch forever
+DEFAULT_DEADLINES = {       # Used until a purpose has MIN_SAMPLES measurements
+    "generation": 600,
+    "validation": 300,
+    "clarification": 300,
+}
+DEFAULT_DEADLINE = 600
+# ===============================================================
+
+
+class LatencyTracker:
+    """Thread-safe rolling latency histograms keyed by call purpose."""
+
+    def __init__(self, window: int = LATENCY_WINDOW, min_samples: int = MIN_SAMPLES):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, purpose: str, seconds: float):
+        with self._lock:
+            if purpose not in self._samples:
+                self._samples[purpose] = deque(maxlen=self.window)
+            self._samples[purpose].append(seconds)
+
+    def percentile(self, purpose: str, pct: float):
+        """Nearest-rank percentile of the window, or None without enough samples."""
+        with self._lock:
+            samples = sorted(self._samples.get(purpose, ()))
+        if len(samples) < self.min_samples:
+            return None
+        rank = max(1, math.ceil(pct / 100 * len(samples)))
+        return samples[rank - 1]
+
+    def deadline(self, purpose: str) -> float:
+        """Total time a call for this purpose may take before it is abandoned."""
+        p99 = self.percentile(purpose, 99)
+        if p99 is None:
+            return DEFAULT_DEADLINES.get(purpose, DEFAULT_DEADLINE)
+        return min(max(p99 * DEADLINE_HEADROOM, MIN_DEADLINE), MAX_DEADLINE)
+
+    def hedge_after(self, purpose: str):
+        """Delay before sending a hedged duplicate (p95), or None if unknown."""
+        return self.percentile(purpose, 95)
+
+    def snapshot(self) -> dict:
+        """Per-purpose sample count, p50, p95, p99 and current deadline."""
+        with self._lock:
+            purposes = list(self._samples)
+        summary = {}
+        for purpose in purposes:
+            with self._lock:
+                samples = sorted(self._samples[purpose])
+            pick = lambda pct: samples[max(1, math.ceil(pct / 100 * len(samples))) - 1]
+            summary[purpose] = {
+                "count": len(samples),
+                "p50": pick(50),
+                "p95": pick(95),
+                "p99": pick(99),
+                "deadline": self.deadline(purpose),
+            }
+        return summary
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+End-to-End Load Test
+Drives the bundle pipeline (generate_affirmations → save_txt/save_pdf/save_png
+→ process_folder → package) and the code-generation pipeline
+(EnhancedPythonCodeGenerator.process_request) against a fake Ollama server,
+sweeping concurrency levels, optionally at a fixed arrival rate. Reports
+per-stage p50/p95/p99, throughput, CPU and peak RSS for each level, and can
+save the report as JSON and compare it with an earlier run.
+
+Usage:
+    python3 load_test.py                                   # Both pipelines, concurrency 1,2,4,8
+    python3 load_test.py --pipeline code --concurrency 1,4 --requests 40
+    python3 load_test.py --rate 2 --profile small          # Open loop: 2 jobs/sec per level
+    python3 load_test.py --json after.json --compare before.json
+    python3 load_test.py --host http://gpu-box:11434       # Real backend instead of the fake one
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import math
+import os
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(REPO_DIR))
+
+import ollama_client
+from ollama_client import OllamaClient
+
+# ==================== LOAD TEST CONFIGURATION ====================
+CONCURRENCY_LEVELS = [1, 2, 4, 8]
+REQUESTS_PER_LEVEL = 16
+FAKE_PROFILE = "small"       # fake_ollama.py profile used when no --host is given
+RSS_SAMPLE_INTERVAL = 0.05   # Seconds between RSS samples
+BUNDLE_MODULE = "generate_affirmation_bundles_Version6.py"
+PACKAGE_MODULE = "package_and_validate (3).py"
+CODE_MODULE = "enhanced_python_generator3.py"
+BUNDLE_PAIRS = [("productivity", "focus"), ("confidence", "courage"), ("healing", "emotional"),
+                ("gratitude", "thankfulness"), ("mindfulness", "breathe")]
+CODE_REQUESTS = [
+    "make a hello world program",
+    "create a simple calculator",
+    "generate a file organizer script",
+    "create a password generator",
+    "make a todo list manager",
+    "create a text file analyzer",
+]
+# =================================================================
+
+
+class PipelineUnavailable(Exception):
+    """A pipeline's module could not be imported (e.g. PIL or reportlab missing)."""
+
+
+def percentile(values: list, pct: float):
+    """Nearest-rank percentile, as in latency_tracker."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(pct / 100 * len(ordered))) - 1]
+
+
+def _percentiles(values: list) -> dict:
+    return {f"p{p}": percentile(values, p) for p in (50, 95, 99)}
+
+
+def _load_module(filename: str, cwd: Path):
+    """Import a repo script by file name (several contain spaces or parentheses).
+
+    Imports run inside cwd because some scripts create directories at import time.
+    """
+    name = "loadtest_" + "".join(c if c.isalnum() else "_" for c in Path(filename).stem)
+    spec = importlib.util.spec_from_file_location(name, REPO_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    cwd.mkdir(parents=True, exist_ok=True)
+    previous = os.getcwd()
+    os.chdir(cwd)
+    try:
+        spec.loader.exec_module(module)
+    except ImportError as e:
+        raise PipelineUnavailable(f"{filename}: {e}") from e
+    finally:
+        os.chdir(previous)
+    return module
+
+
+def _timed(timings: dict, stage: str, fn, *args, **kwargs):
+    started = time.perf_counter()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - started
+
+
+class BundlePipeline:
+    """generate → render → validate → package for one category/subcategory pair per job."""
+    name = "bundle"
+
+    def __init__(self, workdir: Path, **options):
+        self.workdir = workdir / "bundles"
+        self.ready_dir = workdir / "ready_for_upload"
+        self.bundles = _load_module(BUNDLE_MODULE, workdir)
+        self.packager = _load_module(PACKAGE_MODULE, workdir)
+        self.bundles.LOG_FILE = str(workdir / "model_inference.log")
+
+    def run(self, index: int, timings: dict):
+        category, subcategory = BUNDLE_PAIRS[index % len(BUNDLE_PAIRS)]
+        folder = self.workdir / f"{index:05d}_{category}_{subcategory}"
+        folder.mkdir(parents=True, exist_ok=True)
+        affirmations = _timed(timings, "generate", self.bundles.generate_affirmations,
+                              category, subcategory, self.bundles.BUNDLE_SIZE)
+        _timed(timings, "render_txt", self.bundles.save_txt, folder / "affirmations.txt", affirmations)
+        _timed(timings, "render_pdf", self.bundles.save_pdf, folder / "affirmations.pdf", affirmations)
+        _timed(timings, "render_png", self.bundles.save_png, folder / "affirmations.png", affirmations)
+        passed, failed = _timed(timings, "validate", self.packager.process_folder, str(folder))
+        if failed:
+            raise RuntimeError(f"{len(failed)} files failed validation: {failed[0]}")
+        destination = self.ready_dir / folder.name
+
+        def package():
+            destination.mkdir(parents=True, exist_ok=True)
+            for path in passed:
+                shutil.copy2(path, destination)
+        _timed(timings, "package", package)
+
+
+class CodePipeline:
+    """EnhancedPythonCodeGenerator.process_request for one example request per job."""
+    name = "code"
+    STAGES = {"call_model": "model", "extract_python_code": "extract", "validate_python_code": "syntax",
+              "save_code": "save", "validate_code_with_validators": "validators"}
+
+    def __init__(self, workdir: Path, validators: bool = True, **options):
+        self.workdir = workdir / "scripts"
+        self.module = _load_module(CODE_MODULE, workdir)
+        self.module.DEFAULT_OUTPUT_DIR = str(self.workdir)
+        self.module.BACKUP_DIRECTORY = str(workdir / "backups")
+        self.validators = validators
+
+    def run(self, index: int, timings: dict):
+        generator = self.module.EnhancedPythonCodeGenerator()
+        generator.validators_enabled = self.validators
+        for method, stage in self.STAGES.items():
+            original = getattr(generator, method)
+
+            def wrapper(*args, _original=original, _stage=stage, **kwargs):
+                return _timed(timings, _stage, _original, *args, **kwargs)
+            setattr(generator, method, wrapper)
+        output_dir = self.workdir / f"{index:05d}"
+        output_dir.mkdir(parents=True, exist_ok=True)
+        if not generator.process_request(CODE_REQUESTS[index % len(CODE_REQUESTS)], output_dir):
+            raise RuntimeError("process_request reported failure")
+
+
+PIPELINES = {"bundle": BundlePipeline, "code": CodePipeline}
+
+
+class ResourceMonitor:
+    """CPU time (this process and reaped children) and peak RSS over one level."""
+
+    def __enter__(self):
+        self.peak_rss = self._rss()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        self._cpu = self._cpu_seconds()
+        self._wall = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall = time.perf_counter() - self._wall
+        self.cpu_seconds = self._cpu_seconds() - self._cpu
+        self._stop.set()
+        self._thread.join()
+
+    def _sample(self):
+        while not self._stop.wait(RSS_SAMPLE_INTERVAL):
+            self.peak_rss = max(self.peak_rss, self._rss())
+
+    @staticmethod
+    def _cpu_seconds() -> float:
+        own = resource.getrusage(resource.RUSAGE_SELF)
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+    @staticmethod
+    def _rss() -> int:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError):
+            # Peak for the whole process (KB on Linux) where /proc is unavailable
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def run_level(pipeline, concurrency: int, requests: int, rate: float = None) -> dict:
+    """Run `requests` jobs with `concurrency` workers; with a rate, jobs arrive on a fixed schedule."""
+    jobs = []
+    lock = threading.Lock()
+
+    def job(index, arrival):
+        # Closed loop (no rate): a job starts when a worker is free, so there is no queueing
+        timings = {"queue": time.perf_counter() - arrival} if arrival is not None else {}
+        arrival = arrival if arrival is not None else time.perf_counter()
+        error = None
+        try:
+            pipeline.run(index, timings)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        with lock:
+            jobs.append({"total": time.perf_counter() - arrival, "stages": timings, "error": error})
+
+    # The pipelines print progress; keep it out of the report
+    with ResourceMonitor() as monitor, open(os.devnull, "w") as devnull, \
+            contextlib.redirect_stdout(devnull):
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            started = time.perf_counter()
+            for index in range(requests):
+                arrival = None
+                if rate:
+                    arrival = started + index / rate
+                    time.sleep(max(0.0, arrival - time.perf_counter()))
+                pool.submit(job, index, arrival)
+    ok = [j for j in jobs if not j["error"]]
+    stages = {}
+    for j in ok:
+        for stage, seconds in j["stages"].items():
+            stages.setdefault(stage, []).append(seconds)
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "rate": rate,
+        "completed": len(ok),
+        "errors": len(jobs) - len(ok),
+        "first_error": next((j["error"] for j in jobs if j["error"]), None),
+        "wall_seconds": monitor.wall,
+        "throughput": len(ok) / monitor.wall if monitor.wall else 0.0,
+        "end_to_end": _percentiles([j["total"] for j in ok]),
+        "stages": {stage: _percentiles(values) for stage, values in stages.items()},
+        "cpu_percent": 100 * monitor.cpu_seconds / monitor.wall if monitor.wall else 0.0,
+        "peak_rss_mb": monitor.peak_rss / 1024 / 1024,
+    }
+
+
+def start_fake_ollama(profile: str, parallel: int):
+    """Run fake_ollama.py in its own process so its CPU and memory stay out of the numbers."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, str(REPO_DIR / "fake_ollama.py"), "--port", str(port), "--profile", profile,
+         "--parallel", str(parallel), "--any-model"],
+        stdout=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"{url}/api/version", timeout=1).read()
+            return process, url
+        except OSError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("fake_ollama.py did not start")
+
+
+def run_load_test(pipelines=tuple(PIPELINES), levels=CONCURRENCY_LEVELS, requests: int = REQUESTS_PER_LEVEL,
+                  rate: float = None, host: str = None, profile: str = FAKE_PROFILE,
+                  validators: bool = True, workdir: str = None, log=print) -> dict:
+    """Sweep concurrency levels for each pipeline; returns {pipeline: [level summaries]}."""
+    server = None
+    if host is None:
+        server, host = start_fake_ollama(profile, max(levels))
+    # No prompt cache or metrics file: every job must reach the model
+    previous_client = ollama_client.use_client(OllamaClient(host=host))
+    tmp = tempfile.TemporaryDirectory() if workdir is None else None
+    root = Path(workdir or tmp.name)
+    report = {}
+    try:
+        for name in pipelines:
+            try:
+                pipeline = PIPELINES[name](root / name, validators=validators)
+            except PipelineUnavailable as e:
+                log(f"⚠️  Skipping the {name} pipeline: {e}")
+                continue
+            report[name] = []
+            for concurrency in levels:
+                summary = run_level(pipeline, concurrency, requests, rate)
+                report[name].append(summary)
+                log(format_level(name, summary))
+    finally:
+        ollama_client.use_client(previous_client).close()
+        if server is not None:
+            server.terminate()
+            server.wait()
+        if tmp is not None:
+            tmp.cleanup()
+    return report
+
+
+def _ms(value) -> str:
+    return f"{value * 1000:.0f}" if value is not None else "-"
+
+
+def format_level(name: str, s: dict) -> str:
+    e2e = s["end_to_end"]
+    lines = [f"📈 {name} @ concurrency {s['concurrency']}: {s['throughput']:.2f} jobs/s, "
+             f"{s['completed']}/{s['requests']} ok, e2e p50/p95/p99 {_ms(e2e['p50'])}/{_ms(e2e['p95'])}/"
+             f"{_ms(e2e['p99'])} ms, CPU {s['cpu_percent']:.0f}%, peak RSS {s['peak_rss_mb']:.0f} MB"]
+    for stage, p in s["stages"].items():
+        lines.append(f"    {stage:<12} p50 {_ms(p['p50']):>6}  p95 {_ms(p['p95']):>6}  p99 {_ms(p['p99']):>6} ms")
+    if s["errors"]:
+        lines.append(f"    ❌ {s['errors']} failed, e.g. {s['first_error']}")
+    return "\n".join(lines)
+
+
+def compare(report: dict, baseline: dict) -> list:
+    """Throughput and e2e p95 change per pipeline and concurrency level versus a saved run."""
+    lines = []
+    for name, levels in report.items():
+        before = {s["concurrency"]: s for s in baseline.get(name, [])}
+        for s in levels:
+            old = before.get(s["concurrency"])
+            if not old or not old["throughput"] or not old["end_to_end"]["p95"] or not s["end_to_end"]["p95"]:
+                continue
+            throughput = 100 * (s["throughput"] / old["throughput"] - 1)
+            p95 = 100 * (s["end_to_end"]["p95"] / old["end_to_end"]["p95"] - 1)
+            marker = "✓" if throughput >= 0 and p95 <= 0 else "⚠️ "
+            lines.append(f"{marker} {name} @ {s['concurrency']}: throughput {throughput:+.1f}%, e2e p95 {p95:+.1f}%")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the bundle and code-generation pipelines.")
+    parser.add_argument("--pipeline", default=",".join(PIPELINES), help="Comma-separated: bundle, code")
+    parser.add_argument("--concurrency", default=",".join(map(str, CONCURRENCY_LEVELS)),
+                        help="Comma-separated worker counts to sweep")
+    parser.add_argument("--requests", type=int, default=REQUESTS_PER_LEVEL, help="Jobs per concurrency level")
+    parser.add_argument("--rate", type=float, help="Target arrivals per second (default: as fast as workers allow)")
+    parser.add_argument("--host", help="Ollama endpoint to use instead of a fake server")
+    parser.add_argument("--profile", default=FAKE_PROFILE, help="fake_ollama.py latency profile")
+    parser.add_argument("--no-validators", action="store_true",
+                        help="Skip the external code validators in the code pipeline")
+    parser.add_argument("--workdir", help="Keep generated files here instead of a temporary directory")
+    parser.add_argument("--json", help="Write the report to this file")
+    parser.add_argument("--compare", help="Earlier --json report to compare against")
+    args = parser.parse_args()
+
+    pipelines = [p.strip() for p in args.pipeline.split(",") if p.strip() in PIPELINES]
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    print(f"🏋️  Load test: {', '.join(pipelines)} at concurrency {levels}, {args.requests} jobs per level"
+          + (f", {args.rate}/s" if args.rate else ""))
+    report = run_load_test(pipelines, levels, args.requests, args.rate, args.host, args.profile,
+                           not args.no_validators, args.workdir)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report saved to {args.json}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print("\n".join(compare(report, baseline)) or "No matching levels to compare")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Model Auto-Benchmark
+Runs a fixed task suite (affirmation bundles, code generation from the README
+example requests, code review) against every locally installed model, scores
+each answer with cheap automatic checks, and records the fastest model that
+meets the quality bar for each purpose in model_config.json.
+
+Usage:
+    python3 model_benchmark.py                        # Benchmark every installed model
+    python3 model_benchmark.py --models a:7b,b:3b     # Only these models
+    python3 model_benchmark.py --quick --dry-run      # Fewer tasks, don't write the config
+"""
+
+import argparse
+import ast
+import math
+import re
+import time
+from datetime import datetime
+
+import ollama_client
+from affirmation_batch import batch_schema, build_batch_prompt, parse_affirmation_batch
+from model_config import MODEL_CONFIG_PATH, load_model_config, save_model_config
+from ollama_client import OllamaConnectionError, OllamaError
+
+# ==================== BENCHMARK CONFIGURATION ====================
+QUALITY_BAR = 0.8            # Minimum fraction of tasks passed to be recommended
+AFFIRMATION_COUNT = 7        # Items per benchmark affirmation bundle
+AFFIRMATION_PAIRS = [("productivity", "focus"), ("confidence", "courage"), ("healing", "emotional")]
+EXAMPLE_REQUESTS = [         # The README's example requests
+    "make a hello world program",
+    "create a simple calculator",
+    "generate a file organizer script",
+    "write a web scraper for news articles",
+    "create a password generator",
+    "make a todo list manager",
+    "generate a weather app",
+    "create a text file analyzer",
+]
+REVIEW_SNIPPETS = [          # (code, is_correct)
+    ("def add(a, b):\n    \"\"\"Return the sum of a and b.\"\"\"\n    return a + b\n", True),
+    ("def average(values):\n    if not values:\n        return 0.0\n    return sum(values) / len(values)\n", True),
+    ("def greet(name)\n    print('Hello, ' + name\n", False),
+    ("for i in range(10)\n    print(i * 2\n", False),
+]
+QUICK_TASKS = 2              # Tasks per purpose with --quick
+# =================================================================
+
+PURPOSES = ("affirmations", "generation", "validation")
+_CODE_BLOCK = re.compile(r"```(?:python|py)?\s*\n(.*?)```", re.DOTALL)
+
+
+def _parses(code: str) -> bool:
+    try:
+        ast.parse(code)
+        return True
+    except SyntaxError:
+        return False
+
+
+def _code_blocks(text: str) -> list:
+    return [block for block in _CODE_BLOCK.findall(text or "") if block.strip()]
+
+
+def affirmation_tasks(count: int = AFFIRMATION_COUNT) -> list:
+    """Each task is (prompt, extra generate kwargs, check(text) -> bool)."""
+    def check(text):
+        return len(parse_affirmation_batch(text)) >= count
+    return [(build_batch_prompt(category, subcategory, count), {"format": batch_schema(count)}, check)
+            for category, subcategory in AFFIRMATION_PAIRS]
+
+
+def generation_tasks() -> list:
+    def check(text):
+        blocks = _code_blocks(text)
+        return bool(blocks) and _parses(blocks[0])
+    return [(f"Write a complete Python script for this request: {request}\n"
+             "Output only the code, in a single ```python code block.", {}, check)
+            for request in EXAMPLE_REQUESTS]
+
+
+def review_tasks() -> list:
+    tasks = []
+    for code, correct in REVIEW_SNIPPETS:
+        prompt = (
+            "Review this Python code for syntax and logic errors:\n"
+            f"```python\n{code}```\n"
+            'If it is correct, respond with "CODE_APPROVED" followed by the original code. '
+            "Otherwise respond with the complete corrected code in a ```python code block."
+        )
+
+        def check(text, correct=correct):
+            fixed = any(_parses(block) for block in _code_blocks(text))
+            return ("CODE_APPROVED" in text or fixed) if correct else (fixed and "CODE_APPROVED" not in text)
+        tasks.append((prompt, {}, check))
+    return tasks
+
+
+TASK_SUITE = {
+    "affirmations": affirmation_tasks,
+    "generation": generation_tasks,
+    "validation": review_tasks,
+}
+
+
+def _median(values: list):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(1, math.ceil(len(values) / 2)) - 1]
+
+
+def run_task(client, model: str, prompt: str, extra: dict, check) -> dict:
+    meta = {}
+    started = time.perf_counter()
+    try:
+        text = client.generate(prompt, model=model, cache=False, deterministic=False,
+                               purpose="benchmark", retries=1, on_done=meta.update, **extra)
+        error = None
+    except OllamaConnectionError:
+        raise
+    except OllamaError as e:
+        text, error = "", str(e)
+    seconds = time.perf_counter() - started
+    tokens_per_sec = None
+    if meta.get("eval_count") and meta.get("eval_duration"):
+        tokens_per_sec = meta["eval_count"] / (meta["eval_duration"] / 1e9)
+    return {"seconds": seconds, "tokens_per_sec": tokens_per_sec, "passed": bool(text) and check(text),
+            "error": error}
+
+
+def benchmark_model(client, model: str, purposes=PURPOSES, quick: bool = False, log=print) -> dict:
+    """Run the suite for one model; returns {purpose: summary}."""
+    # Load the weights first so the first task is not charged for it
+    try:
+        client.request_json("POST", "/api/generate", {"model": model})
+    except OllamaConnectionError:
+        raise
+    except OllamaError as e:
+        log(f"  ❌ {model}: could not load ({e})")
+        return {}
+    results = {}
+    try:
+        for purpose in purposes:
+            tasks = TASK_SUITE[purpose]()
+            if quick:
+                tasks = tasks[:QUICK_TASKS]
+            runs = [run_task(client, model, prompt, extra, check) for prompt, extra, check in tasks]
+            rates = [r["tokens_per_sec"] for r in runs if r["tokens_per_sec"]]
+            results[purpose] = {
+                "tasks": len(runs),
+                "passed": sum(r["passed"] for r in runs),
+                "score": sum(r["passed"] for r in runs) / len(runs) if runs else 0.0,
+                "p50_seconds": _median([r["seconds"] for r in runs]),
+                "total_seconds": sum(r["seconds"] for r in runs),
+                "tokens_per_sec": sum(rates) / len(rates) if rates else None,
+                "errors": sum(1 for r in runs if r["error"]),
+            }
+            s = results[purpose]
+            rate = f"{s['tokens_per_sec']:.1f} tok/s" if s["tokens_per_sec"] else "- tok/s"
+            log(f"  {model} / {purpose}: {s['passed']}/{s['tasks']} passed, "
+                f"p50 {s['p50_seconds']:.2f}s, {rate}")
+    finally:
+        # Free the memory before the next model loads
+        try:
+            client.request_json("POST", "/api/generate", {"model": model, "keep_alive": 0})
+        except OllamaError:
+            pass
+    return results
+
+
+def recommend(results: dict, quality_bar: float = QUALITY_BAR) -> dict:
+    """Fastest model (lowest p50) per purpose among those meeting the quality bar."""
+    picks = {}
+    purposes = {p for per_model in results.values() for p in per_model}
+    for purpose in sorted(purposes):
+        candidates = [(model, per_model[purpose]) for model, per_model in results.items()
+                      if purpose in per_model and per_model[purpose]["score"] >= quality_bar]
+        if not candidates:
+            continue
+        model, summary = min(candidates, key=lambda c: (c[1]["p50_seconds"], -c[1]["score"]))
+        picks[purpose] = {
+            "model": model,
+            "score": summary["score"],
+            "p50_seconds": summary["p50_seconds"],
+            "tokens_per_sec": summary["tokens_per_sec"],
+        }
+    return picks
+
+
+def run_benchmark(models: list = None, purposes=PURPOSES, quick: bool = False,
+                  quality_bar: float = QUALITY_BAR, config_path: str = None, write: bool = True,
+                  client=None, log=print) -> dict:
+    """Benchmark models, print the picks and (unless write=False) update the config."""
+    client = client or ollama_client.get_client()
+    models = models or client.list_models()
+    log(f"🏁 Benchmarking {len(models)} model(s) on {', '.join(purposes)}...")
+    results = {}
+    for model in models:
+        results[model] = benchmark_model(client, model, purposes, quick, log)
+    picks = recommend(results, quality_bar)
+    for purpose in purposes:
+        pick = picks.get(purpose)
+        if pick:
+            log(f"✓ {purpose}: {pick['model']} (score {pick['score']:.0%}, p50 {pick['p50_seconds']:.2f}s)")
+        else:
+            log(f"⚠️  {purpose}: no model reached the quality bar ({quality_bar:.0%}); keeping current setting")
+    config = load_model_config(config_path)
+    config = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "quality_bar": quality_bar,
+        "purposes": {**config.get("purposes", {}), **picks},
+        "results": results,
+    }
+    if write:
+        save_model_config(config, config_path)
+        log(f"💾 Wrote {config_path or MODEL_CONFIG_PATH}")
+    return config
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pick the fastest local model per purpose that meets a quality bar.")
+    parser.add_argument("--models", help="Comma-separated models (default: every installed model)")
+    parser.add_argument("--purposes", default=",".join(PURPOSES),
+                        help=f"Comma-separated subset of: {', '.join(PURPOSES)}")
+    parser.add_argument("--quick", action="store_true", help=f"Only {QUICK_TASKS} tasks per purpose")
+    parser.add_argument("--quality-bar", type=float, default=QUALITY_BAR)
+    parser.add_argument("--config", default=MODEL_CONFIG_PATH)
+    parser.add_argument("--dry-run", action="store_true", help="Print the picks without writing the config")
+    args = parser.parse_args()
+    purposes = [p.strip() for p in args.purposes.split(",") if p.strip() in TASK_SUITE]
+    models = [m.strip() for m in args.models.split(",")] if args.models else None
+    try:
+        run_benchmark(models, purposes, args.quick, args.quality_bar, args.config, not args.dry_run)
+    except OllamaConnectionError as e:
+        print(f"❌ {e}. Please ensure Ollama is running (ollama serve).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Per-Purpose Model Configuration
+Reads the model recommended for each purpose (generation, validation,
+affirmations, ...) from the JSON file written by model_benchmark.py, so the
+scripts pick up the fastest model that met the quality bar instead of a
+hardcoded name. Without the file every script keeps its built-in default.
+"""
+
+import json
+import os
+import threading
+
+# ==================== MODEL CONFIG ====================
+MODEL_CONFIG_PATH = os.environ.get("MODEL_CONFIG_PATH", "model_config.json")
+# ======================================================
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def load_model_config(path: str = None) -> dict:
+    """Return the parsed config ({} if missing or unreadable), cached per mtime."""
+    path = path or MODEL_CONFIG_PATH
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+    with _lock:
+        cached = _cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+    try:
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+    except (OSError, ValueError):
+        config = {}
+    with _lock:
+        _cache[path] = (mtime, config)
+    return config
+
+
+def configured_model(purpose: str, default: str, path: str = None) -> str:
+    """The benchmarked model for a purpose, or default when none is recorded."""
+    entry = load_model_config(path).get("purposes", {}).get(purpose) or {}
+    return entry.get("model") or default
+
+
+def save_model_config(config: dict, path: str = None):
+    """Write the config atomically so a running script never reads half a file."""
+    path = path or MODEL_CONFIG_PATH
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+    os.replace(tmp, path)
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Model Response Fixtures (Record / Replay)
+Record mode captures every answer the model actually generates, with its
+streamed chunk timings and Ollama's final timing chunk, into a gzipped JSON
+Lines archive. Replay mode serves those answers back to the client without a
+backend, at the original latency or scaled by a speed factor, so extraction,
+validation, rendering and packaging can be benchmarked offline and
+reproducibly.
+
+Enable for any script through the environment:
+    OLLAMA_FIXTURES=fixtures/run.jsonl.gz OLLAMA_FIXTURE_MODE=record python3 enhanced_python_generator3.py
+    OLLAMA_FIXTURES=fixtures/run.jsonl.gz OLLAMA_REPLAY_SPEED=0 python3 enhanced_python_generator3.py
+
+Usage:
+    python3 model_fixtures.py stats [archive]    # Recordings, models and recorded model time
+    python3 model_fixtures.py list [archive]     # One line per recording
+"""
+
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+
+# ==================== FIXTURE CONFIGURATION ====================
+FIXTURE_PATH = os.environ.get("OLLAMA_FIXTURES", "")                 # "" disables record/replay
+FIXTURE_MODE = os.environ.get("OLLAMA_FIXTURE_MODE", "replay")        # "record" or "replay"
+REPLAY_SPEED = float(os.environ.get("OLLAMA_REPLAY_SPEED", "1.0"))    # Latency multiplier; 0 = instant
+# ===============================================================
+
+META_FIELDS = ("total_duration", "load_duration", "prompt_eval_count", "prompt_eval_duration",
+               "eval_count", "eval_duration")
+
+
+class Take:
+    """Timing collected while one live generation is being recorded."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.tokens = []
+        self.at_ms = []
+        self.meta = None
+
+    def wrap_token(self, on_token):
+        """Wrap the caller's on_token so each chunk is timestamped."""
+        if on_token is None:
+            return None
+
+        def record(token):
+            self.tokens.append(token)
+            self.at_ms.append(round((time.perf_counter() - self.started) * 1000))
+            on_token(token)
+        return record
+
+    def wrap_done(self, on_done):
+        def record(meta):
+            self.meta = {k: meta[k] for k in META_FIELDS if k in meta}
+            if on_done:
+                on_done(meta)
+        return record
+
+
+class FixtureArchive:
+    """Recorded model answers keyed by the prompt cache key.
+
+    A key may hold several recordings (sampled calls, repeated runs); replay
+    hands them out in recorded order and starts over when they run out.
+    """
+
+    def __init__(self, path: str = FIXTURE_PATH, mode: str = FIXTURE_MODE,
+                 speed: float = REPLAY_SPEED):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown fixture mode {mode!r} (use 'record' or 'replay')")
+        self.path = path
+        self.mode = mode
+        self.speed = max(0.0, speed)
+        self.counters = {"recorded": 0, "replayed": 0, "misses": 0}
+        self._records = {}
+        self._positions = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self._records.setdefault(record["key"], []).append(record)
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def models(self) -> list:
+        """Every model that appears in the archive."""
+        with self._lock:
+            return sorted({r["model"] for records in self._records.values() for r in records})
+
+    def records(self) -> list:
+        with self._lock:
+            return [r for records in self._records.values() for r in records]
+
+    def record(self, key: str, model: str, purpose: str, prompt: str, response: str, take: Take):
+        """Store one live answer with the timing its Take collected."""
+        record = {
+            "key": key,
+            "model": model,
+            "purpose": purpose,
+            "prompt": prompt,
+            "response": response,
+            "seconds": round(time.perf_counter() - take.started, 4),
+        }
+        if take.tokens:
+            record["tokens"] = take.tokens
+            record["at_ms"] = take.at_ms
+        if take.meta:
+            record["meta"] = take.meta
+        with self._lock:
+            self._records.setdefault(key, []).append(record)
+            self.counters["recorded"] += 1
+            self._dirty = True
+
+    def lookup(self, key: str):
+        """The next recording for key, or None if it was never recorded."""
+        with self._lock:
+            records = self._records.get(key)
+            if not records:
+                self.counters["misses"] += 1
+                return None
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            self.counters["replayed"] += 1
+            return records[position % len(records)]
+
+    def play(self, record: dict, on_token=None) -> str:
+        """Serve a recording, sleeping its recorded latency times self.speed."""
+        started = time.perf_counter()
+        tokens = record.get("tokens")
+        if on_token is not None and tokens:
+            for token, at_ms in zip(tokens, record["at_ms"]):
+                self._sleep_until(started, at_ms / 1000)
+                on_token(token)
+            self._sleep_until(started, record["seconds"])
+            return "".join(tokens)
+        self._sleep_until(started, record["seconds"])
+        if on_token is not None:
+            on_token(record["response"])
+        return record["response"]
+
+    def _sleep_until(self, started: float, offset: float):
+        remaining = offset * self.speed - (time.perf_counter() - started)
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def save(self):
+        """Write the archive atomically (no-op if nothing new was recorded)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            records = [r for records in self._records.values() for r in records]
+            self._dirty = False
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        os.replace(tmp, self.path)
+
+    def report(self) -> str:
+        with self._lock:
+            c = dict(self.counters)
+        if self.recording:
+            return f"📼 Recorded {c['recorded']} model answers to {self.path}"
+        return (f"📼 Replayed {c['replayed']} model answers from {self.path} at speed {self.speed:g} "
+                f"({c['misses']} misses)")
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    path = sys.argv[2] if len(sys.argv) > 2 else FIXTURE_PATH
+    if command not in ("stats", "list") or not path:
+        print("Usage: python3 model_fixtures.py stats|list <archive>")
+        return
+    if not os.path.exists(path):
+        print(f"❌ No fixture archive at {path}")
+        return
+    archive = FixtureArchive(path, "replay")
+    records = archive.records()
+    if command == "list":
+        for r in records:
+            prompt = " ".join(r["prompt"].split())[:60]
+            print(f"{r['key'][:12]}  {r['model']:<32} {r['purpose']:<14} {r['seconds']:>7.2f}s  {prompt}")
+        return
+    print(f"📼 {path}: {len(records)} recordings, {os.path.getsize(path) / 1024:.1f} KB")
+    for model in archive.models():
+        own = [r for r in records if r["model"] == model]
+        print(f"  {model}: {len(own)} answers, {sum(r['seconds'] for r in own):.1f}s of recorded model time")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Model Lifecycle Manager
+Loads the model in the background while a REPL or batch planner starts up,
+keeps it resident between sparse calls with Ollama's `keep_alive`, and keeps
+weight-loading time separate from inference time in its reports.
+
+Usage:
+    python3 model_lifecycle.py [model]          # Preload and report load time
+    python3 model_lifecycle.py [model] --unload # Release the model's memory now
+"""
+
+import os
+import sys
+import threading
+import time
+
+import ollama_client
+from ollama_client import OllamaError
+
+# ==================== LIFECYCLE CONFIGURATION ====================
+OLLAMA_MODEL = "mixtral:8x7b-instruct-v0.1-q6_K"
+KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")  # How long Ollama keeps the model loaded
+PRELOAD_TIMEOUT = None                                    # Seconds to wait for a load (None = no limit)
+RELOAD_THRESHOLD = 0.1                                    # load_duration (s) above this counts as a reload
+# =================================================================
+
+_NS = 1e9
+
+
+class ModelLifecycle:
+    """Preloads one model, keeps it resident and tracks load vs inference time."""
+
+    def __init__(self, model: str = OLLAMA_MODEL, keep_alive=KEEP_ALIVE, client=None):
+        self.model = model
+        self.keep_alive = keep_alive
+        self._client = client
+        self.load_seconds = 0.0        # Time Ollama spent loading weights
+        self.loads = 0                 # Number of (re)loads observed
+        self.inference_seconds = 0.0   # Time spent evaluating prompts and generating
+        self.calls = 0
+        self.preload_error = None
+        self._ready = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        # Without an explicit client, follow the shared one (ollama_client.use_client can swap it)
+        return self._client or ollama_client.get_client()
+
+    def preload(self, wait: bool = False):
+        """Start loading the model in a background thread (only once).
+
+        An empty prompt makes Ollama load the weights without generating
+        anything. Pass wait=True to block until the model is resident.
+        """
+        with self._lock:
+            if self._thread is None:
+                self._ready.clear()
+                self._thread = threading.Thread(target=self._load, daemon=True,
+                                                name=f"preload-{self.model}")
+                self._thread.start()
+        if wait:
+            self.wait_ready()
+        return self
+
+    def _load(self):
+        # Every endpoint the router may pick needs the weights in memory
+        errors = []
+        for endpoint in self.client.router.endpoints:
+            started = time.perf_counter()
+            try:
+                data = self.client.request_json(
+                    "POST", "/api/generate",
+                    {"model": self.model, "keep_alive": self.keep_alive},
+                    timeout=PRELOAD_TIMEOUT, endpoint=endpoint,
+                )
+            except OllamaError as e:
+                errors.append(e)
+                continue
+            load = data.get("load_duration")
+            with self._lock:
+                self.load_seconds += load / _NS if load else time.perf_counter() - started
+                self.loads += 1
+        # Ready as long as at least one endpoint has the model loaded
+        self.preload_error = errors[0] if len(errors) == len(self.client.router.endpoints) else None
+        self._ready.set()
+
+    def wait_ready(self, timeout=None) -> bool:
+        """Wait for a started preload; True if the model loaded successfully."""
+        if self._thread is None:
+            return False
+        self._ready.wait(timeout)
+        return self._ready.is_set() and self.preload_error is None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set() and self.preload_error is None
+
+    def generate(self, prompt: str, **kwargs) -> str:
+        """client.generate() for this model with keep_alive applied and timed.
+
+        A call made while the preload is still running waits for it first, so
+        the remaining load time is not counted as inference.
+        """
+        if self._thread is not None:
+            self._ready.wait()
+        kwargs.setdefault("model", self.model)
+        kwargs.setdefault("keep_alive", self.keep_alive)
+        caller_on_done = kwargs.pop("on_done", None)
+        done = {}
+
+        def on_done(meta):
+            done.update(meta)
+            if caller_on_done:
+                caller_on_done(meta)
+
+        started = time.perf_counter()
+        text = self.client.generate(prompt, on_done=on_done, **kwargs)
+        self._record(done, time.perf_counter() - started)
+        return text
+
+    def _record(self, meta: dict, wall: float):
+        with self._lock:
+            self.calls += 1
+            if not meta:
+                # Cache hit or stopped early: no server timings, so count wall time
+                self.inference_seconds += wall
+                return
+            load = (meta.get("load_duration") or 0) / _NS
+            total = (meta.get("total_duration") or 0) / _NS
+            # A noticeable load_duration means Ollama had unloaded the model
+            if load > RELOAD_THRESHOLD:
+                self.load_seconds += load
+                self.loads += 1
+            self.inference_seconds += max(total - load, 0.0) if total else wall
+
+    def unload(self):
+        """Ask Ollama to release the model's memory right away."""
+        for endpoint in self.client.router.endpoints:
+            self.client.request_json("POST", "/api/generate", {"model": self.model, "keep_alive": 0},
+                                     endpoint=endpoint)
+        with self._lock:
+            self._thread = None
+            self._ready.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "model": self.model,
+                "keep_alive": self.keep_alive,
+                "loads": self.loads,
+                "load_seconds": self.load_seconds,
+                "calls": self.calls,
+                "inference_seconds": self.inference_seconds,
+            }
+
+    def report(self) -> str:
+        """One-line summary of load vs inference time."""
+        stats = self.stats()
+        line = (f"⏱️  {stats['model']}: loaded {stats['loads']}x in {stats['load_seconds']:.1f}s, "
+                f"{stats['calls']} calls in {stats['inference_seconds']:.1f}s inference")
+        if self.preload_error:
+            line += f" | preload failed: {self.preload_error}"
+        return line
+
+
+_lifecycles = {}
+_lifecycles_lock = threading.Lock()
+
+
+def get_lifecycle(model: str = OLLAMA_MODEL) -> ModelLifecycle:
+    """Return the process-wide lifecycle manager for a model."""
+    with _lifecycles_lock:
+        if model not in _lifecycles:
+            _lifecycles[model] = ModelLifecycle(model)
+        return _lifecycles[model]
+
+
+def preload(model: str = OLLAMA_MODEL) -> ModelLifecycle:
+    """Shortcut for get_lifecycle(model).preload()."""
+    return get_lifecycle(model).preload()
+
+
+def generate(prompt: str, model: str = OLLAMA_MODEL, **kwargs) -> str:
+    """Shortcut for get_lifecycle(model).generate(...)."""
+    return get_lifecycle(model).generate(prompt, **kwargs)
+
+
+def report(model: str = OLLAMA_MODEL) -> str:
+    """Shortcut for get_lifecycle(model).report()."""
+    return get_lifecycle(model).report()
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    lifecycle = get_lifecycle(args[0] if args else OLLAMA_MODEL)
+    if "--unload" in sys.argv:
+        lifecycle.unload()
+        print(f"✓ Unloaded {lifecycle.model}")
+        return
+    print(f"⏳ Loading {lifecycle.model} (keep_alive={lifecycle.keep_alive})...")
+    if lifecycle.preload(wait=True).ready:
+        print(lifecycle.report())
+    else:
+        print(f"❌ Could not load {lifecycle.model}: {lifecycle.preload_error}")
+
+
+if __name__ == "__main__":
+    main()
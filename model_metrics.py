@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Model Call Telemetry
+Every model call made through the shared client is appended to a JSON-lines
+metrics file: queue wait, load time, time to first token, prompt/generated
+token counts and tokens per second, tagged with purpose and caller.
+
+Usage:
+    python3 model_metrics.py                  # Summary grouped by purpose
+    python3 model_metrics.py --by caller      # ... or by caller, model or endpoint
+    python3 model_metrics.py --last 500       # Only the most recent 500 calls
+    python3 model_metrics.py clear            # Delete the metrics file
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+
+# ==================== METRICS CONFIGURATION ====================
+METRICS_PATH = os.environ.get("MODEL_METRICS_PATH", "model_metrics.jsonl")  # "" disables
+# ===============================================================
+
+_NS = 1e9
+_INTERNAL_MODULES = ("ollama_client", "model_lifecycle", "model_session", "model_metrics")
+
+
+class MetricsSink:
+    """Append-only JSON-lines sink, safe to share between threads."""
+
+    def __init__(self, path: str = METRICS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def record(self, entry: dict):
+        line = json.dumps(entry, ensure_ascii=False)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+def caller_name(depth: int = 2) -> str:
+    """'script.py:function' of the first frame outside the model plumbing."""
+    frame = sys._getframe(depth)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.split(".")[0] not in _INTERNAL_MODULES:
+            filename = os.path.basename(frame.f_code.co_filename)
+            return f"{filename}:{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+def build_entry(model: str, purpose: str, caller: str, source: str, started: float,
+                finished: float, timing: dict = None, error: Exception = None) -> dict:
+    """Turn raw timestamps and Ollama's final chunk into one metrics record.
+
+    timing holds what the client observed: the endpoint, the time of the
+    first token, the number of streamed chunks and the final chunk ("meta")
+    when the server finished the reply.
+    """
+    timing = timing or {}
+    meta = timing.get("meta") or {}
+    wall = finished - started
+    entry = {
+        "ts": time.time(),
+        "model": model,
+        "purpose": purpose,
+        "caller": caller,
+        "source": source,
+        "endpoint": timing.get("endpoint"),
+        "ok": error is None,
+        "error": type(error).__name__ if error else None,
+        "wall": round(wall, 4),
+    }
+    if source != "model":
+        return entry
+    load = (meta.get("load_duration") or 0) / _NS
+    prompt_eval = (meta.get("prompt_eval_duration") or 0) / _NS
+    eval_seconds = (meta.get("eval_duration") or 0) / _NS
+    server_total = (meta.get("total_duration") or 0) / _NS
+    first_token = timing.get("first_token")
+    if first_token is not None:
+        ttft = first_token - started
+    elif meta:
+        ttft = load + prompt_eval
+    else:
+        ttft = None
+    eval_tokens = meta.get("eval_count")
+    if eval_tokens and eval_seconds:
+        tokens_per_sec = eval_tokens / eval_seconds
+    elif timing.get("tokens") and first_token is not None and finished > first_token:
+        # Stopped early: no server counts, so estimate from streamed chunks
+        tokens_per_sec = timing["tokens"] / (finished - first_token)
+    else:
+        tokens_per_sec = None
+    entry.update({
+        # Time spent outside Ollama's own accounting: routing, connection, server queue
+        "queue_wait": round(max(wall - server_total, 0.0), 4) if server_total else None,
+        "load": round(load, 4) if meta else None,
+        "ttft": round(ttft, 4) if ttft is not None else None,
+        "prompt_tokens": meta.get("prompt_eval_count"),
+        "eval_tokens": eval_tokens if eval_tokens is not None else timing.get("tokens"),
+        "prompt_eval_seconds": round(prompt_eval, 4) if meta else None,
+        "eval_seconds": round(eval_seconds, 4) if meta else None,
+        "tokens_per_sec": round(tokens_per_sec, 2) if tokens_per_sec else None,
+        "stopped_early": error is None and not meta,
+    })
+    return entry
+
+
+def load_entries(path: str = METRICS_PATH, last: int = None) -> list:
+    if not path or not os.path.exists(path):
+        return []
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+    return entries[-last:] if last else entries
+
+
+def _percentile(values: list, pct: float):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(1, math.ceil(pct / 100 * len(values))) - 1]
+
+
+def _mean(values: list):
+    return sum(values) / len(values) if values else None
+
+
+def summarize(entries: list, by: str = "purpose") -> dict:
+    """Aggregate entries per group: counts, TTFT/tokens-per-sec and time split."""
+    groups = {}
+    for entry in entries:
+        groups.setdefault(entry.get(by) or "-", []).append(entry)
+    summary = {}
+    for name, items in groups.items():
+        model_calls = [e for e in items if e.get("source") == "model" and e.get("ok")]
+        values = lambda key: [e[key] for e in model_calls if e.get(key) is not None]
+        summary[name] = {
+            "calls": len(items),
+            "errors": sum(1 for e in items if not e.get("ok")),
+            "cached": sum(1 for e in items if e.get("source") == "cache"),
+            "coalesced": sum(1 for e in items if e.get("source") == "coalesced"),
+            "ttft_p50": _percentile(values("ttft"), 50),
+            "ttft_p95": _percentile(values("ttft"), 95),
+            "tokens_per_sec": _mean(values("tokens_per_sec")),
+            "prompt_tokens": _mean(values("prompt_tokens")),
+            "eval_tokens": _mean(values("eval_tokens")),
+            "queue_seconds": sum(values("queue_wait")),
+            "load_seconds": sum(values("load")),
+            "prompt_eval_seconds": sum(values("prompt_eval_seconds")),
+            "eval_seconds": sum(values("eval_seconds")),
+        }
+    return summary
+
+
+def _fmt(value, spec=".2f"):
+    return "-" if value is None else format(value, spec)
+
+
+def print_summary(summary: dict, by: str = "purpose"):
+    print(f"📈 Model calls by {by}:")
+    for name, s in sorted(summary.items(), key=lambda item: -item[1]["calls"]):
+        print(f"  {name}: {s['calls']} calls ({s['errors']} errors, {s['cached']} cached, "
+              f"{s['coalesced']} coalesced)")
+        print(f"    TTFT p50 {_fmt(s['ttft_p50'])}s / p95 {_fmt(s['ttft_p95'])}s | "
+              f"{_fmt(s['tokens_per_sec'], '.1f')} tok/s | "
+              f"avg {_fmt(s['prompt_tokens'], '.0f')} prompt + {_fmt(s['eval_tokens'], '.0f')} generated tokens")
+        split = {
+            "queue": s["queue_seconds"],
+            "model load": s["load_seconds"],
+            "prompt eval": s["prompt_eval_seconds"],
+            "generation": s["eval_seconds"],
+        }
+        total = sum(split.values())
+        if total:
+            parts = ", ".join(f"{k} {v / total * 100:.0f}%" for k, v in split.items())
+            print(f"    time split: {parts} (most time: {max(split, key=split.get)})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise model call telemetry.")
+    parser.add_argument("action", nargs="?", default="summary", choices=["summary", "clear"])
+    parser.add_argument("--by", default="purpose", choices=["purpose", "caller", "model", "endpoint"])
+    parser.add_argument("--last", type=int, default=None, help="Only use the most recent N calls")
+    parser.add_argument("--path", default=METRICS_PATH)
+    args = parser.parse_args()
+    if args.action == "clear":
+        if args.path and os.path.exists(args.path):
+            os.remove(args.path)
+        print(f"✓ Cleared model metrics: {args.path}")
+        return
+    entries = load_entries(args.path, args.last)
+    if not entries:
+        print(f"No model calls recorded in {args.path or '(metrics disabled)'}")
+        return
+    print_summary(summarize(entries, args.by), args.by)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Purpose-Based Model Routing
+Maps each kind of model call (generation, validation, clarification, ...) to
+a model and an option profile, so review and reformatting work goes to a small
+fast model while code generation stays on the big one. A small-model answer
+that fails the caller's confidence check is re-run on the big model, and the
+latency of every route is tracked so the table can be tuned.
+
+Usage:
+    python3 model_routing.py    # Show the routing table
+"""
+
+import ast
+import os
+import re
+import threading
+import time
+
+import model_lifecycle
+from model_config import configured_model
+from ollama_client import OllamaConnectionError, OllamaError
+
+# ==================== ROUTING CONFIGURATION ====================
+BIG_MODEL = "mixtral:8x7b-instruct-v0.1-q6_K"
+# The environment wins over the benchmarked pick in model_config.json
+SMALL_MODEL = os.environ.get("OLLAMA_SMALL_MODEL") or configured_model("validation", "qwen2.5-coder:3b")
+CLARIFY_MODEL = os.environ.get("OLLAMA_SMALL_MODEL") or configured_model("clarification", SMALL_MODEL)
+# Routes sharing a model should use the same num_ctx, or Ollama reloads it on every switch
+ROUTES = {
+    "generation":    {"model": None, "options": {}},    # None = the caller's (big) model
+    "fix":           {"model": None, "options": {}},
+    "validation":    {"model": SMALL_MODEL,
+                      "options": {"num_ctx": 8192, "num_predict": 2048, "temperature": 0.1}},
+    "clarification": {"model": CLARIFY_MODEL,
+                      "options": {"num_ctx": 8192, "num_predict": 1024, "temperature": 0.0}},
+}
+# ===============================================================
+
+_CODE_BLOCK = re.compile(r"```(?:python)?\s*\n(.*?)```", re.DOTALL)
+
+
+def review_is_confident(text: str) -> bool:
+    """Confidence check for code review replies: an explicit approval, or a
+    code block that parses as Python."""
+    if not text:
+        return False
+    if "CODE_APPROVED" in text:
+        return True
+    for block in _CODE_BLOCK.findall(text):
+        try:
+            ast.parse(block)
+            return True
+        except SyntaxError:
+            continue
+    return False
+
+
+class ModelRouter:
+    """Sends each call to the model its purpose is routed to.
+
+    big_model serves routes without a model of their own and is the
+    fallback whenever a routed model fails or its answer is rejected.
+    """
+
+    def __init__(self, big_model: str = BIG_MODEL, routes: dict = None):
+        self.big_model = big_model
+        self.routes = routes if routes is not None else ROUTES
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def route(self, purpose: str) -> dict:
+        """The model and options a purpose is sent to."""
+        route = self.routes.get(purpose) or {}
+        return {"model": route.get("model") or self.big_model,
+                "options": dict(route.get("options") or {})}
+
+    def generate(self, prompt: str, purpose: str = "generation", accept=None, **kwargs) -> str:
+        """Generate on the routed model, falling back to the big model when needed.
+
+        accept(text) -> bool judges a small model's answer; a rejected answer
+        or an error other than a connection failure (e.g. the small model is
+        not installed) re-runs the prompt on the big model. Caller options
+        override the route's option profile and are the only options the
+        big model gets when it takes over.
+        """
+        route = self.route(purpose)
+        caller_options = kwargs.pop("options", None) or {}
+        options = {**route["options"], **caller_options}
+        model = route["model"]
+        started = time.perf_counter()
+        try:
+            text = model_lifecycle.generate(prompt, model=model, options=options or None,
+                                            purpose=purpose, **kwargs)
+        except OllamaConnectionError:
+            raise
+        except OllamaError as e:
+            if model == self.big_model:
+                raise
+            reason = f"error: {e}"
+        else:
+            if model == self.big_model or accept is None or accept(text):
+                self._record(purpose, model, time.perf_counter() - started)
+                return text
+            reason = "low confidence"
+        self._record(purpose, model, time.perf_counter() - started, rejected=True)
+        print(f"↪️  {purpose}: {model} answer not used ({reason}); asking {self.big_model}")
+        started = time.perf_counter()
+        # A separate purpose keeps fallback latencies out of the small model's deadline
+        text = model_lifecycle.generate(prompt, model=self.big_model, purpose=f"{purpose}-fallback",
+                                        options=caller_options or None, **kwargs)
+        self._record(purpose, self.big_model, time.perf_counter() - started)
+        return text
+
+    def _record(self, purpose, model, seconds, rejected=False):
+        with self._lock:
+            stats = self._stats.setdefault((purpose, model), {"calls": 0, "rejected": 0, "seconds": 0.0})
+            stats["calls"] += 1
+            stats["rejected"] += int(rejected)
+            stats["seconds"] += seconds
+
+    def stats(self) -> dict:
+        """{(purpose, model): {calls, rejected, seconds}} for every route used."""
+        with self._lock:
+            return {key: dict(value) for key, value in self._stats.items()}
+
+    def report(self) -> str:
+        """Per-purpose latency by model, including how often the big model took over."""
+        stats = self.stats()
+        if not stats:
+            return "🧭 No routed model calls"
+        lines = ["🧭 Model routing:"]
+        for (purpose, model), s in sorted(stats.items()):
+            line = f"  {purpose} → {model}: {s['calls']} calls, avg {s['seconds'] / s['calls']:.1f}s"
+            if s["rejected"]:
+                line += f", {s['rejected']} handed to {self.big_model}"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+_routers = {}
+_routers_lock = threading.Lock()
+
+
+def get_router(big_model: str = BIG_MODEL) -> ModelRouter:
+    """Return the process-wide router whose big model is big_model."""
+    with _routers_lock:
+        if big_model not in _routers:
+            _routers[big_model] = ModelRouter(big_model)
+        return _routers[big_model]
+
+
+def generate(prompt: str, purpose: str = "generation", big_model: str = BIG_MODEL, **kwargs) -> str:
+    """Shortcut for get_router(big_model).generate(...)."""
+    return get_router(big_model).generate(prompt, purpose=purpose, **kwargs)
+
+
+def main():
+    router = get_router()
+    print("🧭 Model routes:")
+    for purpose in router.routes:
+        route = router.route(purpose)
+        options = ", ".join(f"{k}={v}" for k, v in route["options"].items()) or "model defaults"
+        print(f"  {purpose}: {route['model']} ({options})")
+
+
+if __name__ == "__main__":
+    main()
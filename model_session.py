@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Model Conversation Session
+Sends a long, fixed instruction block (such as an orchestrator's project
+context) once as the system prompt, then continues later turns from the
+`context` tokens Ollama returns, so the prefix is not re-evaluated every turn.
+"""
+
+import threading
+
+import model_lifecycle
+
+# ==================== SESSION CONFIGURATION ====================
+OLLAMA_MODEL = "mixtral:8x7b-instruct-v0.1-q6_K"
+SESSION_MAX_TOKENS = 1500   # Start over once the carried context grows past this
+                            # (keep it well inside the model's num_ctx, 2048 by default)
+# ===============================================================
+
+
+class ModelSession:
+    """One REPL conversation with the model that shares a system prompt.
+
+    The first turn sends the system prompt; each reply's `context` tokens are
+    passed to the next turn. The session starts over when the system prompt
+    changes, when the carried context grows past max_tokens, or when a turn
+    ends without returning context (stopped early or answered from cache).
+    """
+
+    def __init__(self, model: str = OLLAMA_MODEL, system: str = None,
+                 max_tokens: int = SESSION_MAX_TOKENS):
+        self.model = model
+        self.system = system
+        self.max_tokens = max_tokens
+        self.context = None
+        self.turns = 0
+        self.resets = 0
+        self.prompt_tokens = 0   # Prompt tokens Ollama actually had to evaluate
+        self._lock = threading.Lock()
+
+    def reset(self, system: str = None):
+        """Forget the conversation, optionally switching to a new system prompt."""
+        with self._lock:
+            if system is not None:
+                self.system = system
+            if self.context is not None:
+                self.resets += 1
+            self.context = None
+
+    def generate(self, prompt: str, system: str = None, **kwargs) -> str:
+        """Send one turn and remember the returned context for the next one.
+
+        Passing a system prompt that differs from the current one resets the
+        session first, so editing the project context takes effect at once.
+        """
+        if system is not None and system != self.system:
+            self.reset(system)
+        with self._lock:
+            context = self.context
+        if context:
+            kwargs["context"] = context
+        elif self.system:
+            kwargs["system"] = self.system
+        caller_on_done = kwargs.pop("on_done", None)
+        done = {}
+
+        def on_done(meta):
+            done.update(meta)
+            if caller_on_done:
+                caller_on_done(meta)
+
+        try:
+            text = model_lifecycle.generate(prompt, model=self.model, on_done=on_done, **kwargs)
+        except BaseException:
+            self.reset()
+            raise
+        with self._lock:
+            self.turns += 1
+            self.prompt_tokens += done.get("prompt_eval_count") or 0
+            new_context = done.get("context")
+            if new_context and len(new_context) <= self.max_tokens:
+                self.context = new_context
+            else:
+                if self.context is not None:
+                    self.resets += 1
+                self.context = None
+        return text
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "turns": self.turns,
+                "resets": self.resets,
+                "prompt_tokens": self.prompt_tokens,
+                "context_tokens": len(self.context) if self.context else 0,
+            }
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Streaming Model Output for the REPL Orchestrators
+One shared reader for streamed replies: echoes tokens as they arrive, fires
+per-token and per-line callbacks, shows a "thinking" notice only when the
+first token is slow, and turns Ctrl+C into a clean cancellation that also
+stops the generation on the server.
+"""
+
+import sys
+import threading
+
+from ollama_client import OllamaError
+
+# ==================== STREAM CONFIGURATION ====================
+THINKING_NOTICE_AFTER = 3                 # Seconds without a token before the notice is shown
+THINKING_NOTICE = "[.] Model is thinking…"
+# ==============================================================
+
+
+class GenerationCancelled(OllamaError):
+    """Raised when the user interrupts a streaming reply with Ctrl+C.
+
+    partial holds the text received before the interruption.
+    """
+
+    def __init__(self, partial: str = ""):
+        super().__init__("Generation cancelled by user")
+        self.partial = partial
+
+
+class LineSplitter:
+    """Feeds streamed tokens in and calls on_line for every completed line."""
+
+    def __init__(self, on_line):
+        self.on_line = on_line
+        self._pending = ""
+
+    def feed(self, token: str):
+        self._pending += token
+        while "\n" in self._pending:
+            line, self._pending = self._pending.split("\n", 1)
+            self.on_line(line)
+
+    def flush(self):
+        if self._pending:
+            line, self._pending = self._pending, ""
+            self.on_line(line)
+
+
+def stream_model(generate, prompt: str, on_token=None, on_line=None, echo: bool = True,
+                 notice_after: float = THINKING_NOTICE_AFTER, **kwargs) -> str:
+    """Call generate(prompt, on_token=..., **kwargs) and stream its reply.
+
+    generate is model_lifecycle.generate, ModelSession.generate or any
+    function with the same signature. Tokens are echoed to stdout unless
+    echo is False or a JSON `format` is requested, since the caller prints
+    the parsed reply itself. The thinking notice is a timer cancelled by the first
+    token, so nothing polls while waiting. Ctrl+C drops the connection,
+    which makes Ollama stop generating, and raises GenerationCancelled.
+    """
+    echo = echo and not kwargs.get("format")
+    notice = threading.Timer(notice_after, print, args=(THINKING_NOTICE,))
+    notice.daemon = True
+    lines = LineSplitter(on_line) if on_line else None
+    received = []
+
+    def relay(token):
+        notice.cancel()
+        received.append(token)
+        if echo:
+            sys.stdout.write(token)
+            sys.stdout.flush()
+        if on_token:
+            on_token(token)
+        if lines:
+            lines.feed(token)
+
+    notice.start()
+    try:
+        text = generate(prompt, on_token=relay, **kwargs)
+    except KeyboardInterrupt:
+        if echo:
+            print()
+        raise GenerationCancelled("".join(received)) from None
+    finally:
+        notice.cancel()
+    if lines:
+        lines.flush()
+    return text
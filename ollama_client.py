@@ -0,0 +1,1010 @@
+#!/usr/bin/env python3
+"""
+Shared Ollama Model Client
+Talks to the Ollama REST API over pooled keep-alive HTTP connections, so model
+calls no longer pay process fork/exec and CLI startup cost for every prompt.
+With several endpoints configured, each call goes to the least-loaded healthy one.
+
+Usage:
+    python3 ollama_client.py    # Probe every configured endpoint and show its status
+"""
+
+import atexit
+import http.client
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+from latency_tracker import LatencyTracker
+from model_fixtures import FIXTURE_MODE, FIXTURE_PATH, REPLAY_SPEED, FixtureArchive, Take
+from model_metrics import METRICS_PATH, MetricsSink, build_entry, caller_name
+from prompt_cache import PROMPT_CACHE_PATH, PromptCache, make_cache_key
+
+# ==================== CLIENT CONFIGURATION ====================
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://127.0.0.1:11434")
+OLLAMA_HOSTS = [h for h in os.environ.get("OLLAMA_HOSTS", "").split(",") if h.strip()]  # Extra endpoints
+OLLAMA_MODEL = "mixtral:8x7b-instruct-v0.1-q6_K"
+POOL_SIZE = 8            # Idle keep-alive connections kept per host
+CONNECT_TIMEOUT = None   # Socket timeout in seconds (None waits as long as needed)
+HEDGE_REQUESTS = True    # With several endpoints, send a duplicate to another one after the p95
+RETRY_DOWN_AFTER = 5     # Seconds before a failed endpoint gets a trial request (doubles per failure)
+MAX_RETRY_DOWN_AFTER = 120
+HEALTH_TIMEOUT = 3       # Socket timeout for health probes
+RETRY_ATTEMPTS = 3       # Tries per model call for transient failures (1 disables retries)
+RETRY_BASE_DELAY = 0.5   # Backoff before the first retry; doubles per attempt, with full jitter
+RETRY_MAX_DELAY = 30
+BREAKER_THRESHOLD = 5    # Consecutive transient failures before calls fail fast
+BREAKER_RESET_AFTER = 30 # Seconds the breaker stays open before letting a trial call through
+PAUSE_MAX_SECONDS = 1800 # How long a batch waits for the backend to come back before giving up
+# ==============================================================
+
+
+class OllamaError(Exception):
+    """Raised when the Ollama server cannot produce a response.
+
+    status holds the HTTP status code when the server answered with an error.
+    """
+
+    def __init__(self, message: str = "", status: int = None):
+        super().__init__(message)
+        self.status = status
+
+
+class OllamaConnectionError(OllamaError):
+    """Raised when the Ollama server cannot be reached."""
+
+
+class OllamaTimeoutError(OllamaError):
+    """Raised when the server does not answer within the timeout or deadline."""
+
+
+class OllamaEmptyResponseError(OllamaError):
+    """Raised by callers when the model answered with no usable text."""
+
+
+class FixtureMissError(OllamaError):
+    """Replay mode was asked for a prompt the fixture archive never recorded."""
+
+
+class CircuitOpenError(OllamaConnectionError):
+    """Raised without contacting the server while the circuit breaker is open."""
+
+
+def is_transient(error: Exception) -> bool:
+    """True for failures worth retrying: lost connections and 5xx/429 replies.
+
+    Timeouts are not retried, since the deadline already allows for the p99
+    latency; they still count against the circuit breaker.
+    """
+    if isinstance(error, CircuitOpenError):
+        return False
+    if isinstance(error, OllamaConnectionError):
+        return True
+    status = getattr(error, "status", None)
+    return status is not None and (status >= 500 or status == 429)
+
+
+def backoff_delay(attempt: int, base: float = None, cap: float = None) -> float:
+    """Exponential backoff with full jitter for the given retry (1-based)."""
+    base = RETRY_BASE_DELAY if base is None else base
+    cap = RETRY_MAX_DELAY if cap is None else cap
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+def normalize_host(host: str) -> str:
+    """Accept 'host:port' as well as full URLs, the way the ollama CLI does."""
+    host = host.strip()
+    if "://" not in host:
+        host = "http://" + host
+    return host.rstrip("/")
+
+
+class ConnectionPool:
+    """A small LIFO pool of keep-alive HTTP connections to one host."""
+
+    def __init__(self, host: str, size: int = POOL_SIZE, timeout=CONNECT_TIMEOUT):
+        self.host = normalize_host(host)
+        parts = urlsplit(self.host)
+        self.scheme = parts.scheme
+        self.hostname = parts.hostname or "127.0.0.1"
+        self.port = parts.port or (443 if parts.scheme == "https" else 11434)
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def _new_connection(self, timeout):
+        conn_class = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        return conn_class(self.hostname, self.port, timeout=timeout)
+
+    def acquire(self, timeout=None):
+        """Return an idle connection, or a fresh one if the pool is empty.
+
+        The second value is True when the connection was reused, so callers
+        know a failure may just mean the server closed it while idle.
+        """
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            return self._new_connection(timeout if timeout is not None else self.timeout), False
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout if timeout is not None else self.timeout)
+        return conn, True
+
+    def release(self, conn):
+        """Hand a connection back for reuse, closing it if the pool is full."""
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def discard(self, conn):
+        """Close a connection that is in an unknown state."""
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class Endpoint:
+    """One Ollama server: its connection pool plus routing and health state."""
+
+    def __init__(self, host: str, pool_size: int = POOL_SIZE, timeout=CONNECT_TIMEOUT):
+        self.pool = ConnectionPool(host, pool_size, timeout)
+        self.host = self.pool.host
+        self.outstanding = 0      # Requests currently running on this endpoint
+        self.served = 0
+        self.healthy = True
+        self.draining = False
+        self.failures = 0         # Consecutive failures
+        self.retry_at = 0.0
+        self.last_error = None
+
+
+class EndpointRouter:
+    """Sends each request to the healthy endpoint with the fewest outstanding requests.
+
+    A failing endpoint is marked down and drained: it gets no new requests,
+    requests already running on it finish normally, and its idle connections
+    are closed. After a back-off it receives a single trial request again.
+    """
+
+    def __init__(self, hosts: list, pool_size: int = POOL_SIZE, timeout=CONNECT_TIMEOUT):
+        self.endpoints = [Endpoint(h, pool_size, timeout) for h in hosts]
+        self._lock = threading.Lock()
+
+    def acquire(self, avoid=()):
+        """Pick and claim the least-loaded endpoint not in avoid (None if none left)."""
+        with self._lock:
+            now = time.monotonic()
+            fresh = [e for e in self.endpoints if e not in avoid and not e.draining]
+            if not fresh:
+                return None
+            # When every endpoint is down, still try the one that comes back first
+            ready = [e for e in fresh if e.healthy or now >= e.retry_at]
+            if ready:
+                endpoint = min(ready, key=lambda e: (e.outstanding, e.served))
+            else:
+                endpoint = min(fresh, key=lambda e: e.retry_at)
+            if not endpoint.healthy:
+                # Half-open: one trial request, everyone else waits for its outcome
+                endpoint.retry_at = now + self._backoff(endpoint)
+            endpoint.outstanding += 1
+            endpoint.served += 1
+            return endpoint
+
+    def claim(self, endpoint: Endpoint):
+        """Count a request that must go to one specific endpoint."""
+        with self._lock:
+            endpoint.outstanding += 1
+            endpoint.served += 1
+
+    def release(self, endpoint: Endpoint, error: Exception = None):
+        """Finish a request; a connection error marks the endpoint down."""
+        with self._lock:
+            endpoint.outstanding -= 1
+            if error is None:
+                endpoint.healthy = True
+                endpoint.failures = 0
+            else:
+                endpoint.healthy = False
+                endpoint.failures += 1
+                endpoint.last_error = error
+                endpoint.retry_at = time.monotonic() + self._backoff(endpoint)
+            close_idle = error is not None or (endpoint.draining and endpoint.outstanding == 0)
+        if close_idle:
+            endpoint.pool.close()
+
+    def _backoff(self, endpoint: Endpoint) -> float:
+        return min(RETRY_DOWN_AFTER * 2 ** max(endpoint.failures - 1, 0), MAX_RETRY_DOWN_AFTER)
+
+    def find(self, host: str) -> Endpoint:
+        host = normalize_host(host)
+        for endpoint in self.endpoints:
+            if endpoint.host == host:
+                return endpoint
+        raise KeyError(host)
+
+    def drain(self, host: str):
+        """Stop sending new requests to host; running ones finish first."""
+        endpoint = self.find(host)
+        with self._lock:
+            endpoint.draining = True
+            idle = endpoint.outstanding == 0
+        if idle:
+            endpoint.pool.close()
+
+    def restore(self, host: str):
+        """Put a drained or failed endpoint back into rotation."""
+        endpoint = self.find(host)
+        with self._lock:
+            endpoint.draining = False
+            endpoint.healthy = True
+            endpoint.failures = 0
+
+    def status(self) -> list:
+        with self._lock:
+            return [{
+                "host": e.host,
+                "healthy": e.healthy,
+                "draining": e.draining,
+                "outstanding": e.outstanding,
+                "served": e.served,
+                "failures": e.failures,
+                "last_error": str(e.last_error) if e.last_error else None,
+            } for e in self.endpoints]
+
+    def close(self):
+        for endpoint in self.endpoints:
+            endpoint.pool.close()
+
+
+class CircuitBreaker:
+    """Stops sending model calls to a backend that keeps failing.
+
+    Closed: calls go through. After `threshold` consecutive transient
+    failures the breaker opens and calls fail at once with CircuitOpenError,
+    so workers do not each wait out their own timeouts. After reset_after
+    seconds a single trial call is let through (half-open); its outcome
+    closes the breaker or opens it again.
+    """
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, reset_after: float = BREAKER_RESET_AFTER):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.state = "closed"
+        self.failures = 0
+        self.trips = 0
+        self.opened_at = 0.0
+        self._trial_at = 0.0
+        self._changed = threading.Condition()
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go to the backend now."""
+        with self._changed:
+            if self.state == "closed":
+                return
+            now = time.monotonic()
+            if self.state == "open" and now - self.opened_at >= self.reset_after:
+                self.state = "half-open"
+                self._trial_at = now
+                return
+            if self.state == "half-open" and now - self._trial_at >= self.reset_after:
+                self._trial_at = now   # The last trial never reported back
+                return
+            raise CircuitOpenError(
+                f"Model backend unavailable after {self.failures} consecutive failures; "
+                f"next attempt in {self.retry_in():.0f}s")
+
+    def record_success(self):
+        with self._changed:
+            self.state = "closed"
+            self.failures = 0
+            self._changed.notify_all()
+
+    def record_failure(self):
+        with self._changed:
+            self.failures += 1
+            if self.state == "half-open" or self.failures >= self.threshold:
+                if self.state != "open":
+                    self.trips += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def retry_in(self) -> float:
+        """Seconds until the next trial call is allowed (0 when closed)."""
+        if self.state == "closed":
+            return 0.0
+        since = self.opened_at if self.state == "open" else self._trial_at
+        return max(self.reset_after - (time.monotonic() - since), 0.0)
+
+    def wait_until_closed(self, timeout=None) -> bool:
+        """Block until a successful call closes the breaker; False on timeout."""
+        with self._changed:
+            return self._changed.wait_for(lambda: self.state == "closed", timeout)
+
+
+class _PendingRequest:
+    """Result slot shared by every caller waiting on the same in-flight request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        self.text = None
+        self.error = None
+        self._done = threading.Event()
+
+    def resolve(self, text: str):
+        self.text = text
+        self.elapsed = time.perf_counter() - self.started
+        self._done.set()
+
+    def fail(self, error: BaseException):
+        self.error = error
+        self.elapsed = time.perf_counter() - self.started
+        self._done.set()
+
+    def wait(self) -> str:
+        self._done.wait()
+        if isinstance(self.error, Exception):
+            raise self.error
+        if self.error is not None:
+            raise OllamaError("The shared request was interrupted")
+        return self.text
+
+
+class OllamaClient:
+    """Thin client for the Ollama `/api/*` endpoints with connection reuse and routing."""
+
+    def __init__(self, host: str = OLLAMA_HOST, model: str = OLLAMA_MODEL,
+                 pool_size: int = POOL_SIZE, timeout=CONNECT_TIMEOUT, cache: PromptCache = None,
+                 hosts: list = None, hedge: bool = HEDGE_REQUESTS, latency: LatencyTracker = None,
+                 metrics: MetricsSink = None, retries: int = RETRY_ATTEMPTS,
+                 breaker: CircuitBreaker = None, fixtures: FixtureArchive = None):
+        self.hosts = [normalize_host(h) for h in (hosts or [host])]
+        self.host = self.hosts[0]
+        self.model = model
+        self.router = EndpointRouter(self.hosts, pool_size, timeout)
+        self.cache = cache
+        self.hedge = hedge
+        self.latency = latency or LatencyTracker()
+        self.metrics = metrics
+        self.retries = max(1, retries)
+        self.breaker = breaker or CircuitBreaker()
+        self.fixtures = fixtures
+        self.hedging = {"sent": 0, "won": 0}
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self.coalescing = {"leaders": 0, "coalesced": 0, "saved_seconds": 0.0}
+
+    def _open(self, method: str, path: str, payload: dict = None, timeout=None,
+              endpoint: Endpoint = None, avoid: set = None):
+        """Send a request and return (connection, response, endpoint) with headers read.
+
+        Without an explicit endpoint the router picks the least-loaded one and
+        fails over to the next when it cannot be reached. The returned
+        endpoint must be handed back with self.router.release().
+        """
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        if endpoint is not None:
+            self.router.claim(endpoint)
+            try:
+                conn, response = self._send(endpoint, method, path, body, timeout)
+            except OllamaConnectionError as e:
+                self.router.release(endpoint, e)
+                raise
+            except BaseException:
+                self.router.release(endpoint)
+                raise
+            return conn, response, endpoint
+        avoid = avoid if avoid is not None else set()
+        error = None
+        while True:
+            endpoint = self.router.acquire(avoid)
+            if endpoint is None:
+                raise error or OllamaConnectionError("No Ollama endpoint available")
+            avoid.add(endpoint)
+            try:
+                conn, response = self._send(endpoint, method, path, body, timeout)
+            except OllamaConnectionError as e:
+                self.router.release(endpoint, e)
+                error = e
+                continue
+            except BaseException:
+                self.router.release(endpoint)
+                raise
+            return conn, response, endpoint
+
+    def _send(self, endpoint: Endpoint, method: str, path: str, body: bytes, timeout):
+        """One request on one endpoint.
+
+        A reused connection that turns out to be stale is retried once on a
+        fresh socket; any other failure is raised as an OllamaError.
+        """
+        pool = endpoint.pool
+        headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+        for _ in range(2):
+            conn, reused = pool.acquire(timeout)
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as e:
+                pool.discard(conn)
+                if reused:
+                    continue
+                raise OllamaConnectionError(f"Lost connection to Ollama at {pool.host}: {e}") from e
+            except TimeoutError as e:
+                pool.discard(conn)
+                raise OllamaTimeoutError(f"Ollama at {pool.host} did not answer in time") from e
+            except OSError as e:
+                pool.discard(conn)
+                raise OllamaConnectionError(f"Cannot reach Ollama at {pool.host}: {e}") from e
+            except BaseException:
+                pool.discard(conn)
+                raise
+            if response.status >= 400:
+                detail = response.read().decode("utf-8", "replace")
+                self._finish(conn, response, pool)
+                try:
+                    detail = json.loads(detail).get("error", detail)
+                except (ValueError, AttributeError):
+                    pass
+                raise OllamaError(f"Ollama returned HTTP {response.status}: {detail}",
+                                  status=response.status)
+            return conn, response
+        raise OllamaConnectionError(f"Cannot reach Ollama at {pool.host}")
+
+    def _finish(self, conn, response, pool):
+        """Return the connection to the pool only if the response was fully read."""
+        if response.isclosed() and not response.will_close:
+            pool.release(conn)
+        else:
+            pool.discard(conn)
+
+    def request_json(self, method: str, path: str, payload: dict = None, timeout=None,
+                     endpoint: Endpoint = None, avoid: set = None, timing: dict = None) -> dict:
+        """Perform a non-streaming request and decode the JSON reply."""
+        if self.fixtures is not None and self.fixtures.replaying:
+            return self._replay_json(method, path, payload)
+        conn, response, endpoint = self._open(method, path, payload, timeout, endpoint, avoid)
+        if timing is not None:
+            timing["endpoint"] = endpoint.host
+        pool = endpoint.pool
+        failure = None
+        try:
+            data = response.read()
+        except TimeoutError as e:
+            pool.discard(conn)
+            raise OllamaTimeoutError(f"Ollama at {pool.host} did not answer in time") from e
+        except (ConnectionError, http.client.IncompleteRead) as e:
+            pool.discard(conn)
+            failure = OllamaConnectionError(f"Lost connection to Ollama at {pool.host}: {e}")
+            raise failure from e
+        except BaseException:
+            pool.discard(conn)
+            raise
+        finally:
+            self.router.release(endpoint, failure)
+        self._finish(conn, response, pool)
+        try:
+            return json.loads(data.decode("utf-8")) if data else {}
+        except ValueError as e:
+            raise OllamaError(f"Invalid JSON from Ollama: {e}") from e
+
+    def _payload(self, prompt, model, options, system, stream, extra) -> dict:
+        payload = {"model": model or self.model, "prompt": prompt, "stream": stream}
+        if options:
+            payload["options"] = options
+        if system:
+            payload["system"] = system
+        payload.update(extra)
+        return payload
+
+    def stream(self, prompt: str, model: str = None, options: dict = None,
+               system: str = None, stop_when=None, timeout=None, on_done=None,
+               avoid: set = None, timing: dict = None, **extra):
+        """Yield response tokens from /api/generate as they arrive.
+
+        stop_when is a list of callables that receive the text generated so
+        far. As soon as one returns True the stream ends and the connection is
+        dropped, which makes Ollama cancel the rest of the generation. Closing
+        the generator early has the same effect.
+
+        on_done receives the final chunk (load_duration, eval_count, ...)
+        when the server finishes the reply; it is not called when stopped early.
+
+        timeout is a deadline for the whole reply, not just for each read.
+        A timing dict, if given, receives the endpoint, the time of the first
+        token, the number of chunks and the final chunk ("meta").
+        """
+        timing = timing if timing is not None else {}
+        deadline_at = time.perf_counter() + timeout if timeout else None
+        payload = self._payload(prompt, model, options, system, True, extra)
+        conn, response, endpoint = self._open("POST", "/api/generate", payload, timeout,
+                                              avoid=avoid)
+        pool = endpoint.pool
+        timing["endpoint"] = endpoint.host
+        timing["tokens"] = 0
+        text = ""
+        finished = False
+        failure = None
+        try:
+            for raw_line in response:
+                if deadline_at is not None:
+                    remaining = deadline_at - time.perf_counter()
+                    if remaining <= 0:
+                        raise OllamaTimeoutError(
+                            f"Ollama at {pool.host} did not finish within {timeout:.0f}s")
+                    conn.sock.settimeout(remaining)
+                line = raw_line.strip()
+                if not line:
+                    continue
+                chunk = json.loads(line.decode("utf-8"))
+                if chunk.get("error"):
+                    raise OllamaError(chunk["error"])
+                token = chunk.get("response", "")
+                if token:
+                    if not timing["tokens"]:
+                        timing["first_token"] = time.perf_counter()
+                    timing["tokens"] += 1
+                    text += token
+                    yield token
+                    if stop_when and any(condition(text) for condition in stop_when):
+                        return
+                if chunk.get("done"):
+                    timing["meta"] = chunk
+                    if on_done:
+                        on_done(chunk)
+                    break
+            # Drain anything left so the connection can be reused
+            response.read()
+            finished = True
+        except ValueError as e:
+            raise OllamaError(f"Invalid stream chunk from Ollama: {e}") from e
+        except TimeoutError as e:
+            raise OllamaTimeoutError(f"Ollama at {pool.host} stopped streaming") from e
+        except (ConnectionError, http.client.IncompleteRead) as e:
+            failure = OllamaConnectionError(f"Lost connection to Ollama at {pool.host}: {e}")
+            raise failure from e
+        finally:
+            if finished:
+                self._finish(conn, response, pool)
+            else:
+                pool.discard(conn)
+            self.router.release(endpoint, failure)
+
+    def generate(self, prompt: str, model: str = None, options: dict = None,
+                 system: str = None, on_token=None, stop_when=None, timeout=None,
+                 cache=True, on_done=None, deterministic=True, purpose: str = "generation",
+                 caller: str = None, retries: int = None, **extra) -> str:
+        """Run a prompt through /api/generate and return the response text.
+
+        If on_token is given, each chunk is passed to it as it arrives (useful
+        for echoing output to the terminal). stop_when and on_done work as in
+        stream(); on_done is not called for cached or coalesced answers.
+
+        When the client has a prompt cache, identical requests are answered
+        from disk. Pass cache=False for calls that must sample fresh output,
+        or cache="refresh" to skip the lookup but store the new answer.
+        Stop conditions are part of the key, so lambdas and closures bypass
+        the cache unless wrapped with named_condition().
+
+        Identical requests that are already in flight are coalesced: later
+        callers wait for the running generation and share its answer. Pass
+        deterministic=False when concurrent callers need separate samples;
+        cache=False implies it, since those calls sample fresh output too.
+
+        Without an explicit timeout the deadline comes from the rolling p99
+        latency of earlier calls with the same purpose. With several backends
+        a duplicate is sent to a second one once the call outlives the p95;
+        whichever answers first wins and the other is cancelled.
+
+        Every call is recorded in the metrics sink, tagged with purpose and
+        caller (by default the script and function that made the call).
+
+        Lost connections and 5xx/429 replies are retried up to `retries`
+        times (default RETRY_ATTEMPTS) with jittered exponential backoff,
+        unless tokens were already passed to on_token. Failures raise an
+        OllamaError subclass; while the circuit breaker is open calls fail
+        fast with CircuitOpenError.
+
+        With a fixture archive in record mode every answer is generated live
+        (skipping the cache lookup) and captured with its timing; in replay mode answers come from the
+        archive (FixtureMissError if absent) and no backend is contacted.
+        """
+        started = time.perf_counter()
+        caller = caller or caller_name()
+        model = model or self.model
+        stop_names = [_condition_name(c) for c in stop_when] if stop_when else None
+        # An unnamed condition could truncate differently under the same key
+        anonymous = stop_names is not None and None in stop_names
+        # keep_alive only affects residency, not the answer
+        params = {k: v for k, v in extra.items() if k != "keep_alive"}
+        key = make_cache_key(model, prompt, system=system, options=options,
+                             stop_when=stop_names, **params)
+        if self.fixtures is not None and self.fixtures.replaying:
+            return self._replay(key, model, purpose, caller, on_token, on_done, started)
+        take = None
+        if self.fixtures is not None and self.fixtures.recording:
+            take = Take()
+            on_token, on_done = take.wrap_token(on_token), take.wrap_done(on_done)
+        use_cache = self.cache is not None and cache and not anonymous
+        # While recording, cached answers are regenerated so the archive holds real timings
+        if use_cache and cache != "refresh" and take is None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self._record(model, purpose, caller, "cache", started)
+                if on_token:
+                    on_token(cached)
+                return cached
+
+        if not deterministic or cache is False or anonymous:
+            text = self._retrying_generate(prompt, model, options, system, on_token, stop_when,
+                                           timeout, on_done, purpose, caller, extra, retries)
+        else:
+            with self._inflight_lock:
+                pending = self._inflight.get(key)
+                leader = pending is None
+                if leader:
+                    pending = self._inflight[key] = _PendingRequest()
+            if not leader:
+                try:
+                    text = pending.wait()
+                except Exception as e:
+                    self._record(model, purpose, caller, "coalesced", started, error=e)
+                    raise
+                self._record(model, purpose, caller, "coalesced", started)
+                with self._inflight_lock:
+                    self.coalescing["coalesced"] += 1
+                    self.coalescing["saved_seconds"] += pending.elapsed
+                if on_token:
+                    on_token(text)
+                return text
+            try:
+                text = self._retrying_generate(prompt, model, options, system, on_token, stop_when,
+                                               timeout, on_done, purpose, caller, extra, retries)
+                pending.resolve(text)
+            except BaseException as e:
+                pending.fail(e)
+                raise
+            finally:
+                with self._inflight_lock:
+                    self._inflight.pop(key, None)
+                    self.coalescing["leaders"] += 1
+
+        if take is not None:
+            self.fixtures.record(key, model, purpose, prompt, text, take)
+        if use_cache:
+            self.cache.put(key, text, model)
+        return text
+
+    def _replay(self, key, model, purpose, caller, on_token, on_done, started) -> str:
+        record = self.fixtures.lookup(key)
+        if record is None:
+            error = FixtureMissError(f"No recorded {model} answer for this prompt in {self.fixtures.path}")
+            self._record(model, purpose, caller, "replay", started, error=error)
+            raise error
+        text = self.fixtures.play(record, on_token)
+        if on_done and record.get("meta"):
+            on_done(dict(record["meta"]))
+        self._record(model, purpose, caller, "replay", started)
+        return text
+
+    def _replay_json(self, method, path, payload) -> dict:
+        """Answer the non-generating calls scripts make at start-up while replaying."""
+        if path == "/api/tags":
+            return {"models": [{"name": model} for model in self.fixtures.models()]}
+        if path == "/api/generate" and not (payload or {}).get("prompt"):
+            # Model load/unload requests
+            return {"model": (payload or {}).get("model"), "response": "", "done": True}
+        raise FixtureMissError(f"{method} {path} is not available while replaying fixtures")
+
+    def _retrying_generate(self, prompt, model, options, system, on_token, stop_when, timeout,
+                           on_done, purpose, caller, extra, retries) -> str:
+        """_timed_generate behind the circuit breaker, retrying transient failures."""
+        attempts = self.retries if retries is None else max(1, retries)
+        streamed = []
+
+        def relay(token):
+            streamed.append(True)
+            on_token(token)
+
+        attempt = 0
+        while True:
+            attempt += 1
+            self.breaker.before_call()
+            try:
+                text = self._timed_generate(prompt, model, options, system,
+                                            relay if on_token is not None else None, stop_when,
+                                            timeout, on_done, purpose, caller, extra)
+            except Exception as e:
+                if not (is_transient(e) or isinstance(e, OllamaTimeoutError)):
+                    # The backend answered; the request itself was at fault
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if self.breaker.state == "open":
+                    raise CircuitOpenError(f"Model backend unavailable: {e}") from e
+                # Never retry once the caller has shown part of an answer
+                if not is_transient(e) or streamed or attempt >= attempts:
+                    raise
+                time.sleep(backoff_delay(attempt))
+                continue
+            self.breaker.record_success()
+            return text
+
+    def _timed_generate(self, prompt, model, options, system, on_token, stop_when, timeout,
+                        on_done, purpose, caller, extra) -> str:
+        """Apply the adaptive deadline, hedge if possible and record latency and telemetry."""
+        deadline = timeout if timeout is not None else self.latency.deadline(purpose)
+        hedge_after = None
+        if self.hedge and len(self.router.endpoints) > 1 and on_token is None:
+            hedge_after = self.latency.hedge_after(purpose)
+        timing = {}
+        started = time.perf_counter()
+        try:
+            if hedge_after is None:
+                text = self._generate(prompt, model, options, system, on_token, stop_when,
+                                      deadline, on_done, extra, timing=timing)
+            else:
+                text = self._hedged_generate(prompt, model, options, system, stop_when, deadline,
+                                             on_done, hedge_after, extra, timing)
+        except Exception as e:
+            if isinstance(e, OllamaTimeoutError):
+                # Timeouts count too, so a purpose that keeps timing out gets a longer deadline
+                self.latency.record(purpose, time.perf_counter() - started)
+            self._record(model, purpose, caller, "model", started, timing, e)
+            raise
+        self.latency.record(purpose, time.perf_counter() - started)
+        self._record(model, purpose, caller, "model", started, timing)
+        return text
+
+    def _record(self, model, purpose, caller, source, started, timing=None, error=None):
+        if self.metrics is None:
+            return
+        entry = build_entry(model, purpose, caller, source, started, time.perf_counter(),
+                            timing, error)
+        try:
+            self.metrics.record(entry)
+        except OSError:
+            pass  # Telemetry must never break a model call
+
+    def _hedged_generate(self, prompt, model, options, system, stop_when, deadline,
+                         on_done, hedge_after, extra, timing) -> str:
+        """Race the primary endpoint against a duplicate sent after hedge_after seconds."""
+        cancelled = threading.Event()
+        used = set()   # Shared, so the duplicate avoids the endpoint the first attempt took
+        results = queue.Queue()
+        done_lock = threading.Lock()
+        stops = list(stop_when or []) + [lambda text: cancelled.is_set()]
+
+        def first_done(meta):
+            with done_lock:
+                if on_done and not cancelled.is_set():
+                    on_done(meta)
+
+        def attempt(index):
+            attempt_timing = {}
+            try:
+                text = self._generate(prompt, model, options, system, None, stops, deadline,
+                                      first_done, extra, used, attempt_timing)
+                results.put((index, text, None, attempt_timing))
+            except Exception as e:
+                results.put((index, None, e, attempt_timing))
+
+        threading.Thread(target=attempt, args=(0,), daemon=True).start()
+        outstanding, hedged, error = 1, False, None
+        while outstanding:
+            try:
+                index, text, failure, attempt_timing = results.get(
+                    timeout=None if hedged else hedge_after)
+            except queue.Empty:
+                hedged = True
+                outstanding += 1
+                with done_lock:
+                    self.hedging["sent"] += 1
+                threading.Thread(target=attempt, args=(1,), daemon=True).start()
+                continue
+            outstanding -= 1
+            if failure is None:
+                with done_lock:
+                    cancelled.set()
+                    if index:
+                        self.hedging["won"] += 1
+                timing.update(attempt_timing)
+                return text
+            error = error or failure
+            hedged = True  # No point hedging once the primary has already failed
+        raise error
+
+    def _generate(self, prompt, model, options, system, on_token, stop_when, timeout,
+                  on_done, extra, avoid=None, timing=None) -> str:
+        if on_token is None and not stop_when:
+            payload = self._payload(prompt, model, options, system, False, extra)
+            data = self.request_json("POST", "/api/generate", payload, timeout, avoid=avoid,
+                                     timing=timing)
+            if data.get("error"):
+                raise OllamaError(data["error"])
+            if timing is not None:
+                timing["meta"] = data
+            if on_done:
+                on_done(data)
+            return data.get("response", "")
+        parts = []
+        for token in self.stream(prompt, model, options, system, stop_when, timeout,
+                                 on_done, avoid, timing, **extra):
+            parts.append(token)
+            if on_token:
+                on_token(token)
+        return "".join(parts)
+
+    def coalescing_report(self) -> str:
+        """One-line summary of how many duplicate in-flight requests were merged."""
+        with self._inflight_lock:
+            stats = dict(self.coalescing)
+        return (f"🔗 Coalesced {stats['coalesced']} duplicate model requests into "
+                f"{stats['leaders']} generations, saving ~{stats['saved_seconds']:.1f}s of model time")
+
+    def cache_report(self) -> str:
+        """One-line summary of prompt cache hits and misses for this process."""
+        if self.cache is None:
+            return "📦 Prompt cache disabled"
+        return self.cache.report()
+
+    def list_models(self) -> list:
+        """Return the names of models installed on the server."""
+        data = self.request_json("GET", "/api/tags")
+        return [m.get("name") for m in data.get("models", [])]
+
+    def check_health(self) -> list:
+        """Probe every endpoint with /api/tags, updating and returning router status."""
+        for endpoint in self.router.endpoints:
+            try:
+                self.request_json("GET", "/api/tags", timeout=HEALTH_TIMEOUT, endpoint=endpoint)
+            except OllamaError:
+                pass
+        return self.router.status()
+
+    def close(self):
+        if self.fixtures is not None:
+            self.fixtures.save()
+        self.router.close()
+
+
+def named_condition(condition, name: str):
+    """Give a lambda or closure stop condition a stable name so its answers can be cached."""
+    condition.stop_name = name
+    return condition
+
+
+def _condition_name(condition) -> str:
+    """Stable name for a stop condition so it can be part of a cache key.
+
+    Returns None for lambdas and closures without an explicit name, since
+    their repr() changes between processes and objects.
+    """
+    explicit = getattr(condition, "stop_name", None)
+    if explicit:
+        return explicit
+    name = getattr(condition, "__qualname__", None)
+    if not name or "<lambda>" in name or "<locals>" in name:
+        return None
+    return f"{condition.__module__}.{name}"
+
+
+_default_client = None
+_default_lock = threading.Lock()
+_pause_lock = threading.Lock()
+
+
+def _close_fixtures(fixtures: FixtureArchive):
+    fixtures.save()
+    print(fixtures.report())
+
+
+def get_client() -> OllamaClient:
+    """Return the process-wide shared client, creating it on first use."""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            cache = PromptCache(PROMPT_CACHE_PATH) if PROMPT_CACHE_PATH else None
+            metrics = MetricsSink(METRICS_PATH) if METRICS_PATH else None
+            fixtures = FixtureArchive(FIXTURE_PATH, FIXTURE_MODE, REPLAY_SPEED) if FIXTURE_PATH else None
+            if fixtures is not None:
+                atexit.register(_close_fixtures, fixtures)
+            _default_client = OllamaClient(cache=cache, hosts=[OLLAMA_HOST] + OLLAMA_HOSTS,
+                                           metrics=metrics, fixtures=fixtures)
+        return _default_client
+
+
+def use_client(client: OllamaClient) -> OllamaClient:
+    """Replace the process-wide client (e.g. to point every script at a test server).
+
+    Returns the previous client (None if none was created yet) so it can be restored.
+    """
+    global _default_client
+    with _default_lock:
+        previous, _default_client = _default_client, client
+    return previous
+
+
+def generate(prompt: str, **kwargs) -> str:
+    """Shortcut for get_client().generate(...)."""
+    return get_client().generate(prompt, **kwargs)
+
+
+def stream(prompt: str, **kwargs):
+    """Shortcut for get_client().stream(...)."""
+    return get_client().stream(prompt, **kwargs)
+
+
+def wait_until_available(max_wait: float = PAUSE_MAX_SECONDS, poll: float = None) -> bool:
+    """Block while the model backend is down; True once it answers again.
+
+    Batch scripts call this to pause instead of producing placeholder
+    output. Endpoints are probed every `poll` seconds (default: the breaker
+    reset time); a successful probe closes the breaker.
+    """
+    client = get_client()
+    poll = poll if poll is not None else client.breaker.reset_after
+    deadline = time.monotonic() + max_wait
+    with _pause_lock:
+        while True:
+            if client.breaker.state == "closed" and client.breaker.failures == 0:
+                return True   # Another worker already saw it recover
+            if any(status["healthy"] for status in client.check_health()):
+                client.breaker.record_success()
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(poll, remaining))
+
+
+def generate_when_available(prompt: str, on_pause=None, max_wait: float = PAUSE_MAX_SECONDS,
+                            **kwargs) -> str:
+    """generate() that pauses the calling batch while the backend is unreachable.
+
+    on_pause(error) is called before each pause. If the backend does not
+    come back within max_wait seconds the last error is raised.
+    """
+    while True:
+        try:
+            return generate(prompt, **kwargs)
+        except OllamaConnectionError as e:
+            if on_pause:
+                on_pause(e)
+            if not wait_until_available(max_wait):
+                raise
+
+
+def code_block_closed(text: str) -> bool:
+    """Stop condition: True once the first ``` fenced block has been closed."""
+    opening = text.find("```")
+    if opening == -1:
+        return False
+    body_start = text.find("\n", opening)
+    return body_start != -1 and text.find("```", body_start) != -1
+
+
+def main():
+    client = get_client()
+    print(f"🔎 Probing {len(client.hosts)} Ollama endpoint(s)...")
+    for status in client.check_health():
+        state = "✓ up" if status["healthy"] else f"❌ down ({status['last_error']})"
+        print(f"  {status['host']}: {state}")
+    sys.exit(0 if any(status["healthy"] for status in client.router.status()) else 1)
+
+
+if __name__ == "__main__":
+    main()
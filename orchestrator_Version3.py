@@ -1,21 +1,15 @@
 import subprocess
 import os
-import shlex
+
+import model_lifecycle
+from ollama_client import OllamaError
 
 def run_mixtral(prompt):
     """Send prompt to Mixtral model via Ollama and return response."""
-    cmd = "ollama run mixtral:8x7b-instruct-v0.1-q6_K"
-    process = subprocess.Popen(
-        shlex.split(cmd),
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True
-    )
-    out, err = process.communicate(prompt)
-    if err:
-        return out.strip() + "\n[stderr: " + err.strip() + "]"
-    return out.strip()
+    try:
+        return model_lifecycle.generate(prompt, model="mixtral:8x7b-instruct-v0.1-q6_K").strip()
+    except OllamaError as e:
+        return "[model error: " + str(e) + "]"
 
 def write_file(filename, content):
     """Write content to filename."""
@@ -61,12 +55,14 @@ def fix_file(filename, error_message):
         print("[!] Model did not return a fix.")
 
 def main():
+    model_lifecycle.preload("mixtral:8x7b-instruct-v0.1-q6_K")  # Load the model while the prompt comes up
     print("== Local Orchestrator Agent ==")
     print("Type 'exit' to quit.")
     cwd = os.getcwd()
     while True:
         user = input(f"{cwd}> ").strip()
         if user.lower() in ("exit", "quit"):
+            print(model_lifecycle.report("mixtral:8x7b-instruct-v0.1-q6_K"))
             break
 
         if user.startswith("write "):
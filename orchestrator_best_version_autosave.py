@@ -1,10 +1,11 @@
 import subprocess
 import os
-import threading
-import time
-import sys
 import re
 
+import model_lifecycle
+import model_stream
+from ollama_client import OllamaError
+
 project_context = """
 PROJECT GOAL: Build a Python CLI tool for generating images using Stable Diffusion.
 CONSTRAINTS: Use only diffusers+torch. Modular code. User-friendly CLI interface. All code must be valid Python.
@@ -48,55 +49,16 @@ def run_mixtral(user_command):
         f"USER COMMAND: {user_command}\n"
         "REMINDER: Do not deviate from the project goal and constraints. On pain of death, do not output anything but actionable code or direct answers that move the project forward."
     )
-    cmd = ["ollama", "run", "mixtral:8x7b-instruct-v0.1-q6_K"]
     try:
-        process = subprocess.Popen(
-            cmd,
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
-        )
-        process.stdin.write(full_prompt + "\n")
-        process.stdin.close()
-
-        output_lines = []
-        error_lines = []
-        last_output_time = time.time()
-        thinking_notified = False
-
-        def read_stream(stream, lines, name):
-            for line in stream:
-                lines.append(line)
-                if name == "stdout":
-                    sys.stdout.write(line)
-                    sys.stdout.flush()
-            stream.close()
-
-        t_out = threading.Thread(target=read_stream, args=(process.stdout, output_lines, "stdout"))
-        t_err = threading.Thread(target=read_stream, args=(process.stderr, error_lines, "stderr"))
-        t_out.start()
-        t_err.start()
-
-        while process.poll() is None:
-            if not output_lines and not thinking_notified and (time.time() - last_output_time) > 3:
-                print("[.] Model is thinking…")
-                thinking_notified = True
-            time.sleep(0.2)
-
-        t_out.join()
-        t_err.join()
-
-        out_str = "".join(output_lines)
-        err_str = "".join(error_lines)
+        out_str = model_stream.stream_model(model_lifecycle.generate, full_prompt, model="mixtral:8x7b-instruct-v0.1-q6_K")
         # Automatically parse and save code blocks as files!
         parse_and_store_all_blocks(out_str)
-        if process.returncode != 0 or err_str:
-            print(f"[!] Model error: {err_str.strip()}")
-            return ""
         return out_str.strip()
 
+    except OllamaError as e:
+        print(f"[!] Model error: {e}")
+        return ""
+
     except Exception as e:
         print(f"[!] Unexpected model error: {e}")
         return ""
@@ -139,12 +101,14 @@ def run_file(filename, max_retries=3):
 
 def main():
     global project_context
+    model_lifecycle.preload("mixtral:8x7b-instruct-v0.1-q6_K")  # Load the model while the prompt comes up
     print("== Unbreakable Project Orchestrator with Autosave ==")
     print("Type 'exit' to quit. Type 'context' to view/edit the current project context.")
     cwd = os.getcwd()
     while True:
         user = input(f"{cwd}> ").strip()
         if user.lower() in ("exit", "quit"):
+            print(model_lifecycle.report("mixtral:8x7b-instruct-v0.1-q6_K"))
             break
 
         if user.startswith("context"):
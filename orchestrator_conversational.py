@@ -1,58 +1,19 @@
 import subprocess
 import os
-import threading
-import time
-import sys
+
+import model_lifecycle
+import model_stream
+from ollama_client import OllamaError
 
 def run_mixtral(prompt):
-    cmd = ["ollama", "run", "mixtral:8x7b-instruct-v0.1-q6_K"]
     try:
-        process = subprocess.Popen(
-            cmd,
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
-        )
-        # Send prompt, close stdin to signal EOF
-        process.stdin.write(prompt + "\n")
-        process.stdin.close()
-
-        output_lines = []
-        error_lines = []
-        last_output_time = time.time()
-        thinking_notified = False
-
-        def read_stream(stream, lines, name):
-            for line in stream:
-                lines.append(line)
-                if name == "stdout":
-                    sys.stdout.write(line)
-                    sys.stdout.flush()
-            stream.close()
-
-        t_out = threading.Thread(target=read_stream, args=(process.stdout, output_lines, "stdout"))
-        t_err = threading.Thread(target=read_stream, args=(process.stderr, error_lines, "stderr"))
-        t_out.start()
-        t_err.start()
-
-        while process.poll() is None:
-            if not output_lines and not thinking_notified and (time.time() - last_output_time) > 3:
-                print("[.] Model is thinking…")
-                thinking_notified = True
-            time.sleep(0.2)
-
-        t_out.join()
-        t_err.join()
-
-        out_str = "".join(output_lines)
-        err_str = "".join(error_lines)
-        if process.returncode != 0 or err_str:
-            print(f"[!] Model error: {err_str.strip()}")
-            return ""
+        out_str = model_stream.stream_model(model_lifecycle.generate, prompt, model="mixtral:8x7b-instruct-v0.1-q6_K")
         return out_str.strip()
 
+    except OllamaError as e:
+        print(f"[!] Model error: {e}")
+        return ""
+
     except Exception as e:
         print(f"[!] Unexpected model error: {e}")
         return ""
@@ -81,12 +42,14 @@ def run_file(filename):
         return "", str(e)
 
 def main():
+    model_lifecycle.preload("mixtral:8x7b-instruct-v0.1-q6_K")  # Load the model while the prompt comes up
     print("== Conversational Orchestrator ==")
     print("Type 'exit' to quit. Type 'run filename.py' or 'write filename.py: code prompt' or just chat with the model.")
     cwd = os.getcwd()
     while True:
         user = input(f"{cwd}> ").strip()
         if user.lower() in ("exit", "quit"):
+            print(model_lifecycle.report("mixtral:8x7b-instruct-v0.1-q6_K"))
             break
 
         if user.startswith("write "):
@@ -1,74 +1,48 @@
 import subprocess
 import os
-import threading
-import time
-import sys
 import re
 
+import model_lifecycle
+import model_stream
+import model_routing
+import model_session
+import orchestrator_protocol
+from ollama_client import OllamaError
+
 project_context = """
 PROJECT GOAL: Build a general-purpose Python CLI assistant that helps you generate, view, run, and fix Python scripts and files using a local AI model.
 CONSTRAINTS: Output only valid Python code for scripts. Use protocol markers: code in triple backticks, logs in <LOG>...</LOG>, errors in <ERROR>...</ERROR>. Never explain unless asked.
 NOTES: The user may request anything, not just diffusion. Always follow protocol and autosave outputs.
 """
 
-def run_mixtral(user_command):
-    full_prompt = (
-        f"{project_context}\n"
-        f"USER COMMAND: {user_command}\n"
-        "REMINDER: Do not deviate from the project goal and constraints. Only output actionable code or direct answers that move the project forward."
-    )
-    cmd = ["ollama", "run", "mixtral:8x7b-instruct-v0.1-q6_K"]
-    try:
-        process = subprocess.Popen(
-            cmd,
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
-        )
-        process.stdin.write(full_prompt + "\n")
-        process.stdin.close()
-
-        output_lines = []
-        error_lines = []
-        last_output_time = time.time()
-        thinking_notified = False
-
-        def read_stream(stream, lines, name):
-            for line in stream:
-                lines.append(line)
-                if name == "stdout":
-                    sys.stdout.write(line)
-                    sys.stdout.flush()
-            stream.close()
-
-        t_out = threading.Thread(target=read_stream, args=(process.stdout, output_lines, "stdout"))
-        t_err = threading.Thread(target=read_stream, args=(process.stderr, error_lines, "stderr"))
-        t_out.start()
-        t_err.start()
-
-        while process.poll() is None:
-            if not output_lines and not thinking_notified and (time.time() - last_output_time) > 3:
-                print("[.] Model is thinking…")
-                thinking_notified = True
-            time.sleep(0.2)
+SESSION_REMINDER = "REMINDER: Do not deviate from the project goal and constraints. Only output actionable code or direct answers that move the project forward."
+session = model_session.ModelSession("mixtral:8x7b-instruct-v0.1-q6_K")
 
-        t_out.join()
-        t_err.join()
-
-        out_str = "".join(output_lines)
-        err_str = "".join(error_lines)
-        if process.returncode != 0 or err_str:
-            print(f"[!] Model error: {err_str.strip()}")
-            return ""
+def run_mixtral(user_command, purpose="generation", structured=True):
+    # The project context goes out once as the system prompt; later turns continue
+    # from the session's returned context instead of re-sending it every time
+    system = f"{project_context}\n{SESSION_REMINDER}"
+    # Structured turns ask for schema-checked JSON instead of tags and code fences
+    command = orchestrator_protocol.with_instructions(user_command) if structured else user_command
+    extra = orchestrator_protocol.request_options() if structured else {}
+    try:
+        out_str = model_stream.stream_model(session.generate, f"USER COMMAND: {command}", system=system,
+                                            purpose=purpose, **extra)
         return out_str.strip()
 
+    except OllamaError as e:
+        print(f"[!] Model error: {e}")
+        return ""
+
     except Exception as e:
         print(f"[!] Unexpected model error: {e}")
         return ""
 
 def parse_model_output(output):
+    structured = orchestrator_protocol.parse_structured_output(output)
+    if structured is not None:
+        return structured
+    # Fallback: the tag/code-fence protocol
     code_blocks = re.findall(r"```(?:python)?\n(.*?)```", output, re.DOTALL)
     logs = re.findall(r"<LOG>(.*?)</LOG>", output, re.DOTALL)
     errors = re.findall(r"<ERROR>(.*?)</ERROR>", output, re.DOTALL)
@@ -83,8 +57,18 @@ def clarify_output(output):
         f"Clarify and reformat the following output per protocol (code in triple backticks, logs in <LOG>, errors in <ERROR>):\n{output}\n"
         "Only output using the correct protocol tags."
     )
-    clarified = run_mixtral(clarification_prompt)
-    return clarified
+    orchestrator_protocol.note_clarification()
+    # Reformatting is routed to the small model, outside the conversation session;
+    # the main model only takes over if the reply still lacks protocol markers
+    try:
+        clarified = model_stream.stream_model(
+            model_routing.generate, clarification_prompt, purpose="clarification",
+            accept=orchestrator_protocol.follows_tag_protocol,
+            big_model="mixtral:8x7b-instruct-v0.1-q6_K")
+    except OllamaError as e:
+        print(f"[!] Model error: {e}")
+        return ""
+    return clarified.strip()
 
 def write_file(filename, content):
     folder = os.path.dirname(filename)
@@ -137,12 +121,16 @@ def run_file(filename, max_retries=3):
 
 def main():
     global project_context
+    model_lifecycle.preload("mixtral:8x7b-instruct-v0.1-q6_K")  # Load the model while the prompt comes up
     print("== General-purpose Python CLI Orchestrator ==")
     print("Type 'exit' to quit. Type 'context' to view/edit the current project context.")
     cwd = os.getcwd()
     while True:
         user = input(f"{cwd}> ").strip()
         if user.lower() in ("exit", "quit"):
+            print(model_lifecycle.report("mixtral:8x7b-instruct-v0.1-q6_K"))
+            print(orchestrator_protocol.report())
+            print(model_routing.get_router("mixtral:8x7b-instruct-v0.1-q6_K").report())
             break
 
         if user.startswith("context"):
@@ -158,6 +146,7 @@ def main():
                         break
                     lines.append(line)
                 project_context = "\n".join(lines)
+                session.reset()
                 print("Context updated.")
             continue
 
@@ -1,12 +1,17 @@
 import subprocess
 import os
-import threading
 import time
 import sys
 import shutil
 import json
 import platform
 
+import model_lifecycle
+import model_stream
+import model_session
+from ollama_client import OllamaError
+from prompt_budget import build_prompt, describe, fit_history
+
 # == Configurable parameters ==
 MAX_RETRIES = 3
 STRICT_CODE_ONLY = True
@@ -30,7 +35,22 @@ def log(msg):
         f.write(f"{timestamp} {msg}\n")
     print(f"{timestamp} {msg}")
 
+def trim_history():
+    """Keep command_history within the history token budget, oldest commands
+    folded into a single summary entry."""
+    global command_history
+    # An earlier summary is replaced, not summarised again; its count carries over
+    earlier = [entry for entry in command_history if entry.get("summary")]
+    commands = [entry for entry in command_history if not entry.get("summary")]
+    omitted = sum(entry.get("omitted", 0) for entry in earlier)
+    kept, summary = fit_history(commands, render=lambda entry: entry.get("cmd", ""), omitted=omitted)
+    if summary:
+        command_history = [{"timestamp": kept[0]["timestamp"] if kept else time.time(),
+                            "cmd": summary, "summary": True,
+                            "omitted": omitted + len(commands) - len(kept)}] + kept
+
 def save_context():
+    trim_history()
     data = {
         "project_context": project_context,
         "command_history": command_history
@@ -46,6 +66,7 @@ def load_context():
             data = json.load(f)
             project_context = data.get("project_context", project_context)
             command_history = data.get("command_history", [])
+        trim_history()
         log("Project context and history loaded.")
     else:
         log("No saved context found.")
@@ -116,59 +137,26 @@ def validate_code(code, required_terms=None):
                     return False
     return True
 
+SESSION_REMINDER = "REMINDER: Do not deviate from the project goal and constraints. Output ONLY code unless specifically asked otherwise."
+session = model_session.ModelSession("mixtral:8x7b-instruct-v0.1-q6_K")
+
 def run_mixtral(user_command):
-    full_prompt = (
-        f"{project_context}\n"
-        f"USER COMMAND: {user_command}\n"
-        "REMINDER: Do not deviate from the project goal and constraints. Output ONLY code unless specifically asked otherwise."
-    )
-    cmd = ["ollama", "run", "mixtral:8x7b-instruct-v0.1-q6_K"]
+    # The project context goes out once as the system prompt; later turns continue
+    # from the session's returned context instead of re-sending it every time.
+    # An edited context can be any size, so it is held to the system prompt budget.
+    system, report = build_prompt([("project context", project_context, None),
+                                   ("reminder", SESSION_REMINDER, None)],
+                                  purpose="system", separator="\n")
+    if report["truncated"]:
+        log(describe(report))
     try:
-        process = subprocess.Popen(
-            cmd,
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
-        )
-        process.stdin.write(full_prompt + "\n")
-        process.stdin.close()
-
-        output_lines = []
-        error_lines = []
-        last_output_time = time.time()
-        thinking_notified = False
-
-        def read_stream(stream, lines, name):
-            for line in stream:
-                lines.append(line)
-                if name == "stdout":
-                    sys.stdout.write(line)
-                    sys.stdout.flush()
-            stream.close()
-
-        t_out = threading.Thread(target=read_stream, args=(process.stdout, output_lines, "stdout"))
-        t_err = threading.Thread(target=read_stream, args=(process.stderr, error_lines, "stderr"))
-        t_out.start()
-        t_err.start()
-
-        while process.poll() is None:
-            if not output_lines and not thinking_notified and (time.time() - last_output_time) > 3:
-                print("[.] Model is thinking…")
-                thinking_notified = True
-            time.sleep(0.2)
-
-        t_out.join()
-        t_err.join()
-
-        out_str = "".join(output_lines)
-        err_str = "".join(error_lines)
-        if process.returncode != 0 or err_str:
-            log(f"Model error: {err_str.strip()}")
-            return ""
+        out_str = model_stream.stream_model(session.generate, f"USER COMMAND: {user_command}", system=system)
         return out_str.strip()
 
+    except OllamaError as e:
+        log(f"Model error: {e}")
+        return ""
+
     except Exception as e:
         log(f"Unexpected model error: {e}")
         return ""
@@ -244,6 +232,7 @@ def run_file(filename, max_retries=MAX_RETRIES):
 
 def main():
     global project_context, command_history
+    model_lifecycle.preload("mixtral:8x7b-instruct-v0.1-q6_K")  # Load the model while the prompt comes up
     print("== Unbreakable Project Orchestrator (Perfect Edition) ==")
     print("Type 'exit' to quit. Type 'context' to view/edit/save/load project context.")
     print("Type 'list' for pretty file list, 'tree' for folder tree, 'env' for environment checks, 'tests' for test summary.")
@@ -253,7 +242,9 @@ def main():
     while True:
         user = input(f"{cwd}> ").strip()
         command_history.append({"timestamp": time.time(), "cmd": user})
+        trim_history()
         if user.lower() in ("exit", "quit"):
+            print(model_lifecycle.report("mixtral:8x7b-instruct-v0.1-q6_K"))
             save_context()
             break
         if user.startswith("context"):
@@ -269,6 +260,7 @@ def main():
                         break
                     lines.append(line)
                 project_context = "\n".join(lines)
+                session.reset()
                 print("Context updated.")
             elif action == "save":
                 save_context()
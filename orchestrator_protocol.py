@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Structured Orchestrator Output
+Asks the model to answer orchestrator commands as JSON matching a fixed schema
+({filename, files[], logs[], errors[]}) and validates the reply, so scripts no
+longer need a second "clarify" generation when the tag/code-fence protocol was
+not followed. The regex protocol stays in each orchestrator as a fallback.
+"""
+
+import json
+import re
+import threading
+
+# ==================== PROTOCOL CONFIGURATION ====================
+USE_JSON_OUTPUT = True   # Request JSON replies; False keeps the plain tag/code-fence protocol
+USE_JSON_SCHEMA = True   # Send the JSON schema as `format` (Ollama 0.5+); False sends "json"
+# ================================================================
+
+OUTPUT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "filename": {"type": "string"},
+        "files": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "filename": {"type": "string"},
+                    "content": {"type": "string"},
+                },
+                "required": ["filename", "content"],
+            },
+        },
+        "logs": {"type": "array", "items": {"type": "string"}},
+        "errors": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["filename", "files", "logs", "errors"],
+}
+
+OUTPUT_INSTRUCTIONS = (
+    "Respond with JSON only, in the form "
+    '{"filename": "<main file, or empty>", '
+    '"files": [{"filename": "<path>", "content": "<complete file contents, no code fences>"}], '
+    '"logs": ["..."], "errors": ["..."]}. Use empty lists for anything not needed.'
+)
+
+_TAG_MARKERS = re.compile(r"```|<LOG>|<ERROR>")
+_FENCE = re.compile(r"^\s*```[\w+-]*\s*\n(.*?)\n?```\s*$", re.DOTALL)
+
+stats = {"structured": 0, "fallback": 0, "clarified": 0}
+_stats_lock = threading.Lock()
+
+
+def response_format():
+    """Value for the `format` option of a generate call."""
+    return OUTPUT_SCHEMA if USE_JSON_SCHEMA else "json"
+
+
+def request_options() -> dict:
+    """Extra generate() keyword arguments for a structured reply ({} when disabled)."""
+    return {"format": response_format()} if USE_JSON_OUTPUT else {}
+
+
+def with_instructions(command: str) -> str:
+    """Append the JSON reply instructions to a user command when enabled."""
+    return f"{command}\n{OUTPUT_INSTRUCTIONS}" if USE_JSON_OUTPUT else command
+
+
+def _strings(data: dict, key: str) -> list:
+    value = data.get(key, [])
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise ValueError(f"'{key}' must be a list of strings")
+    return [v.strip() for v in value if v.strip()]
+
+
+def _unfence(content: str) -> str:
+    # Models sometimes wrap file contents in a code fence even inside JSON
+    match = _FENCE.match(content)
+    return match.group(1) if match else content
+
+
+def validate_output(data) -> dict:
+    """Check a decoded reply against OUTPUT_SCHEMA and normalise it.
+
+    Returns {'filename', 'files', 'code', 'logs', 'errors'}, where 'code' lists
+    the file contents in order, as the regex parsers return them. Raises
+    ValueError when the reply does not fit the schema.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("reply is not a JSON object")
+    filename = data.get("filename") or None
+    if filename is not None and not isinstance(filename, str):
+        raise ValueError("'filename' must be a string")
+    files = data.get("files", [])
+    if not isinstance(files, list):
+        raise ValueError("'files' must be a list")
+    checked = []
+    for item in files:
+        if not isinstance(item, dict) or not isinstance(item.get("content"), str):
+            raise ValueError("every entry in 'files' needs a string 'content'")
+        name = item.get("filename") or filename
+        if name is not None and not isinstance(name, str):
+            raise ValueError("'files[].filename' must be a string")
+        content = _unfence(item["content"])
+        if content.strip():
+            checked.append({"filename": name.strip() if name else None, "content": content})
+    filename = filename.strip() if filename else None
+    if not filename and checked:
+        filename = checked[0]["filename"]
+    return {
+        "filename": filename,
+        "files": checked,
+        "code": [f["content"] for f in checked],
+        "logs": _strings(data, "logs"),
+        "errors": _strings(data, "errors"),
+    }
+
+
+def parse_structured_output(output: str):
+    """Validated reply dict, or None if the output is not schema-conforming JSON."""
+    try:
+        parsed = validate_output(json.loads(output))
+    except (TypeError, ValueError):
+        parsed = None
+    with _stats_lock:
+        stats["structured" if parsed is not None else "fallback"] += 1
+    return parsed
+
+
+def follows_tag_protocol(text: str) -> bool:
+    """Confidence check for a clarification reply: it uses at least one protocol marker."""
+    return bool(text and _TAG_MARKERS.search(text))
+
+
+def note_clarification():
+    """Count a clarify_output round trip (reported by report())."""
+    with _stats_lock:
+        stats["clarified"] += 1
+
+
+def report() -> str:
+    """One-line summary of how replies were parsed."""
+    with _stats_lock:
+        s = dict(stats)
+    return (f"🧾 Replies: {s['structured']} structured JSON, {s['fallback']} via tag fallback, "
+            f"{s['clarified']} needed a clarification call")
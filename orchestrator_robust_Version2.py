@@ -1,32 +1,29 @@
 import subprocess
 import os
-import shlex
 import ast
 import threading
 import queue
 
-def run_mixtral(prompt, timeout=120):
-    """Send prompt to Mixtral model via Ollama and return response with error handling."""
-    cmd = "ollama run mixtral:8x7b-instruct-v0.1-q6_K"
+import model_lifecycle
+from ollama_client import OllamaConnectionError, OllamaError, OllamaTimeoutError
+
+def run_mixtral(prompt, timeout=None, purpose="generation"):
+    """Send prompt to Mixtral model via Ollama and return response with error handling.
+
+    With timeout=None the deadline adapts to recent latencies for this purpose.
+    """
     try:
-        process = subprocess.Popen(
-            shlex.split(cmd),
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        out, err = process.communicate(prompt, timeout=timeout)
-        if process.returncode != 0 or err:
-            print(f"[!] Model error: {err.strip()}")
-            return ""
-        return out.strip()
-    except FileNotFoundError:
-        print("[!] ollama not found. Is it installed and on your PATH?")
+        return model_lifecycle.generate(prompt, model="mixtral:8x7b-instruct-v0.1-q6_K",
+                                        timeout=timeout, purpose=purpose).strip()
+    except OllamaConnectionError as e:
+        print(f"[!] {e}. Is ollama installed and running?")
         return ""
-    except subprocess.TimeoutExpired:
+    except OllamaTimeoutError:
         print("[!] Model call timed out.")
         return ""
+    except OllamaError as e:
+        print(f"[!] Model error: {e}")
+        return ""
     except Exception as e:
         print(f"[!] Unexpected model error: {e}")
         return ""
@@ -119,7 +116,7 @@ def fix_file(filename, error_message):
         "```\n" + code + "\n```\n"
         "Please provide a fixed version of the code. Only output the corrected code."
     )
-    fixed_code = run_mixtral(prompt)
+    fixed_code = run_mixtral(prompt, purpose="fix")
     if fixed_code.strip():
         success = write_file(filename, fixed_code)
         if success:
@@ -128,12 +125,14 @@ def fix_file(filename, error_message):
         print("[!] Model did not return a fix.")
 
 def main():
+    model_lifecycle.preload("mixtral:8x7b-instruct-v0.1-q6_K")  # Load the model while the prompt comes up
     print("== Robust Orchestrator ==")
     print("Type 'exit' to quit.")
     cwd = os.getcwd()
     while True:
         user = input(f"{cwd}> ").strip()
         if user.lower() in ("exit", "quit"):
+            print(model_lifecycle.report("mixtral:8x7b-instruct-v0.1-q6_K"))
             break
 
         if user.startswith("write "):
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Reusable PDF Page Templates
+Defines a document's page furniture (background image, title and disclaimer
+footer) once as reportlab form XObjects and stamps each page with a reference
+to the form, so the background is embedded once per PDF instead of being
+drawn again after every showPage(). The background comes from
+background_cache, so it is also read and decoded once per process rather
+than once per file.
+
+Output is written with reportlab's invariant mode (fixed creation date and
+document ID), so the same inputs always produce byte-identical PDFs.
+
+Offsets given as "from the top" are measured down from the top edge of the
+page, so one template works for any page size.
+"""
+
+import threading
+
+from background_cache import background_reader
+from text_layout import pdf_layout
+
+# ==================== PDF TEMPLATE CONFIGURATION ====================
+PDF_INVARIANT = 1                          # Fixed dates/IDs for reproducible output
+FIRST_PAGE_FORM = "page_first"             # Background + title + footer
+NEXT_PAGE_FORM = "page_next"               # Background + footer
+# ====================================================================
+
+# Cached ImageReaders keep a file handle for JPEG data; two threads embedding
+# the same reader at once would interleave their reads
+_reader_lock = threading.Lock()
+
+
+def _canvas(path, pagesize, invariant):
+    from reportlab.pdfgen import canvas
+    return canvas.Canvas(str(path), pagesize=pagesize, invariant=invariant)
+
+
+def _letter():
+    from reportlab.lib.pagesizes import letter
+    return letter
+
+
+class PdfTemplate:
+    """Page layout shared by every PDF a script writes.
+
+    Styles are (font name, size, (r, g, b)) with colour components in 0..1.
+    title_at and footer_at are (x, offset from the top) and (x, y); body text
+    starts body_top below the top edge on the first page and next_top below
+    it on continuation pages, and moves to a new page below `bottom`. Body
+    lines wrap at body_width (default: the page width less body_x on both
+    sides) and the footer wraps downwards from footer_at. canvas_factory and
+    text_layout are only replaced in tests.
+    """
+
+    def __init__(self, pagesize=None, background=None, background_mask=None,
+                 title=None, title_style=("Helvetica-Bold", 20, (0, 0, 0)), title_at=(60, 80),
+                 footer=None, footer_style=("Helvetica", 8, (0.25, 0.25, 0.25)), footer_at=(60, 40),
+                 body_style=("Helvetica", 14, (0, 0, 0)), body_x=72, body_top=100, next_top=None,
+                 body_width=None, leading=None, bottom=100, canvas_factory=_canvas, text_layout=None):
+        self.pagesize = pagesize or _letter()
+        self.background = background
+        self.background_mask = background_mask
+        self.title = title
+        self.title_style = title_style
+        self.title_at = title_at
+        self.footer = footer
+        self.footer_style = footer_style
+        self.footer_at = footer_at
+        self.body_style = body_style
+        self.body_x = body_x
+        self.body_top = body_top
+        self.next_top = body_top if next_top is None else next_top
+        self.body_width = body_width or self.pagesize[0] - 2 * body_x
+        self.leading = leading or body_style[1] * 1.2   # reportlab's default text leading
+        self.bottom = bottom
+        self.canvas_factory = canvas_factory
+        self.text_layout = text_layout or pdf_layout
+
+    @staticmethod
+    def _style(c, style):
+        font, size, color = style
+        c.setFont(font, size)
+        c.setFillColorRGB(*color)
+
+    def _define_form(self, c, name, with_title):
+        width, height = self.pagesize
+        c.beginForm(name)
+        reader = background_reader(self.background) if self.background else None
+        if reader is not None:
+            with _reader_lock:
+                c.drawImage(reader, 0, 0, width=width, height=height, mask=self.background_mask)
+        if with_title and self.title:
+            self._style(c, self.title_style)
+            c.drawString(self.title_at[0], height - self.title_at[1], self.title)
+        if self.footer:
+            font, size, _ = self.footer_style
+            x, y = self.footer_at
+            self._style(c, self.footer_style)
+            for i, line in enumerate(self.text_layout.wrap(self.footer, font, size, width - 2 * x)):
+                c.drawString(x, y - i * size * 1.2, line)
+        c.endForm()
+
+    def _start_page(self, c, first, forms):
+        name = FIRST_PAGE_FORM if first and self.title else NEXT_PAGE_FORM
+        # Each form is defined once per document; every page only references it
+        if name not in forms:
+            self._define_form(c, name, with_title=name == FIRST_PAGE_FORM)
+            forms.add(name)
+        c.doForm(name)
+        self._style(c, self.body_style)
+        return self.pagesize[1] - (self.body_top if first else self.next_top)
+
+    def render(self, path, lines) -> int:
+        """Write lines onto as many template pages as needed; returns the page count."""
+        c = self.canvas_factory(path, self.pagesize, PDF_INVARIANT)
+        font, size, _ = self.body_style
+        forms = set()
+        pages = 1
+        y = self._start_page(c, True, forms)
+        for line in lines:
+            for row in self.text_layout.wrap(line, font, size, self.body_width):
+                if y < self.bottom:
+                    c.showPage()
+                    pages += 1
+                    y = self._start_page(c, False, forms)
+                c.drawString(self.body_x, y, row)
+                y -= self.leading
+        c.save()
+        return pages
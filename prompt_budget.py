@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Prompt Budget Manager
+Assembles prompts from named sections under a per-purpose token budget, using
+a local approximation of the model's tokenizer. Optional sections are dropped
+lowest-priority first, oversized required text is cut from the middle, and
+old history is dropped or summarised first. Prompt evaluation time on CPU
+grows with prompt length, so bounding prompts bounds latency.
+"""
+
+import math
+import re
+
+# ==================== BUDGET CONFIGURATION ====================
+CHARS_PER_TOKEN = 4          # Rough BPE average for English text and code
+PROMPT_BUDGETS = {           # Max prompt tokens per call purpose (num_ctx is 2048 by default)
+    "generation": 1024,
+    "validation": 1536,
+    "clarification": 768,
+    "fix": 1536,
+    "system": 768,           # Orchestrator project context sent as the system prompt
+    "history": 1024,         # Persisted orchestrator command history
+}
+DEFAULT_BUDGET = 1024
+SUMMARY_ITEMS = 8            # Commands quoted in a history summary line
+# ==============================================================
+
+_PIECES = re.compile(r"\w+|[^\w\s]")
+_ELISION = "\n[...]\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count: long words split every CHARS_PER_TOKEN characters,
+    punctuation one token each, non-ASCII symbols (emoji) a token per two bytes."""
+    if not text:
+        return 0
+    count = 0
+    for piece in _PIECES.findall(text):
+        if not piece.isascii():
+            count += max(1, math.ceil(len(piece.encode("utf-8")) / 2))
+        elif piece[0].isalnum() or piece[0] == "_":
+            count += math.ceil(len(piece) / CHARS_PER_TOKEN)
+        else:
+            count += 1
+    return count
+
+
+def budget_for(purpose: str) -> int:
+    return PROMPT_BUDGETS.get(purpose, DEFAULT_BUDGET)
+
+
+def truncate_middle(text: str, max_tokens: int) -> str:
+    """Cut text down to about max_tokens, keeping its beginning and end."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    low, high = 0, len(text) // 2
+    while low < high:
+        keep = (low + high + 1) // 2
+        if estimate_tokens(text[:keep] + _ELISION + text[-keep:]) <= max_tokens:
+            low = keep
+        else:
+            high = keep - 1
+    return text[:low] + _ELISION + text[-low:] if low else ""
+
+
+def build_prompt(sections: list, purpose: str = "generation", budget: int = None,
+                 separator: str = "\n\n"):
+    """Join (name, text, priority) sections into a prompt that fits the budget.
+
+    priority None marks a required section; optional sections with the
+    lowest priority are dropped first. If the required sections alone are
+    too long, the longest one is cut from the middle. Returns (prompt, report)
+    where report holds the purpose, budget, token count and what was dropped
+    or truncated.
+    """
+    budget = budget or budget_for(purpose)
+    kept = [[name, text, priority] for name, text, priority in sections if text]
+    sep_tokens = estimate_tokens(separator)
+    total = lambda: sum(estimate_tokens(t) for _, t, _ in kept) + sep_tokens * max(len(kept) - 1, 0)
+    dropped, truncated = [], []
+    optional = sorted((s for s in kept if s[2] is not None), key=lambda s: s[2])
+    for section in optional:
+        if total() <= budget:
+            break
+        kept.remove(section)
+        dropped.append(section[0])
+    if total() > budget:
+        longest = max(kept, key=lambda s: estimate_tokens(s[1]))
+        over = total() - budget
+        longest[1] = truncate_middle(longest[1], max(estimate_tokens(longest[1]) - over, 0))
+        truncated.append(longest[0])
+    prompt = separator.join(text for _, text, _ in kept)
+    report = {
+        "purpose": purpose,
+        "budget": budget,
+        "tokens": estimate_tokens(prompt),
+        "dropped": dropped,
+        "truncated": truncated,
+    }
+    return prompt, report
+
+
+def fit_history(entries: list, budget: int = None, render=str, summarize: bool = True,
+                omitted: int = 0):
+    """Keep the newest history entries that fit the budget.
+
+    render turns an entry into the text that counts against the budget.
+    Returns (kept_entries, summary) where summary is a one-line digest of
+    the dropped oldest entries (None if nothing was dropped or summarize
+    is False). The summary's own size is reserved from the budget.
+    omitted is the number of entries an earlier summary already stood for;
+    it is added to the count in the new one.
+    """
+    budget = budget or budget_for("history")
+    costs = [estimate_tokens(render(entry)) + 1 for entry in entries]
+    if sum(costs) <= budget:
+        return list(entries), None
+    limit = budget - (min(SUMMARY_ITEMS * 16, budget // 2) if summarize else 0)
+    kept, used = [], 0
+    for entry, cost in zip(reversed(entries), reversed(costs)):
+        if used + cost > limit:
+            break
+        kept.append(entry)
+        used += cost
+    kept.reverse()
+    dropped = entries[:len(entries) - len(kept)]
+    if not summarize:
+        return kept, None
+    recent = [render(e).strip().splitlines()[0][:60] for e in dropped[-SUMMARY_ITEMS:] if render(e).strip()]
+    summary = f"[{omitted + len(dropped)} earlier entries omitted: " + "; ".join(recent) + "]"
+    return kept, summary
+
+
+def describe(report: dict) -> str:
+    """One-line summary of an assembled prompt's size."""
+    line = f"📏 Prompt {report['tokens']}/{report['budget']} tokens ({report['purpose']})"
+    if report["dropped"]:
+        line += f", dropped {', '.join(report['dropped'])}"
+    if report["truncated"]:
+        line += f", shortened {', '.join(report['truncated'])}"
+    return line
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Prompt → Response Cache
+Disk-backed, content-addressed cache shared by every script that talks to the
+model. Entries are keyed on (model, options, prompt) and stored in SQLite with
+LRU + TTL eviction and a total size budget.
+
+Usage:
+    python3 prompt_cache.py stats    # Show entry count, size and lifetime hit rate
+    python3 prompt_cache.py prune    # Drop expired entries and enforce the budget
+    python3 prompt_cache.py clear    # Remove every cached response
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+# ==================== CACHE CONFIGURATION ====================
+PROMPT_CACHE_PATH = os.environ.get("OLLAMA_PROMPT_CACHE", ".prompt_cache.sqlite3")  # "" disables
+CACHE_MAX_BYTES = 256 * 1024 * 1024   # Size budget for stored responses
+CACHE_TTL_SECONDS = 7 * 24 * 3600     # Entries older than this are treated as misses
+# =============================================================
+
+
+def make_cache_key(model: str, prompt: str, **params) -> str:
+    """Hash everything that influences the model output into a stable key."""
+    material = {"model": model, "prompt": prompt}
+    material.update({k: v for k, v in params.items() if v is not None})
+    encoded = json.dumps(material, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class PromptCache:
+    """SQLite-backed response cache with LRU/TTL eviction and hit counters.
+
+    counters cover this process; hits and misses are also totalled in the
+    database so the CLI can report the hit rate across runs.
+    """
+
+    def __init__(self, path: str = PROMPT_CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES,
+                 ttl: float = CACHE_TTL_SECONDS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expired": 0}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " model TEXT,"
+            " response TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_used)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS totals (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+        )
+        self._db.commit()
+
+    def _count(self, name: str):
+        # Caller holds the lock and commits
+        self.counters[name] += 1
+        self._db.execute(
+            "INSERT INTO totals (name, value) VALUES (?, 1)"
+            " ON CONFLICT(name) DO UPDATE SET value = value + 1", (name,)
+        )
+
+    def get(self, key: str):
+        """Return the cached response for key, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._count("misses")
+                self._db.commit()
+                return None
+            response, created = row
+            if self.ttl and now - created > self.ttl:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.counters["expired"] += 1
+                self._count("misses")
+                self._db.commit()
+                return None
+            self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._count("hits")
+            self._db.commit()
+            return response
+
+    def put(self, key: str, response: str, model: str = None):
+        """Store a response and evict least-recently-used entries over budget."""
+        if not response:
+            return
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, created, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, size, now, now),
+            )
+            self.counters["stores"] += 1
+            self._enforce_budget()
+            self._db.commit()
+
+    def _enforce_budget(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute(
+            "SELECT key, size FROM responses ORDER BY last_used ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self.counters["evictions"] += 1
+
+    def prune(self):
+        """Drop expired entries and enforce the size budget."""
+        with self._lock:
+            if self.ttl:
+                cursor = self._db.execute(
+                    "DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,)
+                )
+                self.counters["expired"] += cursor.rowcount
+            self._enforce_budget()
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+    def stats(self) -> dict:
+        """Return this process's counters plus the entry count, size and lifetime totals."""
+        with self._lock:
+            entries, total = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            totals = dict(self._db.execute("SELECT name, value FROM totals").fetchall())
+        stats = dict(self.counters)
+        stats.update({
+            "entries": entries,
+            "bytes": total,
+            "hit_rate": _hit_rate(self.counters["hits"], self.counters["misses"]),
+            "total_hits": totals.get("hits", 0),
+            "total_misses": totals.get("misses", 0),
+        })
+        stats["total_hit_rate"] = _hit_rate(stats["total_hits"], stats["total_misses"])
+        return stats
+
+    def report(self) -> str:
+        """One-line summary of this process's cache hits and misses."""
+        stats = self.stats()
+        return (f"📦 Prompt cache: {stats['hits']} hits, {stats['misses']} misses "
+                f"({stats['hit_rate']:.0f}% hit rate)")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def _hit_rate(hits: int, misses: int) -> float:
+    lookups = hits + misses
+    return (hits / lookups) * 100 if lookups else 0.0
+
+
+def main():
+    action = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if not PROMPT_CACHE_PATH:
+        print("Prompt cache is disabled (OLLAMA_PROMPT_CACHE is empty).")
+        return
+    cache = PromptCache()
+    if action == "clear":
+        cache.clear()
+        print(f"✓ Cleared prompt cache: {PROMPT_CACHE_PATH}")
+    elif action == "prune":
+        cache.prune()
+        print(f"✓ Pruned prompt cache: {PROMPT_CACHE_PATH}")
+    stats = cache.stats()
+    print(f"📦 {stats['entries']} cached responses, {stats['bytes'] / 1024:.1f} KiB in {PROMPT_CACHE_PATH}")
+    print(f"   {stats['total_hits']} hits, {stats['total_misses']} misses "
+          f"({stats['total_hit_rate']:.1f}% hit rate) since the cache was created")
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,20 +5,24 @@ Uses local Ollama model to generate Python scripts based on natural language req
 """
 
 import os
-import subprocess
 import sys
 import threading
 import time
 from pathlib import Path
 from datetime import datetime
 
+from ollama_client import code_block_closed, OllamaConnectionError, OllamaError
+from model_config import configured_model
+from model_lifecycle import get_lifecycle
+
 # Configuration
-OLLAMA_MODEL = "mixtral:8x7b-instruct-v0.1-q6_K"
+OLLAMA_MODEL = configured_model("generation", "mixtral:8x7b-instruct-v0.1-q6_K")  # See model_benchmark.py
 DEFAULT_OUTPUT_DIR = "./generated_scripts"
 
 class PythonCodeGenerator:
     def __init__(self, model_name=OLLAMA_MODEL):
         self.model_name = model_name
+        self.lifecycle = get_lifecycle(model_name)
         self.output_dir = Path(DEFAULT_OUTPUT_DIR)
         self.ensure_output_dir()
     
@@ -30,7 +34,6 @@ class PythonCodeGenerator:
         """Call the Ollama model with a prompt and return the response."""
         thinking_active = None
         progress_thread = None
-        process = None
         
         try:
             print("🤔 Thinking (this may take a while for complex requests)...")
@@ -54,56 +57,37 @@ class PythonCodeGenerator:
             progress_thread = threading.Thread(target=show_thinking_progress, daemon=True)
             progress_thread.start()
             
-            # Start the subprocess without timeout
-            process = subprocess.Popen(
-                ["ollama", "run", self.model_name],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-            
-            # Send the prompt and wait for response
-            stdout, stderr = process.communicate(input=prompt.encode())
+            # Stream the reply and stop as soon as the first code block closes;
+            # extract_python_code ignores anything after it anyway
+            output = self.lifecycle.generate(prompt, stop_when=[code_block_closed])
             
             # Stop the thinking indicator
             thinking_active.clear()
             if progress_thread:
                 progress_thread.join(timeout=1)
             
-            if process.returncode != 0:
-                error_msg = stderr.decode().strip()
-                print(f"Error calling model: {error_msg}")
-                return None
-            
-            output = stdout.decode().strip()
+            output = output.strip()
             print("✓ Model finished thinking!")
             return output
         
         except KeyboardInterrupt:
             print("\n⚠️  Generation interrupted by user.")
             return None
-        except FileNotFoundError:
-            print("Error: Ollama not found. Please ensure Ollama is installed and in your PATH.")
+        except OllamaConnectionError as e:
+            print(f"Error: {e}. Please ensure Ollama is installed and running (ollama serve).")
+            return None
+        except OllamaError as e:
+            print(f"Error calling model: {e}")
             return None
         except Exception as e:
             print(f"Unexpected error: {e}")
             return None
         finally:
-            # Always clean up the thinking indicator and process
+            # Always clean up the thinking indicator
             if thinking_active:
                 thinking_active.clear()
             if progress_thread:
                 progress_thread.join(timeout=1)
-            if process:
-                try:
-                    if process.poll() is None:  # Process is still running
-                        process.terminate()
-                        process.wait(timeout=5)
-                except:
-                    try:
-                        process.kill()
-                    except:
-                        pass
     
     def extract_python_code(self, response: str) -> str:
         """Extract Python code from the model response."""
@@ -231,6 +215,8 @@ Python code:"""
 def main():
     """Main interactive loop."""
     generator = PythonCodeGenerator()
+    # Load the model in the background while the banner prints and we wait for input
+    generator.lifecycle.preload()
     
     print("🐍 Interactive Python Code Generator")
     print("=" * 50)
@@ -257,6 +243,8 @@ def main():
             # Handle special commands
             if user_input.lower() in ['quit', 'exit', 'q']:
                 print("Goodbye! 👋")
+                print(generator.lifecycle.report())
+                print(generator.lifecycle.client.cache_report())
                 break
             
             if user_input.lower().startswith('set output '):
@@ -273,6 +261,8 @@ def main():
             
         except KeyboardInterrupt:
             print("\n\nGoodbye! 👋")
+            print(generator.lifecycle.report())
+            print(generator.lifecycle.client.cache_report())
             break
         except Exception as e:
             print(f"An error occurred: {e}")
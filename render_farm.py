@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Process-Pool Render Farm
+Runs PNG/PDF/TXT rendering in a pool of worker processes sized to the core
+count, so CPU-bound PIL and reportlab work uses every core and never holds up
+the next model call. Scripts submit render jobs as they get texts back and
+collect the futures once generation is done.
+
+A job is (text, template, formats, destination): the template maps each
+format to a module-level renderer(text, path) function, and each format is
+written to "<destination>.<format>". Workers warm the template's fonts and
+backgrounds once at startup, so the first job in a worker does not pay for
+font parsing or background decoding.
+
+With workers=0 jobs render inline in the calling thread (the futures are
+already done when submit returns), which keeps single-item scripts and tests
+free of process start-up cost.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+
+from background_cache import warm_backgrounds
+from font_registry import warm_fonts
+
+# ==================== RENDER FARM CONFIGURATION ====================
+RENDER_WORKERS = int(os.environ.get("RENDER_WORKERS", os.cpu_count() or 2))
+# Fresh interpreters rather than fork: the parent already runs HTTP pool and
+# indicator threads, and forking those mid-request can deadlock a worker
+RENDER_START_METHOD = os.environ.get("RENDER_START_METHOD", "spawn")
+# ===================================================================
+
+
+class RenderTemplate:
+    """Renderers per format plus the fonts and backgrounds workers should warm.
+
+    renderers maps a format ("txt", "pdf", "png") to a module-level function
+    renderer(text, path); fonts is a list of (path, size) and backgrounds a
+    list of (path, size, mode). Templates are pickled into every job, so the
+    renderers must be importable by name in the worker.
+    """
+
+    def __init__(self, name: str, renderers: dict, fonts=(), backgrounds=()):
+        self.name = name
+        self.renderers = dict(renderers)
+        self.fonts = list(fonts)
+        self.backgrounds = list(backgrounds)
+
+    @property
+    def formats(self) -> tuple:
+        return tuple(self.renderers)
+
+
+def output_path(destination, fmt: str):
+    """Where a format of a job is written; keeps Path destinations as Paths."""
+    if isinstance(destination, Path):
+        return destination.with_name(f"{destination.name}.{fmt}")
+    return f"{destination}.{fmt}"
+
+
+def render_job(text: str, template: RenderTemplate, formats, destination) -> dict:
+    """Render text in each format; returns {format: path} for the files that exist afterwards."""
+    written = {}
+    for fmt in formats or template.formats:
+        if fmt not in template.renderers:
+            raise ValueError(f"Template {template.name!r} has no {fmt!r} renderer")
+        path = output_path(destination, fmt)
+        template.renderers[fmt](text, path)
+        if os.path.exists(path):
+            written[fmt] = path
+    return written
+
+
+def _warm_worker(fonts, backgrounds):
+    # A background that cannot be decoded must not break the pool; the jobs
+    # that use it report the error instead
+    warm_fonts(fonts)
+    for spec in backgrounds:
+        try:
+            warm_backgrounds([spec])
+        except OSError:
+            pass
+
+
+class RenderFarm:
+    """ProcessPoolExecutor for render jobs; submit() returns a Future per job.
+
+    The pool starts on the first submit, and each worker warms the fonts and
+    backgrounds of every template passed in. Use as a context manager (or
+    call close()) so the workers exit when the script is done.
+    """
+
+    def __init__(self, templates=(), workers: int = RENDER_WORKERS,
+                 start_method: str = RENDER_START_METHOD):
+        self.templates = list(templates)
+        self.workers = max(0, workers)
+        self.start_method = start_method
+        self.counters = {"jobs": 0, "failed": 0}
+        self._pool = None
+        self._lock = threading.Lock()   # Bundles may submit from several scheduler threads
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is not None:
+                return self._pool
+            fonts = list(dict.fromkeys(spec for t in self.templates for spec in t.fonts))
+            backgrounds = list(dict.fromkeys(spec for t in self.templates for spec in t.backgrounds))
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(self.start_method),
+                initializer=_warm_worker, initargs=(fonts, backgrounds))
+            return self._pool
+
+    def submit(self, text: str, template: RenderTemplate, formats=None, destination="") -> Future:
+        """Queue one render job; the future resolves to {format: path written}."""
+        with self._lock:
+            self.counters["jobs"] += 1
+        if self.workers == 0:
+            future = Future()
+            try:
+                future.set_result(render_job(text, template, formats, destination))
+            except Exception as e:
+                future.set_exception(e)
+        else:
+            future = self._executor().submit(render_job, text, template, formats, destination)
+        future.add_done_callback(self._count_failure)
+        return future
+
+    def _count_failure(self, future):
+        if not future.cancelled() and future.exception() is not None:
+            with self._lock:
+                self.counters["failed"] += 1
+
+    def report(self) -> str:
+        mode = f"{self.workers} worker processes" if self.workers else "inline"
+        return f"🖨️  Render farm: {self.counters['jobs']} jobs ({mode}), {self.counters['failed']} failed"
+
+    def close(self, wait: bool = True):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
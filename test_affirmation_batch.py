@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Tests for batched affirmation generation against a local stub model server
+"""
+
+import json
+import sys
+import os
+sys.path.append(os.path.dirname(__file__))
+
+import ollama_client
+from affirmation_batch import generate_affirmation_batch, parse_affirmation_batch
+from test_ollama_client import start_stub_server
+
+
+def test_parse_affirmation_batch():
+    assert parse_affirmation_batch('{"affirmations": ["1. I am calm.", "", 3, "I rest."]}') == ["I am calm.", "I rest."]
+    assert parse_affirmation_batch('["I grow."]') == ["I grow."]
+    assert parse_affirmation_batch("1. Not JSON at all") == []
+
+
+def test_batch_rerequests_only_missing_items():
+    replies = [
+        # First round: 4 of 7 requested, one of them a duplicate
+        {"affirmations": ["I am focused.", "I am calm.", "i am calm.", "I finish what I start."]},
+        # Second round should only ask for the 4 still missing
+        {"affirmations": ["I rest without guilt.", "I am enough.", "I learn daily.", "I breathe."]},
+    ]
+    server = start_stub_server(lambda prompt: json.dumps(replies.pop(0)))
+    original = ollama_client._default_client
+    ollama_client._default_client = ollama_client.OllamaClient(host=f"127.0.0.1:{server.server_port}")
+    try:
+        items = generate_affirmation_batch("productivity", "focus", 7, model="stub")
+        assert len(items) == 7
+        assert len(server.requests) == 2
+        assert server.requests[0]["format"]["properties"]["affirmations"]["maxItems"] == 7
+        assert server.requests[1]["format"]["properties"]["affirmations"]["maxItems"] == 4
+        assert "I am calm." in server.requests[1]["prompt"]
+    finally:
+        ollama_client._default_client = original
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    test_parse_affirmation_batch()
+    test_batch_rerequests_only_missing_items()
+    print("✓ All affirmation batch tests passed")
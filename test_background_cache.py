@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Tests for the decoded-background cache (with a counting decoder instead of PIL)
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(__file__))
+
+from background_cache import BackgroundCache
+
+
+def make_cache(max_bytes):
+    decodes = []
+
+    def decoder(path, size, mode):
+        decodes.append((os.path.basename(path), size, mode))
+        return object(), size[0] * size[1] * 4
+
+    return BackgroundCache(max_bytes=max_bytes, decoder=decoder,
+                           reader_factory=lambda path: (object(), 0)), decodes
+
+
+def test_decodes_once_evicts_lru_and_notices_edits():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = {}
+        for name in ("a.png", "b.png", "c.png"):
+            paths[name] = os.path.join(tmpdir, name)
+            with open(paths[name], "wb") as f:
+                f.write(b"x")
+
+        cache, decodes = make_cache(max_bytes=2 * 10 * 10 * 4)
+        frame = cache.frame(paths["a.png"], (10, 10))
+        assert cache.frame(paths["a.png"], (10, 10)) is frame
+        assert cache.frame(paths["a.png"], (10, 10), "RGB") is not frame   # Mode is part of the key
+        assert len(decodes) == 2
+
+        cache.frame(paths["a.png"], (10, 10))   # a/RGBA is now most recently used
+        cache.frame(paths["b.png"], (10, 10))   # Evicts a/RGB
+        assert cache.counters["evictions"] == 1 and cache.bytes == 2 * 400
+        assert cache.frame(paths["a.png"], (10, 10)) is frame
+        assert cache.frame(paths["c.png"], (100, 100)) is not None   # Larger than the cap: not kept
+        assert cache.bytes == 2 * 400
+
+        with open(paths["a.png"], "wb") as f:
+            f.write(b"edited")
+        assert cache.frame(paths["a.png"], (10, 10)) is not frame
+        assert cache.frame(os.path.join(tmpdir, "missing.png"), (10, 10)) is None
+        reader = cache.reader(paths["b.png"])
+        assert cache.reader(paths["b.png"]) is reader
+
+
+if __name__ == "__main__":
+    test_decodes_once_evicts_lru_and_notices_edits()
+    print("✓ All background cache tests passed")
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Tests for the async bundle scheduler's concurrency limits and timings
+"""
+
+import asyncio
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(__file__))
+
+from bundle_scheduler import BundleScheduler, run_pairs
+
+
+def test_limits_overlap_and_timings():
+    lock = threading.Lock()
+    active = {"model": 0, "peak": 0}
+
+    def fake_model_call(name):
+        with lock:
+            active["model"] += 1
+            active["peak"] = max(active["peak"], active["model"])
+        time.sleep(0.1)
+        with lock:
+            active["model"] -= 1
+        return name.upper()
+
+    async def pair_fn(category, subcategory, scheduler, timings):
+        background = asyncio.create_task(scheduler.background(time.sleep, 0.1, timings=timings))
+        text = await scheduler.model(fake_model_call, subcategory, timings=timings)
+        await background
+        await scheduler.render(time.sleep, 0.01, timings=timings, stage="png")
+        if subcategory == "bad":
+            raise ValueError("render failed")
+        return text
+
+    categories = {"a": ["one", "two", "three"], "b": ["four", "bad"]}
+    started = time.perf_counter()
+    results = run_pairs(categories, pair_fn, BundleScheduler(model_concurrency=2, background_concurrency=5))
+    elapsed = time.perf_counter() - started
+
+    assert active["peak"] == 2
+    # 5 model calls two at a time take ~0.3 s; strictly serial would be ~1.0 s
+    assert elapsed < 0.8
+    assert [r["value"] for r in results if not r["error"]] == ["ONE", "TWO", "THREE", "FOUR"]
+    assert isinstance(results[-1]["error"], ValueError)
+    stages = results[0]["stages"]
+    assert {"model", "model_wait", "background", "png"} <= set(stages)
+
+
+if __name__ == "__main__":
+    test_limits_overlap_and_timings()
+    print("✓ All bundle scheduler tests passed")
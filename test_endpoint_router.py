@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for least-outstanding-requests routing across several stub Ollama servers
+"""
+
+import sys
+import os
+import threading
+sys.path.append(os.path.dirname(__file__))
+
+from ollama_client import OllamaClient
+from test_ollama_client import start_stub_server
+
+
+def run_concurrently(client, prompts):
+    results = []
+    threads = [threading.Thread(target=lambda p=p: results.append(client.generate(p, on_token=lambda t: None)))
+               for p in prompts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_least_loaded_failover_and_drain():
+    servers = [start_stub_server() for _ in range(3)]
+    for server in servers:
+        server.token_delay = 0.1
+    hosts = [f"127.0.0.1:{server.server_port}" for server in servers]
+    try:
+        client = OllamaClient(hosts=hosts, model="stub")
+        results = run_concurrently(client, [f"prompt {i}" for i in range(6)])
+        assert len(results) == 6
+        # Concurrent calls spread evenly because each goes to the least-loaded endpoint
+        assert [len(server.requests) for server in servers] == [2, 2, 2]
+        assert all(status["outstanding"] == 0 for status in client.router.status())
+
+        # A dead endpoint is marked down and its calls fail over to the others
+        dead = start_stub_server()
+        dead.shutdown()
+        dead.server_close()
+        client = OllamaClient(hosts=[f"127.0.0.1:{dead.server_port}"] + hosts[1:], model="stub")
+        assert len(run_concurrently(client, [f"again {i}" for i in range(4)])) == 4
+        status = client.router.status()
+        assert status[0]["healthy"] is False and status[0]["last_error"]
+        assert len(servers[1].requests) + len(servers[2].requests) == 8
+
+        # A drained endpoint receives nothing new
+        client.router.drain(hosts[1])
+        before = len(servers[1].requests)
+        assert client.generate("drained?").strip() == "echo: drained?"
+        assert len(servers[1].requests) == before
+        client.router.restore(hosts[1])
+        assert client.check_health()[1]["healthy"] is True
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    test_least_loaded_failover_and_drain()
+    print("✓ All endpoint router tests passed")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests for the fake Ollama server's replies and latency profiles
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(__file__))
+
+from affirmation_batch import batch_schema, parse_affirmation_batch
+from fake_ollama import start_fake_server
+from model_routing import review_is_confident
+from ollama_client import OllamaClient, OllamaError
+
+PROFILES = {
+    "test": {"ttft": 0.05, "prompt_tps": 0, "tokens_per_sec": 200, "load_seconds": 0.1,
+             "error_rate": 0.0, "jitter": 0.0},
+    "broken": {"ttft": 0.0, "prompt_tps": 0, "tokens_per_sec": 0, "load_seconds": 0.0,
+               "error_rate": 1.0, "jitter": 0.0},
+}
+
+
+def test_replies_follow_the_profile():
+    server = start_fake_server(models={"m": "test", "bad": "broken"}, profiles=PROFILES, seed=1)
+    try:
+        client = OllamaClient(host=server.url, model="m", retries=1)
+        assert sorted(client.list_models()) == ["bad", "m"]
+
+        meta = {}
+        raw = client.generate("Write 5 affirmations", format=batch_schema(5), on_done=meta.update)
+        assert len(parse_affirmation_batch(raw)) == 5
+        assert meta["load_duration"] >= 0.1e9   # First call loads the model
+
+        arrivals, tokens = [], []
+
+        def on_token(token):
+            arrivals.append(time.perf_counter())
+            tokens.append(token)
+
+        started = time.perf_counter()
+        text = client.generate("Write a python script that sorts files", on_token=on_token,
+                               on_done=meta.update)
+        elapsed = time.perf_counter() - started
+        assert review_is_confident(text)
+        assert arrivals[0] - started >= 0.05 and meta["load_duration"] < 1e6
+        assert elapsed >= 0.05 + len(tokens) / 200 * 0.9
+        assert meta["eval_count"] == len(tokens)
+
+        reply = client.request_json("POST", "/api/chat", {
+            "model": "m", "stream": False,
+            "messages": [{"role": "user", "content": "Write an affirmation about focus"}]})
+        assert reply["message"]["content"].startswith("I ")
+
+        try:
+            client.generate("anything", model="bad")
+            assert False, "expected OllamaError"
+        except OllamaError as e:
+            assert e.status == 503
+        assert server.stats["errors"] == 1 and server.stats["loads"] == 1
+        client.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_dropped_connections_are_not_reported(capsys):
+    server = start_fake_server(profiles=PROFILES)
+    try:
+        for error in (ConnectionResetError(), BrokenPipeError()):
+            try:
+                raise error
+            except OSError:
+                server.handle_error(None, ("127.0.0.1", 0))
+        assert capsys.readouterr().err == ""
+        try:
+            raise ValueError("bad request")
+        except ValueError:
+            server.handle_error(None, ("127.0.0.1", 0))
+        assert "ValueError" in capsys.readouterr().err
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    test_replies_follow_the_profile()
+    print("✓ All fake Ollama tests passed")
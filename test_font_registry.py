@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Tests for the process-wide font registry (with a counting loader instead of real font files)
+"""
+
+import sys
+import os
+import threading
+sys.path.append(os.path.dirname(__file__))
+
+from font_registry import FontRegistry
+
+
+def make_registry(installed):
+    loads = []
+
+    def loader(path, size):
+        if path not in installed:
+            raise OSError(f"cannot open resource {path}")
+        loads.append((path, size))
+        return object()
+
+    registry = FontRegistry(fallbacks=["missing.ttf", "fallback.ttf"], loader=loader,
+                            default_loader=lambda size: ("builtin", size))
+    return registry, loads
+
+
+def test_each_path_and_size_loads_once():
+    registry, loads = make_registry({"custom.ttf", "fallback.ttf"})
+    fonts = []
+    threads = [threading.Thread(target=lambda: fonts.append(registry.get("custom.ttf", 24)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(font is fonts[0] for font in fonts)
+    assert registry.get("custom.ttf", 12) is not fonts[0]
+    # One probe while resolving, then one load per size
+    assert loads.count(("custom.ttf", 24)) == 1 and loads.count(("custom.ttf", 12)) == 2
+    assert registry.get("custom.ttf", 24) is fonts[0]
+
+    assert registry.resolve("/no/such/font.ttf") == "fallback.ttf"
+    assert registry.get("/no/such/font.ttf", 24) is registry.get("fallback.ttf", 24)
+
+    bare, _ = make_registry(set())
+    assert bare.resolve("custom.ttf") is None
+    assert bare.get("custom.ttf", 14) == ("builtin", 14)
+
+
+if __name__ == "__main__":
+    test_each_path_and_size_loads_once()
+    print("✓ All font registry tests passed")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for adaptive deadlines and hedged model requests
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(__file__))
+
+import latency_tracker
+from latency_tracker import LatencyTracker
+from ollama_client import OllamaClient, OllamaTimeoutError
+from test_ollama_client import start_stub_server
+
+
+def test_deadline_follows_p99():
+    tracker = LatencyTracker(window=100, min_samples=20)
+    assert tracker.deadline("validation") == latency_tracker.DEFAULT_DEADLINES["validation"]
+    assert tracker.hedge_after("validation") is None
+    for i in range(100):
+        tracker.record("validation", 40.0 + i)   # 40 s .. 139 s
+    assert tracker.percentile("validation", 95) == 134.0
+    assert tracker.deadline("validation") == 138.0 * latency_tracker.DEADLINE_HEADROOM
+    # Very slow history is still capped so nothing waits forever
+    for _ in range(100):
+        tracker.record("generation", 5000.0)
+    assert tracker.deadline("generation") == latency_tracker.MAX_DEADLINE
+    assert tracker.snapshot()["validation"]["count"] == 100
+
+
+def test_stream_deadline_and_hedged_duplicate():
+    slow = start_stub_server()
+    fast = start_stub_server()
+    slow.token_delay = 0.5
+    try:
+        client = OllamaClient(hosts=[f"127.0.0.1:{slow.server_port}"], model="stub")
+        started = time.perf_counter()
+        try:
+            client.generate("one two three four", on_token=lambda t: None, timeout=0.6)
+            assert False, "expected OllamaTimeoutError"
+        except OllamaTimeoutError:
+            pass
+        assert time.perf_counter() - started < 1.2
+        # Timed-out calls still feed the latency history
+        assert len(client.latency._samples["generation"]) == 1
+
+        tracker = LatencyTracker()
+        for _ in range(latency_tracker.MIN_SAMPLES):
+            tracker.record("generation", 0.1)
+        client = OllamaClient(hosts=[f"127.0.0.1:{slow.server_port}", f"127.0.0.1:{fast.server_port}"],
+                              model="stub", latency=tracker)
+        time.sleep(0.6)
+        cancelled_before = slow.cancelled
+        started = time.perf_counter()
+        assert client.generate("hedge me", cache=False).strip() == "echo: hedge me"
+        assert time.perf_counter() - started < 0.8
+        assert client.hedging == {"sent": 1, "won": 1}
+        assert len(fast.requests) == 1
+        # The losing request on the slow backend is cancelled
+        time.sleep(1.2)
+        assert slow.cancelled == cancelled_before + 1
+    finally:
+        for server in (slow, fast):
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    test_deadline_follows_p99()
+    test_stream_deadline_and_hedged_duplicate()
+    print("✓ All latency tracker tests passed")
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Tests for the load-test harness against the fake Ollama server
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(__file__))
+
+from load_test import compare, run_load_test
+
+
+def test_code_pipeline_sweep_reports_percentiles():
+    report = run_load_test(["code"], [1, 2], requests=3, profile="instant", validators=False,
+                           log=lambda line: None)
+    levels = report["code"]
+    assert [level["concurrency"] for level in levels] == [1, 2]
+    for level in levels:
+        assert level["completed"] == 3 and level["errors"] == 0, level["first_error"]
+        assert level["throughput"] > 0 and level["peak_rss_mb"] > 0
+        model = level["stages"]["model"]
+        assert model["p50"] <= model["p95"] <= model["p99"] <= level["end_to_end"]["p99"]
+        assert "queue" not in level["stages"]   # Closed loop: jobs start when a worker is free
+    assert len(compare(report, report)) == 2
+
+
+if __name__ == "__main__":
+    test_code_pipeline_sweep_reports_percentiles()
+    print("✓ All load test harness tests passed")
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Tests for the model auto-benchmark against the stub Ollama server
+"""
+
+import json
+import sys
+import os
+import tempfile
+import time
+sys.path.append(os.path.dirname(__file__))
+
+from model_benchmark import run_benchmark
+from model_config import configured_model
+from ollama_client import OllamaClient
+from test_ollama_client import start_stub_server
+
+
+def good_reply(delay):
+    def reply(prompt):
+        time.sleep(delay)
+        if prompt.startswith("Review"):
+            if "def greet(name)\n" in prompt or "range(10)\n" in prompt:
+                return "```python\nprint('fixed')\n```"
+            return "CODE_APPROVED"
+        if prompt.startswith("Write a complete Python script"):
+            return "```python\nprint('hello')\n```"
+        return json.dumps({"affirmations": [f"I am focused {i}." for i in range(7)]})
+    return reply
+
+
+def test_fastest_model_meeting_the_bar_is_recommended():
+    server = start_stub_server(lambda prompt: "I cannot help with that.")
+    server.model_replies = {"slow": good_reply(0.03), "quick": good_reply(0)}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "model_config.json")
+            client = OllamaClient(host=f"127.0.0.1:{server.server_port}", model="stub")
+            config = run_benchmark(["sloppy", "slow", "quick"], config_path=path, client=client,
+                                   log=lambda line: None)
+            assert config["results"]["sloppy"]["generation"]["score"] == 0
+            assert config["results"]["slow"]["validation"]["score"] == 1
+            for purpose in ("affirmations", "generation", "validation"):
+                assert config["purposes"][purpose]["model"] == "quick"
+            assert configured_model("generation", "default", path) == "quick"
+            assert configured_model("clarification", "default", path) == "default"
+            # Each model is unloaded before the next one is measured
+            assert server.loaded == set()
+            client.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    test_fastest_model_meeting_the_bar_is_recommended()
+    print("✓ All model benchmark tests passed")
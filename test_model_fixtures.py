@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests for recording model answers against the stub server and replaying them offline
+"""
+
+import sys
+import os
+import tempfile
+import time
+sys.path.append(os.path.dirname(__file__))
+
+from model_fixtures import FixtureArchive
+from ollama_client import FixtureMissError, OllamaClient
+from test_ollama_client import start_stub_server
+
+
+def test_recorded_answers_replay_without_a_backend():
+    server = start_stub_server()
+    server.token_delay = 0.02
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "fixtures", "run.jsonl.gz")
+        try:
+            client = OllamaClient(host=f"127.0.0.1:{server.server_port}", model="stub",
+                                  fixtures=FixtureArchive(path, "record"))
+            live_tokens = []
+            streamed = client.generate("one two three four five", on_token=live_tokens.append)
+            plain = client.generate("plain answer")
+            client.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        # Nothing listens on the old port any more; replay must not need it
+        replay = OllamaClient(host=f"127.0.0.1:{server.server_port}", model="stub",
+                              fixtures=FixtureArchive(path, "replay", speed=1.0))
+        assert replay.list_models() == ["stub"]
+        tokens, meta = [], {}
+        started = time.perf_counter()
+        assert replay.generate("one two three four five", on_token=tokens.append,
+                               on_done=meta.update) == streamed
+        assert time.perf_counter() - started >= 0.1   # Six chunks at 20 ms each
+        assert tokens == live_tokens and meta["eval_count"] == 6
+        assert replay.generate("plain answer") == plain
+
+        instant = OllamaClient(host=f"127.0.0.1:{server.server_port}", model="stub",
+                               fixtures=FixtureArchive(path, "replay", speed=0))
+        started = time.perf_counter()
+        assert instant.generate("one two three four five", on_token=lambda t: None) == streamed
+        assert time.perf_counter() - started < 0.05
+        try:
+            instant.generate("never recorded")
+            assert False, "expected FixtureMissError"
+        except FixtureMissError:
+            pass
+        assert instant.fixtures.counters == {"recorded": 0, "replayed": 1, "misses": 1}
+
+
+if __name__ == "__main__":
+    test_recorded_answers_replay_without_a_backend()
+    print("✓ All model fixture tests passed")
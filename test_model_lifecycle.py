@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for model preloading and load/inference time accounting
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(__file__))
+
+from model_lifecycle import ModelLifecycle
+from ollama_client import OllamaClient
+from test_ollama_client import start_stub_server
+
+
+def test_preload_hides_load_latency():
+    server = start_stub_server()
+    server.load_delay = 0.5
+    try:
+        client = OllamaClient(host=f"127.0.0.1:{server.server_port}", model="stub")
+        lifecycle = ModelLifecycle("stub", keep_alive="5m", client=client)
+        started = time.perf_counter()
+        lifecycle.preload()
+        # Preloading runs in the background and returns immediately
+        assert time.perf_counter() - started < 0.2
+        assert lifecycle.wait_ready(timeout=5)
+        assert server.requests[0] == {"model": "stub", "keep_alive": "5m"}
+
+        started = time.perf_counter()
+        for i in range(3):
+            assert lifecycle.generate(f"prompt {i}", cache=False) == f"echo: prompt {i}"
+        # The model stays loaded, so no call pays the load delay again
+        assert time.perf_counter() - started < 0.4
+        assert server.loads == 1
+        assert all(r.get("keep_alive") == "5m" for r in server.requests)
+
+        stats = lifecycle.stats()
+        assert stats["loads"] == 1 and stats["calls"] == 3
+        assert 0.45 < stats["load_seconds"] < 1.0
+        assert stats["inference_seconds"] < 0.3
+        assert "loaded 1x" in lifecycle.report()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_reload_after_unload_is_counted_as_load():
+    server = start_stub_server()
+    server.load_delay = 0.3
+    try:
+        client = OllamaClient(host=f"127.0.0.1:{server.server_port}", model="stub")
+        lifecycle = ModelLifecycle("stub", client=client)
+        lifecycle.preload(wait=True)
+        lifecycle.unload()
+        tokens = []
+        lifecycle.generate("after unload", on_token=tokens.append, cache=False)
+        stats = lifecycle.stats()
+        assert tokens and server.loads == 2
+        assert stats["loads"] == 2
+        assert stats["inference_seconds"] < stats["load_seconds"]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    lifecycle = ModelLifecycle("stub", client=OllamaClient(host=f"127.0.0.1:{server.server_port}"))
+    assert lifecycle.preload(wait=True).ready is False
+    assert "preload failed" in lifecycle.report()
+
+
+if __name__ == "__main__":
+    test_preload_hides_load_latency()
+    test_reload_after_unload_is_counted_as_load()
+    print("✓ All model lifecycle tests passed")
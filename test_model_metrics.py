@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests for per-call model telemetry and its summary
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(__file__))
+
+from model_metrics import MetricsSink, build_entry, load_entries, print_summary, summarize
+from ollama_client import OllamaClient
+from prompt_cache import PromptCache
+from test_ollama_client import start_stub_server
+
+
+def test_every_call_is_recorded_with_timings():
+    server = start_stub_server()
+    server.token_delay = 0.02
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "metrics.jsonl")
+        cache = PromptCache(os.path.join(tmp, "cache.sqlite3"))
+        client = OllamaClient(host=f"127.0.0.1:{server.server_port}", model="stub",
+                              cache=cache, metrics=MetricsSink(path))
+        try:
+            client.generate("stream this please", on_token=lambda t: None)
+            client.generate("stream this please")                       # cache hit
+            client.generate("validate it", purpose="validation", caller="checker")
+            try:
+                client.generate("x", model="missing", cache=False)
+            except Exception:
+                pass
+        finally:
+            server.shutdown()
+            server.server_close()
+            cache.close()
+
+        entries = load_entries(path)
+        assert [e["source"] for e in entries] == ["model", "cache", "model", "model"]
+        streamed = entries[0]
+        assert streamed["caller"] == "test_model_metrics.py:test_every_call_is_recorded_with_timings"
+        assert streamed["endpoint"] == f"http://127.0.0.1:{server.server_port}"
+        assert streamed["eval_tokens"] == 4 and streamed["prompt_tokens"] == 3
+        assert 0 < streamed["ttft"] < streamed["wall"]
+        assert streamed["tokens_per_sec"] > 0 and streamed["queue_wait"] is not None
+        assert entries[2]["purpose"] == "validation" and entries[2]["caller"] == "checker"
+        assert entries[3]["ok"] is False and entries[3]["error"] == "OllamaError"
+
+        summary = summarize(entries)
+        assert summary["generation"]["calls"] == 3
+        assert summary["generation"]["cached"] == 1 and summary["generation"]["errors"] == 1
+        assert summarize(entries, by="caller")["checker"]["calls"] == 1
+        print_summary(summary)
+
+
+def test_failed_calls_are_not_early_stops():
+    failed = build_entry("stub", "generation", "checker", "model", 0.0, 0.5,
+                         timing={"endpoint": "http://127.0.0.1:11434"}, error=TimeoutError())
+    assert failed["ok"] is False and failed["stopped_early"] is False
+    # A stream closed by a stop condition finishes without Ollama's final chunk
+    stopped = build_entry("stub", "generation", "checker", "model", 0.0, 0.5,
+                          timing={"first_token": 0.1, "chunks": 3})
+    assert stopped["stopped_early"] is True
+
+
+if __name__ == "__main__":
+    test_every_call_is_recorded_with_timings()
+    test_failed_calls_are_not_early_stops()
+    print("✓ All model metrics tests passed")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Tests for purpose-based model routing and big-model fallback
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(__file__))
+
+import model_lifecycle
+from model_lifecycle import ModelLifecycle
+from model_routing import ModelRouter, review_is_confident
+from ollama_client import OllamaClient
+from test_ollama_client import start_stub_server
+
+ROUTES = {
+    "generation": {"model": None, "options": {}},
+    "validation": {"model": "small", "options": {"num_ctx": 4096, "temperature": 0.1}},
+    "clarification": {"model": "missing", "options": {}},
+}
+
+
+def test_purposes_route_and_fall_back_to_the_big_model():
+    server = start_stub_server(reply=lambda prompt: "CODE_APPROVED" if "approve" in prompt else "hmm")
+    client = OllamaClient(host=f"127.0.0.1:{server.server_port}")
+    for model in ("big", "small", "missing"):
+        model_lifecycle._lifecycles[model] = ModelLifecycle(model, client=client)
+    try:
+        router = ModelRouter("big", routes=ROUTES)
+        router.generate("write code", purpose="generation", cache=False)
+        assert server.requests[-1]["model"] == "big" and "options" not in server.requests[-1]
+
+        # A confident small-model answer is used as is, with the route's options
+        text = router.generate("please approve", purpose="validation", accept=review_is_confident,
+                               cache=False)
+        assert text.startswith("CODE_APPROVED")
+        assert server.requests[-1]["model"] == "small"
+        assert server.requests[-1]["options"] == {"num_ctx": 4096, "temperature": 0.1}
+
+        # Low confidence re-runs the prompt on the big model without the small profile
+        router.generate("review this", purpose="validation", accept=review_is_confident, cache=False)
+        assert [r["model"] for r in server.requests[-2:]] == ["small", "big"]
+        assert "options" not in server.requests[-1]
+
+        # Caller options reach the big model on fallback, still without the small profile
+        router.generate("review that", purpose="validation", accept=review_is_confident, cache=False,
+                        options={"num_predict": 64, "temperature": 0.7})
+        assert server.requests[-2]["options"] == {"num_ctx": 4096, "temperature": 0.7, "num_predict": 64}
+        assert server.requests[-1]["model"] == "big"
+        assert server.requests[-1]["options"] == {"num_predict": 64, "temperature": 0.7}
+
+        # A routed model that is not installed also falls back
+        router.generate("reformat", purpose="clarification", cache=False)
+        assert [r["model"] for r in server.requests[-2:]] == ["missing", "big"]
+
+        stats = router.stats()
+        assert stats[("validation", "small")] == {"calls": 3, "rejected": 2,
+                                                  "seconds": stats[("validation", "small")]["seconds"]}
+        assert stats[("validation", "big")]["calls"] == 2
+        assert "validation → small: 3 calls" in router.report()
+    finally:
+        for model in ("big", "small", "missing"):
+            model_lifecycle._lifecycles.pop(model, None)
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    test_purposes_route_and_fall_back_to_the_big_model()
+    print("✓ All model routing tests passed")
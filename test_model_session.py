@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Tests for system-prompt sessions that continue from returned context tokens
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(__file__))
+
+import model_lifecycle
+from model_lifecycle import ModelLifecycle
+from model_session import ModelSession
+from ollama_client import OllamaClient
+from test_ollama_client import start_stub_server
+
+PROJECT_CONTEXT = "PROJECT GOAL: " + "a long project description " * 50
+
+
+def test_session_sends_context_once_and_resets_on_edit():
+    server = start_stub_server()
+    client = OllamaClient(host=f"127.0.0.1:{server.server_port}")
+    model_lifecycle._lifecycles["stub"] = ModelLifecycle("stub", client=client)
+    try:
+        session = ModelSession("stub", max_tokens=2000)
+        session.generate("USER COMMAND: write a.py", system=PROJECT_CONTEXT, cache=False)
+        session.generate("USER COMMAND: fix a.py", system=PROJECT_CONTEXT, cache=False)
+        first, second = server.requests
+        assert first["system"] == PROJECT_CONTEXT and "context" not in first
+        # The follow-up continues from the returned tokens instead of re-sending the context
+        assert "system" not in second and len(second["context"]) > 200
+        assert session.stats()["prompt_tokens"] == 202 + 4 + 4
+
+        # Editing the context starts a new session with the new system prompt
+        session.generate("USER COMMAND: run a.py", system="NEW CONTEXT", cache=False)
+        assert server.requests[2]["system"] == "NEW CONTEXT"
+        assert "context" not in server.requests[2]
+        assert session.stats()["resets"] == 1
+
+        # Once the carried context outgrows the budget the next turn starts over
+        session.max_tokens = 10
+        session.generate("USER COMMAND: one more", system="NEW CONTEXT", cache=False)
+        session.generate("USER COMMAND: and again", system="NEW CONTEXT", cache=False)
+        assert server.requests[4]["system"] == "NEW CONTEXT"
+    finally:
+        model_lifecycle._lifecycles.pop("stub", None)
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    test_session_sends_context_once_and_resets_on_edit()
+    print("✓ All model session tests passed")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared streaming reader used by the orchestrators
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(__file__))
+
+from model_stream import GenerationCancelled, stream_model
+from ollama_client import OllamaClient
+from test_ollama_client import start_stub_server
+
+
+def test_tokens_and_lines_are_delivered():
+    server = start_stub_server(reply=lambda prompt: "line one\nline two\nend")
+    try:
+        client = OllamaClient(host=f"127.0.0.1:{server.server_port}", model="stub")
+        tokens, lines = [], []
+        text = stream_model(client.generate, "hi", on_token=tokens.append, on_line=lines.append,
+                            echo=False, cache=False)
+        assert "".join(tokens) == text
+        assert lines == ["line one", "line two", "end "]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_ctrl_c_cancels_the_generation():
+    server = start_stub_server(reply=lambda prompt: " ".join(["word"] * 50))
+    server.token_delay = 0.02
+    try:
+        client = OllamaClient(host=f"127.0.0.1:{server.server_port}", model="stub")
+        seen = []
+
+        def interrupt(token):
+            seen.append(token)
+            if len(seen) == 3:
+                raise KeyboardInterrupt
+
+        try:
+            stream_model(client.generate, "go", on_token=interrupt, echo=False, cache=False)
+            assert False, "expected GenerationCancelled"
+        except GenerationCancelled as e:
+            assert e.partial == "".join(seen)
+        time.sleep(0.2)
+        assert server.cancelled == 1   # The server noticed the dropped connection
+        # The client still works afterwards
+        assert stream_model(client.generate, "again", echo=False, cache=False).startswith("word")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_structured_replies_are_not_echoed(capsys):
+    def generate(prompt, on_token=None, **kwargs):
+        for token in ['{"logs": ', '"ok"}']:
+            on_token(token)
+        return '{"logs": "ok"}'
+
+    assert stream_model(generate, "hi") == '{"logs": "ok"}'
+    assert capsys.readouterr().out == '{"logs": "ok"}'
+    tokens = []
+    assert stream_model(generate, "hi", on_token=tokens.append, format={"type": "object"}) == '{"logs": "ok"}'
+    assert tokens == ['{"logs": ', '"ok"}']
+    assert capsys.readouterr().out == ""
+
+
+if __name__ == "__main__":
+    test_tokens_and_lines_are_delivered()
+    test_ctrl_c_cancels_the_generation()
+    print("✓ All stream reader tests passed")
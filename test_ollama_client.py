@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared Ollama client against a local stub /api/generate server
+"""
+
+import json
+import sys
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append(os.path.dirname(__file__))
+
+import ollama_client
+from ollama_client import (
+    CircuitBreaker, CircuitOpenError, OllamaClient, OllamaConnectionError, OllamaError,
+    code_block_closed,
+)
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """Mimics the parts of the Ollama REST API the client uses."""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json(200, {"models": [{"name": "stub:latest"}]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length))
+        self.server.requests.append(payload)
+        self.server.client_ports.add(self.client_address[1])
+        if self.path != "/api/generate":
+            self._send_json(404, {"error": "not found"})
+            return
+        if self.server.fail_next > 0:
+            self.server.fail_next -= 1
+            self._send_json(503, {"error": "server busy"})
+            return
+        if payload.get("model") == "missing":
+            self._send_json(404, {"error": "model 'missing' not found"})
+            return
+        load_duration = self._load_model(payload)
+        if not payload.get("prompt"):
+            # Empty prompt only loads (or with keep_alive=0 unloads) the model
+            self._send_json(200, {"model": payload["model"], "response": "", "done": True,
+                                  "load_duration": load_duration, "total_duration": load_duration})
+            return
+        reply = self.server.model_replies.get(payload["model"], self.server.reply)
+        text = reply(payload["prompt"])
+        started = time.perf_counter()
+        if not payload.get("stream", True):
+            time.sleep(self.server.token_delay * len(text.split(" ")))
+            self._send_json(200, {"model": payload["model"], "response": text, "done": True,
+                                  **self._durations(load_duration, started, payload, text)})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for token in text.split(" "):
+                self._write_chunk({"response": token + " ", "done": False})
+                time.sleep(self.server.token_delay)
+            self._write_chunk({"response": "", "done": True, **self._durations(load_duration, started, payload, text)})
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.server.cancelled += 1
+
+    def _load_model(self, payload):
+        """Simulate weight loading: the first request for a model pays load_delay."""
+        model = payload.get("model")
+        if payload.get("keep_alive") == 0:
+            self.server.loaded.discard(model)
+            return 0
+        if model in self.server.loaded:
+            return 100_000
+        time.sleep(self.server.load_delay)
+        self.server.loaded.add(model)
+        self.server.loads += 1
+        return int(self.server.load_delay * 1e9)
+
+    def _durations(self, load_duration, started, payload, text):
+        # One fake token per word; a continued conversation skips evaluating the system prompt
+        prompt_tokens = len(payload["prompt"].split())
+        if not payload.get("context"):
+            prompt_tokens += len((payload.get("system") or "").split())
+        elapsed = int((time.perf_counter() - started) * 1e9)
+        return {"load_duration": load_duration,
+                "total_duration": load_duration + elapsed,
+                "prompt_eval_count": prompt_tokens,
+                "prompt_eval_duration": 1_000_000,
+                "eval_count": len(text.split()),
+                "eval_duration": max(elapsed, 1_000_000),
+                "context": list(payload.get("context") or []) + [0] * (prompt_tokens + len(text.split()))}
+
+    def _write_chunk(self, data):
+        line = (json.dumps(data) + "\n").encode()
+        self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+        self.wfile.flush()
+
+
+def start_stub_server(reply=lambda prompt: f"echo: {prompt}"):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllamaHandler)
+    server.daemon_threads = True
+    server.requests = []
+    server.client_ports = set()
+    server.reply = reply
+    server.token_delay = 0
+    server.cancelled = 0
+    server.load_delay = 0
+    server.loaded = set()
+    server.loads = 0
+    server.fail_next = 0
+    server.model_replies = {}   # Per-model reply overrides
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_generate_reuses_connection():
+    server = start_stub_server()
+    try:
+        client = OllamaClient(host=f"127.0.0.1:{server.server_port}", model="stub")
+        for i in range(5):
+            assert client.generate(f"prompt {i}") == f"echo: prompt {i}"
+        # All five calls should have gone over the same keep-alive socket
+        assert len(server.client_ports) == 1
+        assert server.requests[0]["model"] == "stub"
+        assert server.requests[0]["stream"] is False
+        client.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_generate_streams_tokens():
+    server = start_stub_server()
+    try:
+        client = OllamaClient(host=f"http://127.0.0.1:{server.server_port}", model="stub")
+        tokens = []
+        text = client.generate("hello there", on_token=tokens.append)
+        assert text.strip() == "echo: hello there"
+        assert len(tokens) == 3
+        # The streamed connection is drained and reused afterwards
+        client.generate("again")
+        assert len(server.client_ports) == 1
+        client.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_stream_stops_when_code_block_closes():
+    explanation = " ".join(["This line explains the code at length."] * 40)
+    code_reply = f"```python\nprint('hi')\n```\n{explanation}"
+    server = start_stub_server(lambda prompt: code_reply if "code" in prompt else f"echo: {prompt}")
+    server.token_delay = 0.01
+    try:
+        client = OllamaClient(host=f"127.0.0.1:{server.server_port}", model="stub")
+        started = time.time()
+        text = client.generate("code please", stop_when=[code_block_closed])
+        elapsed = time.time() - started
+        assert text.count("```") == 2
+        assert "explains" not in text
+        # Full reply is ~240 tokens at 10 ms each; stopping early skips nearly all of it
+        assert elapsed < 1.0
+        time.sleep(0.1)
+        assert server.cancelled == 1
+        # Closing the generator early also cancels the request
+        tokens = client.stream("one two three", stop_when=[lambda t: "one" in t])
+        assert list(tokens) == ["echo: ", "one "]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_identical_inflight_requests_are_coalesced():
+    server = start_stub_server()
+    server.token_delay = 0.05
+    try:
+        client = OllamaClient(host=f"127.0.0.1:{server.server_port}", model="stub")
+        results = []
+
+        def call(**kwargs):
+            results.append(client.generate("same prompt", on_token=lambda t: None, **kwargs))
+
+        threads = [threading.Thread(target=call) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == ["echo: same prompt "] * 4
+        assert len(server.requests) == 1
+        assert client.coalescing["leaders"] == 1 and client.coalescing["coalesced"] == 3
+        assert "Coalesced 3" in client.coalescing_report()
+
+        # Non-deterministic requests always get their own generation
+        threads = [threading.Thread(target=call, kwargs={"deterministic": False}) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(server.requests) == 3
+
+        # Uncached calls sample fresh output, so they are never merged either
+        threads = [threading.Thread(target=call, kwargs={"cache": False}) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(server.requests) == 5
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_errors_are_raised():
+    server = start_stub_server()
+    try:
+        client = OllamaClient(host=f"127.0.0.1:{server.server_port}")
+        try:
+            client.generate("x", model="missing")
+            assert False, "expected OllamaError"
+        except OllamaError as e:
+            assert "not found" in str(e)
+        assert client.list_models() == ["stub:latest"]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    try:
+        OllamaClient(host=f"127.0.0.1:{server.server_port}").generate("x")
+        assert False, "expected OllamaConnectionError"
+    except OllamaConnectionError:
+        pass
+
+
+def test_transient_errors_are_retried_then_breaker_opens():
+    server = start_stub_server()
+    saved_delay = ollama_client.RETRY_BASE_DELAY
+    ollama_client.RETRY_BASE_DELAY = 0.01
+    try:
+        breaker = CircuitBreaker(threshold=3, reset_after=0.2)
+        client = OllamaClient(host=f"127.0.0.1:{server.server_port}", model="stub",
+                              retries=3, breaker=breaker)
+        server.fail_next = 2
+        assert client.generate("hi", cache=False) == "echo: hi"
+        assert len(server.requests) == 3 and breaker.state == "closed"
+
+        # Bad requests are not retried and do not count against the backend
+        try:
+            client.generate("x", model="missing")
+        except OllamaError as e:
+            assert e.status == 404
+        assert len(server.requests) == 4 and breaker.failures == 0
+
+        server.fail_next = 3
+        try:
+            client.generate("down", cache=False)
+            assert False, "expected CircuitOpenError"
+        except CircuitOpenError:
+            pass
+        sent = len(server.requests)
+        try:
+            client.generate("fast", cache=False)
+            assert False, "expected CircuitOpenError"
+        except CircuitOpenError:
+            assert len(server.requests) == sent  # Failed fast, nothing sent
+
+        time.sleep(0.25)
+        assert client.generate("back", cache=False) == "echo: back"
+        assert breaker.state == "closed" and breaker.trips == 1
+    finally:
+        ollama_client.RETRY_BASE_DELAY = saved_delay
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    test_generate_reuses_connection()
+    test_generate_streams_tokens()
+    test_stream_stops_when_code_block_closes()
+    test_identical_inflight_requests_are_coalesced()
+    test_errors_are_raised()
+    test_transient_errors_are_retried_then_breaker_opens()
+    print("✓ All model client tests passed")
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Tests for the structured orchestrator reply schema
+"""
+
+import json
+import sys
+import os
+sys.path.append(os.path.dirname(__file__))
+
+from orchestrator_protocol import parse_structured_output, validate_output
+
+
+def test_valid_reply_is_normalised():
+    reply = json.dumps({
+        "filename": "",
+        "files": [
+            {"filename": "app/main.py", "content": "```python\nprint('hi')\n```"},
+            {"filename": "app/util.py", "content": "X = 1\n"},
+            {"filename": "empty.py", "content": "   "},
+        ],
+        "logs": ["created two files", ""],
+        "errors": "none so far",
+    })
+    parsed = parse_structured_output(reply)
+    assert parsed["filename"] == "app/main.py"
+    assert parsed["code"] == ["print('hi')", "X = 1\n"]
+    assert [f["filename"] for f in parsed["files"]] == ["app/main.py", "app/util.py"]
+    assert parsed["logs"] == ["created two files"]
+    assert parsed["errors"] == ["none so far"]
+
+
+def test_non_conforming_replies_fall_back():
+    assert parse_structured_output("FILENAME: a.py\n```python\nx = 1\n```") is None
+    assert parse_structured_output('["not", "an", "object"]') is None
+    assert parse_structured_output('{"files": [{"filename": "a.py"}]}') is None
+    try:
+        validate_output({"files": [], "logs": [1, 2]})
+        assert False, "expected ValueError"
+    except ValueError as e:
+        assert "logs" in str(e)
+
+
+if __name__ == "__main__":
+    test_valid_reply_is_normalised()
+    test_non_conforming_replies_fall_back()
+    print("✓ All orchestrator protocol tests passed")
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Tests for PDF page templates (with a recording canvas instead of reportlab)
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(__file__))
+
+from pdf_template import FIRST_PAGE_FORM, NEXT_PAGE_FORM, PDF_INVARIANT, PdfTemplate
+from text_layout import GlyphMetrics, TextLayout
+
+# Every character is half the font size wide
+HALF_EM = TextLayout(lambda font, size: GlyphMetrics(lambda ch: size / 2, size * 0.8, size * 0.2))
+
+
+class RecordingCanvas:
+    def __init__(self, path, pagesize, invariant):
+        self.ops = [("open", path, invariant)]
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.ops.append((name,) + args)
+
+
+def test_forms_defined_once_and_referenced_per_page():
+    canvases = []
+
+    def factory(path, pagesize, invariant):
+        canvases.append(RecordingCanvas(path, pagesize, invariant))
+        return canvases[-1]
+
+    template = PdfTemplate(pagesize=(600, 800), title="Affirmations", footer="Personal use only",
+                           body_top=120, next_top=80, leading=30, bottom=100, canvas_factory=factory,
+                           text_layout=HALF_EM)
+    lines = [f"{i}. I am steady." for i in range(1, 51)]
+    pages = template.render("bundle.pdf", lines)
+    ops = canvases[0].ops
+
+    assert ops[0] == ("open", "bundle.pdf", PDF_INVARIANT)
+    assert [op for op in ops if op[0] == "beginForm"] == [("beginForm", FIRST_PAGE_FORM),
+                                                         ("beginForm", NEXT_PAGE_FORM)]
+    forms = [op[1] for op in ops if op[0] == "doForm"]
+    assert forms == [FIRST_PAGE_FORM] + [NEXT_PAGE_FORM] * (pages - 1)
+    assert pages == 3 and ops.count(("showPage",)) == 2
+    # Title and footer live only inside the forms; pages hold just the body text
+    strings = [op[3] for op in ops if op[0] == "drawString"]
+    assert strings.count("Affirmations") == 1 and strings.count("Personal use only") == 2
+    assert strings[-1] == "50. I am steady." and ops[-1] == ("save",)
+
+    # Same inputs, same drawing operations
+    template.render("bundle.pdf", lines)
+    assert canvases[1].ops == ops
+
+
+if __name__ == "__main__":
+    test_forms_defined_once_and_referenced_per_page()
+    print("✓ All PDF template tests passed")
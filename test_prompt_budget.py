@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for budgeted prompt assembly and history trimming
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(__file__))
+
+from prompt_budget import build_prompt, estimate_tokens, fit_history
+
+
+def test_optional_sections_are_dropped_lowest_priority_first():
+    sections = [
+        ("task", "Write a script that " + "does things " * 20, None),
+        ("extra", "Reinforcement " * 40, 1),
+        ("examples", "Example " * 40, 2),
+        ("footer", "Output only code.", None),
+    ]
+    prompt, report = build_prompt(sections, budget=10_000)
+    assert report["dropped"] == [] and prompt.endswith("Output only code.")
+
+    budget = estimate_tokens(prompt) - 20
+    prompt, report = build_prompt(sections, budget=budget)
+    assert report["dropped"] == ["extra"] and "Example" in prompt
+    assert report["tokens"] <= budget
+
+    prompt, report = build_prompt(sections, budget=30)
+    assert report["dropped"] == ["extra", "examples"] and report["truncated"] == ["task"]
+    assert "[...]" in prompt and prompt.endswith("Output only code.")
+    assert report["tokens"] <= 30
+
+
+def test_history_keeps_newest_and_summarises_the_rest():
+    entries = [f"command number {i} with some arguments" for i in range(100)]
+    kept, summary = fit_history(entries, budget=200)
+    assert kept and kept[-1] == entries[-1]
+    assert kept == entries[len(entries) - len(kept):]
+    assert summary.startswith(f"[{100 - len(kept)} earlier entries omitted")
+    assert entries[-len(kept) - 1] in summary   # Newest dropped entry is quoted
+
+    assert fit_history(entries[:3], budget=200) == (entries[:3], None)
+
+
+def test_repeated_trims_keep_one_summary():
+    import orchestrator_perfect
+    import prompt_budget
+    saved = prompt_budget.PROMPT_BUDGETS.get("history")
+    prompt_budget.PROMPT_BUDGETS["history"] = 200
+    try:
+        orchestrator_perfect.command_history = [
+            {"timestamp": i, "cmd": f"command number {i} with some arguments"} for i in range(60)]
+        orchestrator_perfect.trim_history()
+        first = orchestrator_perfect.command_history
+        omitted = 60 - (len(first) - 1)
+        assert first[0]["summary"] and first[0]["omitted"] == omitted
+
+        orchestrator_perfect.command_history = first + [
+            {"timestamp": i, "cmd": f"command number {i} with some arguments"} for i in range(60, 100)]
+        orchestrator_perfect.trim_history()
+        history = orchestrator_perfect.command_history
+        summaries = [entry for entry in history if entry.get("summary")]
+        assert len(summaries) == 1 and history[0] is summaries[0]
+        assert summaries[0]["omitted"] == 100 - (len(history) - 1)
+        assert summaries[0]["cmd"].startswith(f"[{summaries[0]['omitted']} earlier entries omitted")
+        assert summaries[0]["cmd"].count("earlier entries omitted") == 1
+    finally:
+        if saved is None:
+            prompt_budget.PROMPT_BUDGETS.pop("history", None)
+        else:
+            prompt_budget.PROMPT_BUDGETS["history"] = saved
+        orchestrator_perfect.command_history = []
+
+
+if __name__ == "__main__":
+    test_optional_sections_are_dropped_lowest_priority_first()
+    test_history_keeps_newest_and_summarises_the_rest()
+    test_repeated_trims_keep_one_summary()
+    print("✓ All prompt budget tests passed")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests for the disk-backed prompt cache and its use by the model client
+"""
+
+import sys
+import os
+import tempfile
+import time
+sys.path.append(os.path.dirname(__file__))
+
+from prompt_cache import PromptCache, make_cache_key
+from ollama_client import OllamaClient, named_condition
+from test_ollama_client import start_stub_server
+
+
+def test_keys_depend_on_model_options_and_prompt():
+    base = make_cache_key("m", "hello", options={"temperature": 0})
+    assert base == make_cache_key("m", "hello", options={"temperature": 0})
+    assert base != make_cache_key("m2", "hello", options={"temperature": 0})
+    assert base != make_cache_key("m", "hello", options={"temperature": 1})
+    assert base != make_cache_key("m", "hello!", options={"temperature": 0})
+
+
+def test_lru_ttl_and_budget():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = PromptCache(os.path.join(tmp, "cache.sqlite3"), max_bytes=20, ttl=60)
+        cache.put("a", "x" * 8)
+        cache.put("b", "y" * 8)
+        assert cache.get("a") == "x" * 8      # touch "a" so "b" is least recently used
+        cache.put("c", "z" * 8)               # 24 bytes > 20 byte budget
+        assert cache.get("b") is None
+        assert cache.get("a") == "x" * 8
+        assert cache.stats()["evictions"] == 1
+
+        cache.ttl = 0.05
+        time.sleep(0.1)
+        assert cache.get("c") is None
+        stats = cache.stats()
+        assert stats["expired"] == 1
+        assert stats["hits"] == 2 and stats["misses"] == 2
+        cache.close()
+
+
+def test_client_skips_model_on_repeats():
+    server = start_stub_server()
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = PromptCache(os.path.join(tmp, "cache.sqlite3"))
+        try:
+            client = OllamaClient(host=f"127.0.0.1:{server.server_port}", model="stub", cache=cache)
+            assert client.generate("fix this") == "echo: fix this"
+            assert client.generate("fix this") == "echo: fix this"
+            assert len(server.requests) == 1
+            # Bypass and refresh both go to the model
+            client.generate("fix this", cache=False)
+            client.generate("fix this", cache="refresh")
+            assert len(server.requests) == 3
+            assert cache.stats()["hits"] == 1
+            assert client.cache_report() == "📦 Prompt cache: 1 hits, 1 misses (50% hit rate)"
+        finally:
+            cache.close()
+            server.shutdown()
+            server.server_close()
+
+        # Lifetime totals survive the process; per-process counters start over
+        reopened = PromptCache(os.path.join(tmp, "cache.sqlite3"))
+        reopened.get(make_cache_key("stub", "never asked"))
+        stats = reopened.stats()
+        assert stats["hits"] == 0 and stats["misses"] == 1
+        assert stats["total_hits"] == 1 and stats["total_misses"] == 2
+        assert round(stats["total_hit_rate"]) == 33
+        reopened.close()
+
+
+def test_anonymous_stop_conditions_do_not_share_entries():
+    server = start_stub_server()
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = PromptCache(os.path.join(tmp, "cache.sqlite3"))
+        try:
+            client = OllamaClient(host=f"127.0.0.1:{server.server_port}", model="stub", cache=cache)
+            short = client.generate("one two three", stop_when=[lambda t: "one" in t])
+            full = client.generate("one two three", stop_when=[lambda t: "four" in t])
+            assert short != full
+            assert len(server.requests) == 2
+            assert cache.stats()["entries"] == 0
+            # A named condition is cached like a module-level function
+            stop = named_condition(lambda t: "one" in t, "stop_at_one")
+            assert client.generate("one two three", stop_when=[stop]) == short
+            assert client.generate("one two three", stop_when=[stop]) == short
+            assert len(server.requests) == 3
+        finally:
+            cache.close()
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    test_keys_depend_on_model_options_and_prompt()
+    test_lru_ttl_and_budget()
+    test_client_skips_model_on_repeats()
+    test_anonymous_stop_conditions_do_not_share_entries()
+    print("✓ All prompt cache tests passed")
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Tests for the process-pool render farm (with plain-text renderers instead of PIL/reportlab)
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(__file__))
+
+from render_farm import RenderFarm, RenderTemplate
+
+
+def save_upper(text, path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text.upper())
+
+
+def save_pid(text, path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(str(os.getpid()))
+
+
+TEMPLATE = RenderTemplate("test", {"txt": save_upper, "pid": save_pid})
+
+
+def test_jobs_render_in_worker_processes():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with RenderFarm([TEMPLATE], workers=2) as farm:
+            futures = [farm.submit(f"line {i}", TEMPLATE, None, os.path.join(tmpdir, f"item_{i}"))
+                       for i in range(4)]
+            bad = farm.submit("x", TEMPLATE, ("pdf",), os.path.join(tmpdir, "bad"))
+            results = [f.result(timeout=60) for f in futures]
+            assert isinstance(bad.exception(timeout=60), ValueError)
+
+        assert farm.counters == {"jobs": 5, "failed": 1}
+        for i, written in enumerate(results):
+            assert sorted(written) == ["pid", "txt"]
+            with open(written["txt"], encoding="utf-8") as f:
+                assert f.read() == f"LINE {i}"
+            with open(written["pid"], encoding="utf-8") as f:
+                assert int(f.read()) != os.getpid()
+
+        inline = RenderFarm(workers=0)
+        written = inline.submit("inline", TEMPLATE, ("txt",), os.path.join(tmpdir, "inline")).result()
+        assert written == {"txt": os.path.join(tmpdir, "inline.txt")}
+
+
+if __name__ == "__main__":
+    test_jobs_render_in_worker_processes()
+    print("✓ All render farm tests passed")
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Tests for the text layout engine (with fixed-width fake metrics instead of real fonts)
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(__file__))
+
+from text_layout import ELLIPSIS, GlyphMetrics, TextLayout
+
+
+def make_layout():
+    built, measured = [], []
+
+    def factory(font, size):
+        built.append((font, size))
+
+        def measure(ch):
+            measured.append((size, ch))
+            return size / 2   # Every character is half an em wide
+
+        return GlyphMetrics(measure, ascent=size * 0.8, descent=size * 0.2)
+
+    return TextLayout(factory), built, measured
+
+
+def test_wraps_fits_and_truncates():
+    layout, built, measured = make_layout()
+
+    # 10px font -> 5px per character, 60px box -> 12 characters per line
+    assert layout.wrap("I am calm and I am kind", "f", 10, 60) == ["I am calm", "and I am", "kind"]
+    assert layout.wrap("unbreakablewordhere ok", "f", 10, 60) == ["unbreakablew", "ordhere ok"]
+    assert layout.wrap("", "f", 10, 60) == [""]
+
+    block = layout.layout("I am calm and I am kind", "f", (10, 20, 60, 30), 20, min_size=4)
+    assert block.size == 10 and not block.truncated
+    assert [line.text for line in block.lines] == ["I am calm", "and I am", "kind"]
+    assert [line.top for line in block.lines] == [20, 30, 40]
+    assert block.lines[0].baseline == 28
+
+    centred = layout.layout(["ok"], "f", (0, 0, 100, 100), 10, align="center", valign="middle")
+    assert centred.lines[0].x == 45 and centred.lines[0].top == 45
+
+    cut = layout.layout("one two three four five six", "f", (0, 0, 40, 20), 12, min_size=10)
+    assert cut.truncated and cut.size == 10 and len(cut.lines) == 2
+    assert cut.lines[-1].text.endswith(ELLIPSIS) and cut.lines[-1].width <= 40
+
+    # Each (font, size) is built once and each character measured once per size
+    assert len(built) == len(set(built))
+    assert len(measured) == len(set(measured))
+
+
+def test_fixed_size_font_truncates_instead_of_overflowing():
+    # Old Pillow's built-in font measures the same at every requested size
+    layout = TextLayout(lambda font, size: GlyphMetrics(lambda ch: 6, ascent=9, descent=2))
+    block = layout.layout("one two three four five six seven", None, (0, 0, 60, 25), 24)
+    assert block.truncated and len(block.lines) == 2
+    assert block.lines[-1].text.endswith(ELLIPSIS)
+    assert all(line.width <= 60 and line.top + 11 <= 25 for line in block.lines)
+
+
+if __name__ == "__main__":
+    test_wraps_fits_and_truncates()
+    test_fixed_size_font_truncates_instead_of_overflowing()
+    print("✓ All text layout tests passed")
@@ -5,9 +5,14 @@ Test script to verify the timeout fix in python_code_generator.py
 
 import subprocess
 import sys
+import tempfile
 import time
 from pathlib import Path
 
+REPO_DIR = Path(__file__).resolve().parent
+# The generators write into ./generated_scripts, so run them from a scratch directory
+SCRATCH_DIR = tempfile.TemporaryDirectory(prefix="timeout_fix_")
+
 def test_no_hard_timeout():
     """Test that the script doesn't have hard timeout limits."""
     print("🧪 Testing timeout fix...")
@@ -15,7 +20,8 @@ def test_no_hard_timeout():
     # Test 1: Check that the script starts without immediate timeout
     try:
         process = subprocess.Popen(
-            [sys.executable, "python_code_generator.py"],
+            [sys.executable, str(REPO_DIR / "python_code_generator.py")],
+            cwd=SCRATCH_DIR.name,
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
@@ -47,7 +53,8 @@ def test_no_hard_timeout():
     # Test 2: Check that script provides proper feedback for missing Ollama
     try:
         process = subprocess.Popen(
-            [sys.executable, "python_code_generator.py"],
+            [sys.executable, str(REPO_DIR / "python_code_generator.py")],
+            cwd=SCRATCH_DIR.name,
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
@@ -96,7 +103,8 @@ def test_demo_mode():
     
     try:
         result = subprocess.run(
-            [sys.executable, "demo_generator.py"],
+            [sys.executable, str(REPO_DIR / "demo_generator.py")],
+            cwd=SCRATCH_DIR.name,
             input="\n\n\n",  # Skip through demo prompts
             text=True,
             capture_output=True,
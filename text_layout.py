@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Text Layout Engine
+Wraps and auto-sizes text to a box for both the PIL (PNG) and reportlab (PDF)
+renderers, so long model outputs and the disclaimer stay inside the canvas.
+
+Each (font, size) measures every character once and keeps its advance width,
+so a line is measured by adding cached numbers instead of calling
+draw.textbbox() for each candidate line; that keeps layout cheap across
+thousands of items per batch. The largest size that fits is found by binary
+search. The result is a list of line boxes (text, position, width, ascent) in
+top-down image coordinates that draw_png() and draw_pdf() can draw directly.
+
+Usage:
+    python3 text_layout.py "Some long affirmation text..."    # Show how it wraps on a bundle PNG
+"""
+
+import sys
+import threading
+
+from font_registry import get_font
+
+# ==================== LAYOUT CONFIGURATION ====================
+MIN_FONT_SIZE = 9           # Smallest size auto-fit will shrink to before truncating
+ELLIPSIS = "…"              # Appended to the last line when text is truncated
+# ==============================================================
+
+
+class GlyphMetrics:
+    """Cached advance widths and vertical metrics for one (font, size)."""
+
+    def __init__(self, measure_char, ascent, descent, line_height=None):
+        self._measure_char = measure_char
+        self._advances = {}
+        self.ascent = ascent
+        self.descent = descent
+        self.line_height = line_height or ascent + descent
+
+    def width(self, text: str) -> float:
+        advances = self._advances
+        total = 0.0
+        for ch in text:
+            advance = advances.get(ch)
+            if advance is None:
+                # Racing threads may both measure a new character; both get the same number
+                advance = advances[ch] = self._measure_char(ch)
+            total += advance
+        return total
+
+
+class LineBox:
+    """One laid-out line: top-left corner, width and ascent in top-down coordinates."""
+
+    __slots__ = ("text", "x", "top", "width", "ascent")
+
+    def __init__(self, text, x, top, width, ascent):
+        self.text = text
+        self.x = x
+        self.top = top
+        self.width = width
+        self.ascent = ascent
+
+    @property
+    def baseline(self) -> float:
+        return self.top + self.ascent
+
+    def __repr__(self):
+        return f"LineBox({self.text!r}, x={self.x:.1f}, top={self.top:.1f}, width={self.width:.1f})"
+
+
+class TextBlock:
+    """Lines of one layout, the size they were set at and whether text was cut off."""
+
+    def __init__(self, size, lines, truncated=False):
+        self.size = size
+        self.lines = lines
+        self.truncated = truncated
+
+
+class TextLayout:
+    """Wrapping and auto-fit over cached per-(font, size) metrics.
+
+    metrics_factory(font, size) returns the GlyphMetrics for that font; it is
+    called once per (font, size) for the life of the engine.
+    """
+
+    def __init__(self, metrics_factory):
+        self.metrics_factory = metrics_factory
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def metrics(self, font, size) -> GlyphMetrics:
+        key = (font, size)
+        with self._lock:
+            metrics = self._metrics.get(key)
+            if metrics is None:
+                metrics = self._metrics[key] = self.metrics_factory(font, size)
+            return metrics
+
+    @staticmethod
+    def _split_word(word, metrics, max_width):
+        # A word wider than the box is broken between characters
+        pieces, piece, width = [], "", 0.0
+        for ch in word:
+            advance = metrics.width(ch)
+            if piece and width + advance > max_width:
+                pieces.append(piece)
+                piece, width = "", 0.0
+            piece += ch
+            width += advance
+        pieces.append(piece)
+        return pieces
+
+    def wrap(self, text: str, font, size, max_width) -> list:
+        """Greedy word wrap of one paragraph to max_width; returns the lines."""
+        metrics = self.metrics(font, size)
+        space = metrics.width(" ")
+        lines, line, line_width = [], "", 0.0
+        for word in text.split():
+            word_width = metrics.width(word)
+            if word_width > max_width:
+                pieces = self._split_word(word, metrics, max_width)
+                if line:
+                    lines.append(line)
+                lines.extend(pieces[:-1])
+                line, line_width = pieces[-1], metrics.width(pieces[-1])
+            elif not line:
+                line, line_width = word, word_width
+            elif line_width + space + word_width <= max_width:
+                line += " " + word
+                line_width += space + word_width
+            else:
+                lines.append(line)
+                line, line_width = word, word_width
+        if line or not lines:
+            lines.append(line)
+        return lines
+
+    def _flow(self, paragraphs, font, size, width, line_spacing, paragraph_spacing):
+        """(text, top offset) for every line, and the total height used."""
+        metrics = self.metrics(font, size)
+        step = metrics.line_height * line_spacing
+        gap = metrics.line_height * paragraph_spacing
+        placed, y = [], 0.0
+        for i, paragraph in enumerate(paragraphs):
+            if i:
+                y += gap
+            for line in self.wrap(paragraph, font, size, width):
+                placed.append((line, y))
+                y += step
+        height = y - step + metrics.line_height if placed else 0.0
+        return placed, height
+
+    def layout(self, text, font, box, max_size, min_size=MIN_FONT_SIZE, line_spacing=1.0,
+               paragraph_spacing=0.0, align="left", valign="top") -> TextBlock:
+        """Fit text (a string, one paragraph per line, or a list of paragraphs)
+        into box = (x, y, width, height) at the largest size from min_size to
+        max_size; at min_size, lines that still do not fit are dropped and the
+        last kept line ends with an ellipsis."""
+        paragraphs = text.split("\n") if isinstance(text, str) else list(text)
+        x, y, width, height = box
+        min_size = min(min_size, max_size)
+
+        best, lo, hi = None, min_size, max_size
+        while lo <= hi:
+            size = (lo + hi) // 2
+            placed, used = self._flow(paragraphs, font, size, width, line_spacing, paragraph_spacing)
+            if used <= height:
+                best, lo = (size, placed, used), size + 1
+            else:
+                hi = size - 1
+
+        truncated = best is None
+        if truncated:
+            size = min_size
+            placed, _ = self._flow(paragraphs, font, size, width, line_spacing, paragraph_spacing)
+            line_height = self.metrics(font, size).line_height
+            placed = [p for p in placed if p[1] + line_height <= height] or placed[:1]
+            placed[-1] = (self._with_ellipsis(placed[-1][0], font, size, width), placed[-1][1])
+            used = placed[-1][1] + line_height
+        else:
+            size, placed, used = best
+
+        metrics = self.metrics(font, size)
+        offset = {"middle": (height - used) / 2, "bottom": height - used}.get(valign, 0.0)
+        lines = []
+        for line, top in placed:
+            line_width = metrics.width(line)
+            left = x + (width - line_width) / 2 if align == "center" else x
+            lines.append(LineBox(line, left, y + offset + top, line_width, metrics.ascent))
+        return TextBlock(size, lines, truncated)
+
+    def _with_ellipsis(self, line, font, size, width):
+        metrics = self.metrics(font, size)
+        while line and metrics.width(line + ELLIPSIS) > width:
+            line = line[:-1]
+        return line.rstrip() + ELLIPSIS
+
+
+def _pil_metrics(font, size):
+    face = get_font(font, size)
+    ascent, descent = face.getmetrics()
+    return GlyphMetrics(face.getlength, ascent, descent)
+
+
+def _pdf_metrics(font, size):
+    from reportlab.pdfbase.pdfmetrics import getAscentDescent, stringWidth
+    ascent, descent = getAscentDescent(font, size)
+    # reportlab's default leading is 1.2 x the font size
+    return GlyphMetrics(lambda ch: stringWidth(ch, font, size), ascent, -descent, line_height=size * 1.2)
+
+
+png_layout = TextLayout(_pil_metrics)   # font = TrueType path, sizes in pixels
+pdf_layout = TextLayout(_pdf_metrics)   # font = reportlab font name, sizes in points
+
+
+def draw_png(draw, block: TextBlock, font, fill):
+    """Draw a block laid out by png_layout onto a PIL ImageDraw."""
+    face = get_font(font, block.size)
+    for line in block.lines:
+        draw.text((line.x, line.top), line.text, font=face, fill=fill)
+
+
+def draw_pdf(c, block: TextBlock, font, page_height):
+    """Draw a block laid out by pdf_layout onto a reportlab canvas (top-down box coordinates)."""
+    c.setFont(font, block.size)
+    for line in block.lines:
+        c.drawString(line.x, page_height - line.baseline, line.text)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    from font_registry import FONT_FALLBACKS
+    block = png_layout.layout(" ".join(sys.argv[1:]), FONT_FALLBACKS[0], (60, 90, 780, 420), 26)
+    print(f"📐 {len(block.lines)} lines at {block.size}px{' (truncated)' if block.truncated else ''}")
+    for line in block.lines:
+        print(f"   {line.top:6.1f}  {line.text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,8 +19,14 @@ from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 import warnings
 
+from ollama_client import OllamaConnectionError, OllamaError
+from model_config import configured_model
+from model_lifecycle import get_lifecycle
+from model_routing import get_router, review_is_confident
+from prompt_budget import build_prompt, describe
+
 # ==================== USER CONFIGURATION ====================
-OLLAMA_MODEL = "mixtral:8x7b-instruct-v0.1-q6_K"
+OLLAMA_MODEL = configured_model("generation", "mixtral:8x7b-instruct-v0.1-q6_K")  # See model_benchmark.py
 DEFAULT_OUTPUT_DIR = "./generated_scripts"
 MAX_RETRIES = 3
 CONFIRM_AMBIGUOUS_INPUT = True
@@ -517,6 +523,8 @@ class UltimatePythonCodeGenerator:
     
     def __init__(self, model_name=OLLAMA_MODEL):
         self.model_name = model_name
+        self.lifecycle = get_lifecycle(model_name)
+        self.router = get_router(model_name)
         self.output_dir = Path(DEFAULT_OUTPUT_DIR)
         self.backup_dir = Path(BACKUP_DIRECTORY)
         self.context_buffer = []
@@ -851,11 +859,14 @@ class UltimatePythonCodeGenerator:
         
         return False
 
-    def call_model(self, prompt: str, purpose: str = "generation") -> str:
-        """Call the Ollama model with a prompt and return the response."""
+    def call_model(self, prompt: str, purpose: str = "generation", cache=True) -> str:
+        """Call the Ollama model with a prompt and return the response.
+
+        Repeated prompts are answered from the shared prompt cache; pass
+        cache="refresh" to force a fresh sample (e.g. on retries).
+        """
         thinking_active = None
         progress_thread = None
-        process = None
         
         try:
             if purpose == "generation":
@@ -883,25 +894,17 @@ class UltimatePythonCodeGenerator:
             progress_thread = threading.Thread(target=show_thinking_progress, daemon=True)
             progress_thread.start()
             
-            process = subprocess.Popen(
-                ["ollama", "run", self.model_name],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-            
-            stdout, stderr = process.communicate(input=prompt.encode())
+            # Send the prompt over the shared keep-alive connection pool
+            # Review goes to the small model when routed there; an unconvincing
+            # answer is re-run on the main model
+            accept = review_is_confident if purpose == "validation" else None
+            output = self.router.generate(prompt, purpose=purpose, accept=accept, cache=cache)
             
             thinking_active.clear()
             if progress_thread:
                 progress_thread.join(timeout=1)
             
-            if process.returncode != 0:
-                error_msg = stderr.decode().strip()
-                print(f"Error calling model: {error_msg}")
-                return None
-            
-            output = stdout.decode().strip()
+            output = output.strip()
             if purpose == "generation":
                 print("✓ Model finished thinking!")
             else:
@@ -911,8 +914,11 @@ class UltimatePythonCodeGenerator:
         except KeyboardInterrupt:
             print(f"\n⚠️  {purpose.capitalize()} interrupted by user.")
             return None
-        except FileNotFoundError:
-            print("Error: Ollama not found. Please ensure Ollama is installed and in your PATH.")
+        except OllamaConnectionError as e:
+            print(f"Error: {e}. Please ensure Ollama is installed and running (ollama serve).")
+            return None
+        except OllamaError as e:
+            print(f"Error calling model: {e}")
             return None
         except Exception as e:
             print(f"Unexpected error: {e}")
@@ -922,16 +928,6 @@ class UltimatePythonCodeGenerator:
                 thinking_active.clear()
             if progress_thread:
                 progress_thread.join(timeout=1)
-            if process:
-                try:
-                    if process.poll() is None:
-                        process.terminate()
-                        process.wait(timeout=5)
-                except:
-                    try:
-                        process.kill()
-                    except:
-                        pass
 
     def extract_python_code(self, response: str) -> str:
         """
@@ -1258,17 +1254,18 @@ Response:"""
         # Extract filename if specified by user
         cleaned_request, specified_filename = self.extract_filename_from_request(user_request)
         
-        # Ultra-Strong Anti-Fragmentation Prompt
-        prompt = f"""🚨 CRITICAL MANDATE - ABSOLUTELY MANDATORY 🚨
+        # Ultra-Strong Anti-Fragmentation Prompt, assembled under the generation token
+        # budget: the lowest-priority reinforcement sections are dropped first when a
+        # long request would otherwise push the prompt past it
+        sections = [
+            ("mandate", f"""🚨 CRITICAL MANDATE - ABSOLUTELY MANDATORY 🚨
 
 You are an expert Python developer. Generate ONE COMPLETE, COMPREHENSIVE Python script based on this request:
 
-"{cleaned_request}"
-
-🔥 BACKUP PLAN FOR STUBBORN AI MODELS 🔥
-If you even THINK about creating multiple files, STOP. This is a CRITICAL VIOLATION.
-
-🚨 ULTRA-CRITICAL REQUIREMENTS - NEVER VIOLATE THESE 🚨:
+"{cleaned_request}\"""", None),
+            ("backup_plan", """🔥 BACKUP PLAN FOR STUBBORN AI MODELS 🔥
+If you even THINK about creating multiple files, STOP. This is a CRITICAL VIOLATION.""", 2),
+            ("requirements", """🚨 ULTRA-CRITICAL REQUIREMENTS - NEVER VIOLATE THESE 🚨:
 1. Create EXACTLY ONE Python script that handles ALL aspects of the request
 2. NEVER EVER break this into multiple separate scripts - everything MUST be in ONE single file
 3. NEVER create file1.py, file2.py, script1.py, script2.py, or ANY multiple files
@@ -1277,23 +1274,20 @@ If you even THINK about creating multiple files, STOP. This is a CRITICAL VIOLAT
 6. Make the script complete, functional, and ready to run
 7. Include proper error handling and user-friendly interfaces
 8. Add clear comments explaining each section
-9. If there are multiple operations or categories, create a unified system that handles them all
-
-🚫 EXPLICIT ANTI-PATTERNS - NEVER DO THESE 🚫:
+9. If there are multiple operations or categories, create a unified system that handles them all""", None),
+            ("anti_patterns", """🚫 EXPLICIT ANTI-PATTERNS - NEVER DO THESE 🚫:
 - Do NOT create main.py and utils.py
 - Do NOT create separate files for different categories
 - Do NOT create config.py, helpers.py, or any other separate files
 - Do NOT suggest "you can split this into multiple files"
 - Do NOT create modular file structures
-- Do NOT use phrases like "create separate files for organization"
-
-🛡️ PSYCHOLOGICAL BARRIERS AGAINST SPLITTING 🛡️:
+- Do NOT use phrases like "create separate files for organization\"""", 5),
+            ("barriers", """🛡️ PSYCHOLOGICAL BARRIERS AGAINST SPLITTING 🛡️:
 - Every line of code MUST be in the SAME file
 - Creating multiple files is a CRITICAL FAILURE
 - One request = One comprehensive script = SUCCESS
-- Multiple files = ABSOLUTE FAILURE
-
-💡 WHAT TO INCLUDE IN THE ONE SCRIPT:
+- Multiple files = ABSOLUTE FAILURE""", 1),
+            ("include", """💡 WHAT TO INCLUDE IN THE ONE SCRIPT:
 - All data structures (dictionaries, lists, etc.)
 - All categories and subcategories  
 - All functionality (file operations, API calls, image generation, etc.)
@@ -1301,18 +1295,18 @@ If you even THINK about creating multiple files, STOP. This is a CRITICAL VIOLAT
 - All processing logic in one cohesive program
 - All configuration and settings
 - All helper functions and utilities
-- Everything needed to run the complete application
-
-🎯 NO MATTER HOW COMPLEX THE REQUEST IS:
+- Everything needed to run the complete application""", 3),
+            ("complexity", """🎯 NO MATTER HOW COMPLEX THE REQUEST IS:
 CREATE ONE COMPREHENSIVE SCRIPT THAT DOES EVERYTHING.
-COMPLEXITY = MORE CODE IN THE SAME FILE, NOT MORE FILES.
-
-Request details: {cleaned_request}
-
-🔧 Generate the complete Python code (no explanations, just code):"""
+COMPLEXITY = MORE CODE IN THE SAME FILE, NOT MORE FILES.""", 4),
+            ("details", f"Request details: {cleaned_request}", 0),
+            ("footer", "🔧 Generate the complete Python code (no explanations, just code):", None),
+        ]
+        prompt, budget_report = build_prompt(sections, purpose="generation")
+        print(describe(budget_report))
         
-        # Call the model
-        response = self.call_model(prompt)
+        # Call the model (retries re-sample instead of replaying the cached answer that just failed)
+        response = self.call_model(prompt, cache=True if attempt == 1 else "refresh")
         if not response:
             return False
         
@@ -1390,6 +1384,8 @@ Request details: {cleaned_request}
 def main():
     """Main interactive loop."""
     generator = UltimatePythonCodeGenerator()
+    # Load the model in the background while the banner prints and we wait for input
+    generator.lifecycle.preload()
     
     print("🚀 Ultimate Python Code Generator with Auto-Fixing Validators")
     print("=" * 80)
@@ -1475,6 +1471,9 @@ def main():
             
             if user_input.lower() in ['quit', 'exit', 'q']:
                 print("Goodbye! 👋")
+                print(generator.lifecycle.report())
+                print(generator.lifecycle.client.cache_report())
+                print(generator.router.report())
                 break
             
             if user_input.lower() == 'clear context':
@@ -1508,6 +1507,9 @@ def main():
             
         except KeyboardInterrupt:
             print("\n\nGoodbye! 👋")
+            print(generator.lifecycle.report())
+            print(generator.lifecycle.client.cache_report())
+            print(generator.router.report())
             break
         except Exception as e:
             print(f"An error occurred: {e}")